@@ -0,0 +1,143 @@
+"""Pairs/sec and memory for DexScreener payload decoding: stdlib json + dicts vs fast backend + PairSnapshot
+
+Usage: python benchmarks/bench_decode_pairs.py [pairs | recorded_response.json ...]
+
+Recorded payloads are raw /tokens/, /pairs/ or /search response bodies saved to disk.
+Without them a synthetic payload of the given size (default 30) is used.
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from synthetic import make_dexscreener_pairs
+
+import fast_json
+from pair_snapshot import decode_pairs
+
+ROUNDS = 200
+
+
+def load_payloads(args):
+    paths = [arg for arg in args if os.path.isfile(arg)]
+    if paths:
+        payloads = []
+        for path in paths:
+            with open(path, "rb") as f:
+                payloads.append(f.read())
+        return payloads
+    count = int(args[0]) if args else 30
+    return [json.dumps({"pairs": make_dexscreener_pairs(count)}).encode()]
+
+
+def _dict_pair_to_row(pair_info):
+    """dexscreener_fetcher._pair_to_row as it was before PairSnapshot, minus its logging"""
+    if not pair_info or not isinstance(pair_info, dict):
+        return None
+    pair_address = pair_info.get('pairAddress')
+    if not pair_address:
+        return None
+    base_token_info = pair_info.get('baseToken')
+    if not base_token_info or not base_token_info.get('address'):
+        return None
+
+    try:
+        pair_created_at_ts = pair_info.get('pairCreatedAt')
+        pair_created_at_dt = None
+        if pair_created_at_ts:
+            try:
+                pair_created_at_dt = datetime.fromtimestamp(pair_created_at_ts / 1000, tz=timezone.utc)
+            except Exception:
+                pass
+
+        volume = pair_info.get('volume', {})
+        price_change = pair_info.get('priceChange', {})
+        liquidity = pair_info.get('liquidity', {})
+
+        info_section = pair_info.get('info', {})
+        social_links_raw = {}
+        if info_section:
+            websites = info_section.get('websites', [])
+            socials = info_section.get('socials', [])
+            if websites and isinstance(websites, list) and websites[0].get('url'):
+                social_links_raw['website'] = websites[0]['url']
+            for social_item in socials:
+                if isinstance(social_item, dict) and social_item.get('label') and social_item.get('url'):
+                    social_links_raw[social_item['label'].lower()] = social_item['url']
+
+        top_level_links = pair_info.get('links')
+        if isinstance(top_level_links, dict):
+            for k, v_link in top_level_links.items():
+                if v_link and k not in social_links_raw:
+                    social_links_raw[k.lower()] = v_link
+
+        return {
+            "pair_address": pair_address,
+            "chain_id": pair_info.get('chainId'),
+            "dex_id": pair_info.get('dexId'),
+            "url": pair_info.get('url'),
+            "base_token_address": base_token_info['address'],
+            "base_token_name": base_token_info.get('name'),
+            "base_token_symbol": base_token_info.get('symbol'),
+            "quote_token_symbol": pair_info.get('quoteToken', {}).get('symbol'),
+            "price_usd": float(pair_info['priceUsd']) if pair_info.get('priceUsd') else None,
+            "price_native": float(pair_info['priceNative']) if pair_info.get('priceNative') else None,
+            "volume_h24": float(volume.get('h24')) if volume.get('h24') else None,
+            "volume_h6": float(volume.get('h6')) if volume.get('h6') else None,
+            "volume_h1": float(volume.get('h1')) if volume.get('h1') else None,
+            "price_change_h24": float(price_change.get('h24')) if price_change.get('h24') else None,
+            "price_change_h6": float(price_change.get('h6')) if price_change.get('h6') else None,
+            "price_change_h1": float(price_change.get('h1')) if price_change.get('h1') else None,
+            "liquidity_usd": float(liquidity.get('usd')) if liquidity.get('usd') else (float(liquidity.get('base')) * float(pair_info['priceUsd']) if liquidity.get('base') and pair_info.get('priceUsd') else None),
+            "fdv": float(pair_info.get('fdv')) if pair_info.get('fdv') else None,
+            "market_cap_usd": float(pair_info.get('marketCap')) if pair_info.get('marketCap') else None,
+            "holders": int(pair_info.get('holders')) if pair_info.get('holders') else None,
+            "pair_created_at": pair_created_at_dt,
+            "social_links_raw": social_links_raw if social_links_raw else None,
+            "last_dexscreener_fetch_at": datetime.now(timezone.utc)
+        }
+    except (KeyError, ValueError):
+        return None
+
+
+def baseline(content):
+    """Previous path: stdlib response.json(), raw dicts kept, rows built from dicts"""
+    pairs = json.loads(content)["pairs"]
+    rows = [_dict_pair_to_row(pair) for pair in pairs]
+    return pairs, rows
+
+
+def snapshots(content):
+    parsed = decode_pairs(content)
+    rows = [snapshot.to_row() for snapshot in parsed]
+    return parsed, rows
+
+
+def measure(fn, payloads, pair_count):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for content in payloads:
+            fn(content)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    kept = [fn(content)[0] for content in payloads]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return pair_count * ROUNDS / elapsed, retained / max(pair_count, 1)
+
+
+def main():
+    payloads = load_payloads(sys.argv[1:])
+    pair_count = sum(len(decode_pairs(content)) for content in payloads)
+    print(f"{len(payloads)} payload(s), {pair_count} pairs, fast backend: {fast_json.BACKEND}")
+    for label, fn in (("stdlib+dict", baseline), ("snapshot", snapshots)):
+        pairs_per_sec, bytes_per_pair = measure(fn, payloads, pair_count)
+        print(f"{label:12s} {pairs_per_sec:10.0f} pairs/sec  {bytes_per_pair:8.0f} bytes retained/pair")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Ticks/sec for the indicator engine: incremental NumPy state vs full-window recomputation
+
+Usage: python benchmarks/bench_indicators.py [tokens] [ticks] [window]
+
+The incremental engine advances every token of a tick batch in one vectorized
+update. The baseline keeps the last `window` prices per token and recomputes the
+indicators from that window on every tick, as a history-based implementation would.
+"""
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+import synthetic  # noqa: F401  (puts the repository on sys.path)
+
+from indicators import IndicatorEngine, recompute
+
+
+def price_batches(tokens, ticks, seed=0):
+    rng = np.random.default_rng(seed)
+    start = rng.uniform(0.001, 10, tokens)
+    returns = 1 + rng.uniform(-0.05, 0.05, (ticks, tokens))
+    return start * np.cumprod(returns, axis=0)
+
+
+def run_incremental(keys, batches, export_rows):
+    engine = IndicatorEngine(initial_capacity=len(keys))
+    start = time.perf_counter()
+    for batch in batches:
+        engine.update(keys, batch)
+        if export_rows:
+            engine.rows(keys)
+    return time.perf_counter() - start
+
+
+def run_full_window(keys, batches, window):
+    histories = {key: deque(maxlen=window) for key in keys}
+    start = time.perf_counter()
+    for batch in batches:
+        for key, price in zip(keys, batch.tolist()):
+            history = histories[key]
+            history.append(price)
+            recompute(history)
+    return time.perf_counter() - start
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    window = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    keys = [f"pair{i}" for i in range(tokens)]
+    batches = price_batches(tokens, ticks)
+    total = tokens * ticks
+
+    for label, export_rows in (("incremental", False), ("+row export", True)):
+        seconds = run_incremental(keys, batches, export_rows)
+        print(f"{label:12s} {tokens} tokens x {ticks} ticks: {seconds:.2f}s ({total / seconds:.0f} ticks/sec)")
+    full = run_full_window(keys, batches, window)
+    print(f"{'full window':12s} {tokens} tokens x {ticks} ticks, window {window}: {full:.2f}s ({total / full:.0f} ticks/sec)")
+
+
+if __name__ == "__main__":
+    main()
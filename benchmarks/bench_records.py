@@ -0,0 +1,55 @@
+"""Retained memory and build time per record: decoded payload dicts vs canonical TokenRecords
+
+Usage: python benchmarks/bench_records.py [records]   (default 100000 per source)
+
+Each source payload is decoded from JSON bytes once; the dict column keeps the decoded
+dicts, the record column keeps only the TokenRecords built from them. pump.fun records
+are measured without the raw payload (keep_payload=False); the row writer keeps it for
+the pumpfun_metadata column.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from synthetic import make_dexscreener_pairs, make_pumpfun_tokens, make_token_profiles
+
+import fast_json
+from pair_snapshot import PairSnapshot
+from token_record import TokenRecord
+
+
+def retained(build, content):
+    """Bytes still allocated after build(content) returns, and seconds it took"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build(content)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(kept)
+    del kept
+    return size, elapsed, count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sources = (
+        ("dexscreener", make_dexscreener_pairs(count), PairSnapshot.from_pair),
+        ("pumpfun", make_pumpfun_tokens(count), lambda token: TokenRecord.from_pumpfun(token, keep_payload=False)),
+        ("profile", make_token_profiles(count), TokenRecord.from_profile),
+    )
+    print(f"{count} records per source, fast backend: {fast_json.BACKEND}")
+    print(f"{'source':12s} {'dict B/rec':>11s} {'record B/rec':>13s} {'ratio':>6s} {'build us/rec':>13s}")
+    for label, payloads, convert in sources:
+        content = fast_json.dumps(payloads)
+        del payloads
+        dict_bytes, _, _ = retained(fast_json.loads, content)
+        record_bytes, elapsed, built = retained(lambda body: [convert(item) for item in fast_json.loads(body)], content)
+        print(f"{label:12s} {dict_bytes / count:11.0f} {record_bytes / built:13.0f} "
+              f"{dict_bytes / record_bytes:6.1f} {elapsed / built * 1e6:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
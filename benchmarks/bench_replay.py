@@ -0,0 +1,68 @@
+"""Replay speed: a synthetic day of recorded pump.fun and DexScreener polling through the full pipeline
+
+Usage: python benchmarks/bench_replay.py [hours] [pairs]
+
+The recording follows the default poll intervals: a pump.fun response of 50 tokens
+(two of them new) every 2 seconds and a DexScreener refresh of `pairs` pairs with
+random-walk prices every 30 seconds.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from synthetic import make_dexscreener_pairs
+
+from config import Config
+from database import Database, dispose_engines
+from replay import ReplayEngine
+from response_log import ResponseRecorder
+
+START = 1_700_000_000.0
+
+
+def record_day(directory, hours, pair_count, seed=0):
+    rng = random.Random(seed)
+    recorder = ResponseRecorder(directory, batch_size=500)
+    pairs = make_dexscreener_pairs(pair_count, seed=seed)
+    prices = [float(pair["priceUsd"]) for pair in pairs]
+    launches = 0
+    seconds = int(hours * 3600)
+    for t in range(0, seconds, 2):
+        launches += 2
+        tokens = [{"mint": f"launch{i:08d}pump", "name": f"Launch {i}", "usd_market_cap": "4200.00",
+                   "created_timestamp": int((START + t) * 1000)}
+                  for i in range(max(0, launches - 50), launches)]
+        recorder.record("pumpfun", tokens, START + t)
+        if t % 30 == 0:
+            batch = []
+            for i, pair in enumerate(pairs):
+                prices[i] *= 1 + rng.uniform(-0.08, 0.1)
+                batch.append(dict(pair, priceUsd=f"{prices[i]:.12f}", priceNative=f"{prices[i] / 150:.12f}"))
+            recorder.record("dexscreener", batch, START + t)
+    recorder.close()
+    return recorder.stats()
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24
+    pair_count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = os.path.join(tmp, "recording")
+        start = time.perf_counter()
+        recorded = record_day(recording, hours, pair_count)
+        print(f"Recorded {recorded['responses_recorded']} responses ({recorded['bytes_written'] / 1e6:.1f} MB gzip) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        db = Database(os.path.join(tmp, "replay.db"))
+        report = ReplayEngine(Config(dex_filters_path=""), db).run(recording)
+        db.close()
+        dispose_engines()
+    print(f"Replayed {report.recorded_seconds / 3600:.1f}h in {report.wall_seconds:.1f}s "
+          f"({report.speedup:.0f}x real time), {report.tokens_discovered} launches, {report.pairs_stored} pair writes")
+    print(f"Simulated PnL: {report.pnl}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Ticks/sec of indicator + filter analysis in-process vs sharded over 1, 2, 4 and 8 worker processes
+
+Usage: python benchmarks/bench_sharding.py [tokens] [ticks] [workers,...]
+
+Every tick is one batch holding a snapshot of every token, as a full DexScreener
+refresh cycle would produce. Scaling is bounded by the cores available: on a
+machine with fewer cores than workers the extra shards only add IPC overhead.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from synthetic import make_dexscreener_pairs
+
+from dex_filters import FilterPipeline, FilterRule
+from indicators import IndicatorEngine
+from pair_snapshot import PairSnapshot, snapshots_from_pairs
+from sharded_analysis import ShardedAnalyzer
+from token_record import TokenRecord
+
+RULES = [
+    FilterRule("min_liquidity", "liquidity_usd", min=1000),
+    FilterRule("max_market_cap", "market_cap_usd", max=5e6, missing="pass"),
+    FilterRule("turnover", "volume_liquidity_ratio", min=0.1, missing="pass"),
+]
+
+
+def tick_stream(tokens, ticks, seed=0):
+    """One list of snapshots per tick, prices following a random walk"""
+    base = snapshots_from_pairs(make_dexscreener_pairs(tokens, seed=seed))
+    fields = [{name: getattr(snapshot, name) for name in TokenRecord.__slots__} for snapshot in base]
+    rng = np.random.default_rng(seed)
+    prices = np.array([snapshot.price_usd for snapshot in base])
+    batches = []
+    for _ in range(ticks):
+        prices = prices * (1 + rng.uniform(-0.05, 0.05, tokens))
+        batches.append([PairSnapshot(**dict(f, price_usd=price)) for f, price in zip(fields, prices.tolist())])
+    return batches
+
+
+def run_in_process(batches):
+    engine = IndicatorEngine(initial_capacity=len(batches[0]))
+    pipeline = FilterPipeline(RULES)
+    start = time.perf_counter()
+    for snapshots in batches:
+        keys = [snapshot.pair_address for snapshot in snapshots]
+        engine.update(keys, [snapshot.price_usd for snapshot in snapshots])
+        engine.rows(keys)
+        pipeline.evaluate(snapshots)
+    return time.perf_counter() - start
+
+
+def run_sharded(batches, workers):
+    with ShardedAnalyzer(workers, rules=RULES, timeout=600) as analyzer:
+        analyzer.analyze(batches[0][:workers * 10])  # workers are up and imported
+        start = time.perf_counter()
+        for snapshots in batches:
+            analyzer.analyze(snapshots)
+        return time.perf_counter() - start
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    worker_counts = [int(n) for n in sys.argv[3].split(",")] if len(sys.argv) > 3 else [1, 2, 4, 8]
+    batches = tick_stream(tokens, ticks)
+    total = tokens * ticks
+    print(f"{tokens} tokens x {ticks} ticks, {os.cpu_count()} CPU(s)")
+    baseline = run_in_process(batches)
+    print(f"{'in-process':12s} {total / baseline:12.0f} ticks/sec")
+    for workers in worker_counts:
+        elapsed = run_sharded(batches, workers)
+        print(f"{workers:2d} worker(s)  {total / elapsed:12.0f} ticks/sec  {baseline / elapsed:5.2f}x in-process")
+
+
+if __name__ == "__main__":
+    main()
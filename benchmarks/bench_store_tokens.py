@@ -0,0 +1,40 @@
+"""Rows/sec for store_tokens_from_dexscreener, per-row ORM path vs bulk upsert
+
+Usage: python benchmarks/bench_store_tokens.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import make_dexscreener_pairs
+
+from database import Database, dispose_engines
+from dexscreener_fetcher import store_tokens_from_dexscreener
+
+
+def run(rows, bulk):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        pairs = make_dexscreener_pairs(rows)
+        results = {}
+        # First pass inserts every row, second pass updates every row
+        for phase in ("insert", "update"):
+            start = time.perf_counter()
+            new_count, updated_count = store_tokens_from_dexscreener(db.session, pairs, bulk=bulk)
+            elapsed = time.perf_counter() - start
+            results[phase] = {"new": new_count, "updated": updated_count, "seconds": elapsed, "rows_per_sec": rows / elapsed}
+        db.close()
+        dispose_engines()
+        return results
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    for label, bulk in (("orm", False), ("bulk", True)):
+        for phase, result in run(rows, bulk).items():
+            print(f"{label:5s} {phase:7s} {rows} rows: {result['seconds']:.2f}s ({result['rows_per_sec']:.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Ingestion hot-path benchmark suite with JSON results for comparing commits
+
+Usage:
+    python benchmarks/suite.py [--quick] [--output results.json] [--compare baseline.json] [--tolerance 0.2]
+
+Benchmarks:
+    store_tokens     store_tokens_from_dexscreener bulk upsert, rows/sec for inserts and updates
+    token_exists     Database.token_exists lookups/sec for known and unknown mints
+    parse_pairs      DexScreener payload decode into PairSnapshots and rows, microseconds per pair
+    poll_to_persist  IngestionEngine polling a local stub pump.fun server into SQLite; seconds
+                     from the stub serving a token to its row being committed
+
+Results are written to benchmarks/results/<commit>.json unless --output is given.
+With --compare, every metric is checked against the baseline file and the script
+exits with status 1 when one regressed by more than the tolerance. Metrics ending
+in _per_sec are better when higher, those ending in _seconds or _per_pair when lower;
+anything else (counts) is informational.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from synthetic import make_dexscreener_pairs, make_pumpfun_tokens
+
+from sqlalchemy import insert, select
+
+import fast_json
+from config import Config
+from database import Database, Token, dispose_engines
+from ingestion_engine import IngestionEngine
+from pair_snapshot import decode_pairs
+from pumpfun_fetcher import PumpFunFetcher
+from token_record import payload_created_at
+
+from bench_store_tokens import run as run_store_tokens
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else None
+
+
+def best_of(repeat, fn):
+    """Fastest of `repeat` timed runs of fn(); the minimum is the least noisy estimate"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_store_tokens(rows):
+    results = run_store_tokens(rows, bulk=True)
+    return {f"{phase}_rows_per_sec": result["rows_per_sec"] for phase, result in results.items()}
+
+
+def bench_token_exists(known, lookups):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        mints = [f"known{i:09d}pump" for i in range(known)]
+        with db.session_scope() as session:
+            session.execute(insert(Token), [{"pumpfun_mint_address": mint} for mint in mints])
+        start = time.perf_counter()
+        db.warm_seen_index()
+        warm_seconds = time.perf_counter() - start
+
+        results = {"warm_index_seconds": warm_seconds}
+        step = max(1, known // lookups)
+        hits = mints[::step][:lookups]
+        misses = [f"unknown{i:09d}" for i in range(lookups)]
+        for label, keys, expected in (("hit", hits, len(hits)), ("miss", misses, 0)):
+            found = sum(db.token_exists(mint) for mint in keys)
+            assert found == expected, f"{label}: {found} of {len(keys)} found"
+            elapsed = best_of(5, lambda: [db.token_exists(mint) for mint in keys])
+            results[f"{label}_lookups_per_sec"] = len(keys) / elapsed
+        db.close()
+        dispose_engines()
+    return results
+
+
+def bench_parse_pairs(pairs, rounds):
+    content = fast_json.dumps({"pairs": make_dexscreener_pairs(pairs)})
+    assert len(decode_pairs(content)) == pairs
+
+    def parse():
+        for _ in range(rounds):
+            [snapshot.to_row() for snapshot in decode_pairs(content)]
+
+    elapsed = best_of(5, parse)
+    return {
+        "parse_us_per_pair": elapsed / (pairs * rounds) * 1e6,
+        "parse_pairs_per_sec": pairs * rounds / elapsed,
+    }
+
+
+class StubPumpFunHandler(BaseHTTPRequestHandler):
+    """Serves a batch of fresh launches, stamped with the serve time, on every request"""
+    batch_size = 5
+    counter = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with StubPumpFunHandler.lock:
+            first = StubPumpFunHandler.counter
+            StubPumpFunHandler.counter += self.batch_size
+        now_ms = int(time.time() * 1000)
+        tokens = make_pumpfun_tokens(self.batch_size, seed=first)
+        for token in tokens:
+            token["created_timestamp"] = now_ms
+        body = fast_json.dumps(tokens)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_poll_to_persist(seconds, poll_interval):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubPumpFunHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        fetcher = PumpFunFetcher(api_key="bench", timeout=5, max_retries=1)
+        fetcher.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        config = Config(pumpfun_poll_interval=poll_interval, dexscreener_poll_interval=0,
+                        pumpfun_requests_per_second=1000.0, shutdown_timeout=5)
+        engine = IngestionEngine(config, db, fetcher)
+
+        async def run():
+            asyncio.get_running_loop().call_later(seconds, engine.request_shutdown)
+            await engine.run(install_signal_handlers=False)
+
+        asyncio.run(run())
+        db.flush()
+        with db.session_scope() as session:
+            rows = session.execute(select(Token.pumpfun_metadata, Token.first_seen_at)).all()
+        db.close()
+        dispose_engines()
+    server.shutdown()
+    server.server_close()
+
+    lags = []
+    for payload, first_seen_at in rows:
+        served_at = payload_created_at(payload or {})
+        if served_at is not None and first_seen_at is not None:
+            lags.append(first_seen_at.replace(tzinfo=timezone.utc).timestamp() - served_at)
+    return {
+        "tokens_persisted": len(lags),
+        "poll_to_persist_p50_seconds": percentile(lags, 0.5),
+        "poll_to_persist_p95_seconds": percentile(lags, 0.95),
+        "poll_to_persist_max_seconds": max(lags) if lags else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def direction(metric):
+    """+1 when a higher value is better, -1 when lower is better, None for informational metrics"""
+    if metric.endswith("_per_sec"):
+        return 1
+    if metric.endswith(("_seconds", "_per_pair")):
+        return -1
+    return None
+
+
+def compare(current, baseline, tolerance):
+    """Lines describing every shared metric, and the metrics that regressed beyond tolerance"""
+    lines, regressions = [], []
+    for bench, metrics in current["benchmarks"].items():
+        for metric, value in metrics.items():
+            before = baseline.get("benchmarks", {}).get(bench, {}).get(metric)
+            sign = direction(metric)
+            if sign is None or not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or not before:
+                continue
+            change = value / before - 1
+            worse = -change * sign
+            flag = "REGRESSION" if worse > tolerance else ""
+            if flag:
+                regressions.append(f"{bench}.{metric}")
+            lines.append(f"{bench + '.' + metric:48s} {before:14.4g} -> {value:14.4g} {change:+8.1%} {flag}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads, for CI smoke runs")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--only", help="Comma-separated benchmarks to run")
+    args = parser.parse_args()
+
+    scale = 0.1 if args.quick else 1.0
+    benchmarks = {
+        "store_tokens": lambda: bench_store_tokens(int(10000 * scale)),
+        "token_exists": lambda: bench_token_exists(int(100000 * scale), int(20000 * scale)),
+        "parse_pairs": lambda: bench_parse_pairs(30, int(2000 * scale)),
+        "poll_to_persist": lambda: bench_poll_to_persist(max(2.0, 10 * scale), 0.05),
+    }
+    selected = args.only.split(",") if args.only else list(benchmarks)
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "json_backend": fast_json.BACKEND,
+        "quick": args.quick,
+        "benchmarks": {},
+    }
+    for name in selected:
+        start = time.perf_counter()
+        result["benchmarks"][name] = benchmarks[name]()
+        print(f"{name:16s} {time.perf_counter() - start:6.1f}s  {result['benchmarks'][name]}")
+
+    output = args.output or os.path.join(BENCHMARK_DIR, "results", f"{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(result, baseline, args.tolerance)
+        print(f"Compared with {baseline.get('commit')} (tolerance {args.tolerance:.0%}):")
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Synthetic payload generators shared by the benchmark scripts"""
+import os
+import random
+import sys
+import time
+
+# Benchmarks import the top-level modules of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_dexscreener_pairs(count, seed=0, chain_id="solana"):
+    """Return `count` DexScreener-shaped pair dicts with unique pair addresses"""
+    rng = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    pairs = []
+    for i in range(count):
+        price = rng.uniform(1e-8, 5.0)
+        pairs.append({
+            "chainId": chain_id,
+            "dexId": rng.choice(["raydium", "orca", "meteora", "pumpswap"]),
+            "url": f"https://dexscreener.com/{chain_id}/pair{seed}x{i}",
+            "pairAddress": f"pair{seed}x{i:08d}",
+            "baseToken": {"address": f"mint{seed}x{i:08d}", "name": f"Token {i}", "symbol": f"TK{i}"},
+            "quoteToken": {"address": "So11111111111111111111111111111111111111112", "symbol": "SOL"},
+            "priceNative": f"{price / 150:.12f}",
+            "priceUsd": f"{price:.12f}",
+            "volume": {"h24": rng.uniform(0, 1e6), "h6": rng.uniform(0, 2e5), "h1": rng.uniform(0, 5e4), "m5": rng.uniform(0, 5e3)},
+            "priceChange": {"h24": rng.uniform(-90, 900), "h6": rng.uniform(-50, 300), "h1": rng.uniform(-30, 100)},
+            "liquidity": {"usd": rng.uniform(500, 5e5), "base": rng.uniform(1e3, 1e9), "quote": rng.uniform(1, 3e3)},
+            "fdv": rng.uniform(1e3, 1e7),
+            "marketCap": rng.uniform(1e3, 1e7),
+            "pairCreatedAt": now_ms - rng.randint(0, 86_400_000),
+            "info": {
+                "websites": [{"url": f"https://token{i}.example"}],
+                "socials": [{"label": "Twitter", "url": f"https://x.com/token{i}"}],
+            },
+        })
+    return pairs
+
+
+def make_pumpfun_tokens(count, seed=0):
+    """Return `count` pump.fun-shaped token payloads with unique mints"""
+    rng = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    return [{
+        "mint": f"mint{seed}x{i:08d}pump",
+        "name": f"Token {i}",
+        "symbol": f"TK{i}",
+        "description": f"Synthetic launch number {i}",
+        "usd_market_cap": f"{rng.uniform(1e3, 1e5):.2f}",
+        "created_timestamp": now_ms - rng.randint(0, 3_600_000),
+    } for i in range(count)]
+
+
+def make_token_profiles(count, seed=0, chain_id="solana"):
+    """Return `count` DexScreener token-profile items"""
+    return [{
+        "url": f"https://dexscreener.com/{chain_id}/mint{seed}x{i:08d}",
+        "chainId": chain_id,
+        "tokenAddress": f"mint{seed}x{i:08d}",
+        "description": f"Synthetic profile {i}",
+        "links": [{"type": "twitter", "url": f"https://x.com/token{i}"}, {"label": "Website", "url": f"https://token{i}.example"}],
+    } for i in range(count)]
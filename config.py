@@ -55,6 +55,27 @@ from typing import Optional
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///memecoins.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+# 0 keeps exact sets of seen addresses; otherwise size of the Bloom filter front
+SEEN_INDEX_BLOOM_CAPACITY = int(os.getenv('SEEN_INDEX_BLOOM_CAPACITY', '0'))
+# Write-behind buffer for Database.store_token: flush on whichever threshold is hit first
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', '500'))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', '0.5'))
+
+# Pump.fun token-detail cache (payloads keyed by mint address)
+PUMPFUN_TOKEN_CACHE_SIZE = int(os.getenv('PUMPFUN_TOKEN_CACHE_SIZE', '10000'))
+PUMPFUN_TOKEN_CACHE_TTL = float(os.getenv('PUMPFUN_TOKEN_CACHE_TTL', '3600'))
+PUMPFUN_TOKEN_CACHE_MAX_BYTES = int(os.getenv('PUMPFUN_TOKEN_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# DexScreener Configuration
+DEXSCREENER_API_URL = os.getenv('DEXSCREENER_API_URL', 'https://api.dexscreener.com/latest/dex')
+DEXSCREENER_CACHE_TTL = float(os.getenv('DEXSCREENER_CACHE_TTL', '10'))
+DEXSCREENER_CACHE_SIZE = int(os.getenv('DEXSCREENER_CACHE_SIZE', '2048'))
+DEXSCREENER_CACHE_PATH = os.getenv('DEXSCREENER_CACHE_PATH', '')  # Empty keeps the cache in memory only
+DEXSCREENER_CACHE_DISK_SIZE = int(os.getenv('DEXSCREENER_CACHE_DISK_SIZE', '50000'))
+DEXSCREENER_CACHE_DISK_RETENTION = float(os.getenv('DEXSCREENER_CACHE_DISK_RETENTION', '3600'))  # Seconds past expiry
 
 @dataclass
 class Config:
@@ -75,9 +96,77 @@ class Config:
     # Sniper Configuration
     min_liquidity: float = 1000.0
     max_market_cap: float = 100000.0
+    dex_filters_path: str = "dex_filters.json"  # Hot-reloaded rules; min_liquidity/max_market_cap apply while absent
     
     # API endpoint configuration
     pumpfun_api_url: str = "https://pumpfun-scraper-api.p.rapidapi.com/get_latest_token"
+    pumpfun_ws_url: str = "wss://pumpportal.fun/api/data"
+    pumpfun_stream_enabled: bool = False  # Stream launches over WebSocket, polling as fallback
+    
+    # Ingestion engine configuration (seconds, 0 disables a source)
+    pumpfun_poll_interval: float = 2.0
+    dexscreener_poll_interval: float = 30.0
+    dexscreener_chain_id: str = "solana"
+    dexscreener_max_concurrency: int = 8  # Batched /tokens/ requests in flight (per chain)
+    dexscreener_chain_ids: str = ""  # Comma-separated chains to sync, e.g. "solana,base,ethereum,bsc"; empty syncs dexscreener_chain_id
+    dexscreener_chain_concurrency: str = ""  # Per-chain caps overriding dexscreener_max_concurrency, e.g. "ethereum:2,bsc:2"
+    analysis_workers: int = 0  # Worker processes for indicators/filters, sharded by pair_address; 0 analyzes in-process
+    
+    # Request budgets per API host (requests/second, shared by all fetchers)
+    pumpfun_requests_per_second: float = 5.0
+    dexscreener_requests_per_second: float = 5.0
+    api_error_backoff: float = 60.0
+    shutdown_timeout: float = 10.0
+    
+    # Trend indicators, periods in price ticks (one tick per DexScreener refresh of a pair)
+    ema_short_period: int = 9
+    ema_long_period: int = 21
+    rsi_period: int = 14
+    volatility_band_period: int = 20
+    volatility_band_width: float = 2.0
+    
+    # Price history (seconds; off unless a segment directory is set, e.g. "price_history")
+    price_history_dir: str = ""
+    price_history_compact_after: float = 3600.0
+    price_history_downsample_after: float = 86400.0
+    price_history_downsample_interval: float = 60.0
+    price_history_retention: float = 30 * 86400.0
+    price_history_merge_window: float = 3600.0  # Compacted segments are merged per window of this many seconds
+    price_history_maintenance_interval: float = 300.0
+    
+    # Watchlist of continuously_monitor pairs (seconds; tick interval 0 disables)
+    watchlist_tick_interval: float = 1.0
+    watchlist_sync_interval: float = 60.0
+    watchlist_min_interval: float = 5.0
+    watchlist_max_interval: float = 300.0
+    watchlist_requests_per_second: float = 2.0  # Share of the DexScreener budget used for refreshes
+    
+    # Pump.fun -> DexScreener graduation tracking (seconds; check interval 0 disables)
+    graduation_check_interval: float = 1.0
+    graduation_initial_delay: float = 5.0
+    graduation_max_delay: float = 300.0
+    graduation_give_up_after: float = 86400.0
+    
+    # Insider-wallet flow aggregates (seconds; bucket width 0 disables)
+    insider_flow_bucket_seconds: int = 60
+    insider_flow_retention: float = 86400.0
+    
+    # Trade execution (off by default; paper trades on the simulated broker unless one is supplied)
+    trading_enabled: bool = False
+    max_concurrent_tokens: int = 5
+    default_buy_amount: float = 0.1  # SOL
+    max_in_flight_orders: int = 4
+    take_profit_multiple: float = 2.0
+    stop_loss_multiple: float = 0.5
+    order_reconcile_interval: float = 60.0  # Seconds between broker checks of orders unresolved after a restart
+    
+    # Record mode: raw fetcher responses appended to compressed logs for replay (empty disables)
+    record_dir: str = ""
+    record_rotate_after: float = 3600.0  # Seconds per log segment
+    
+    # Prometheus-style /metrics endpoint (port 0 disables)
+    metrics_port: int = 0
+    metrics_host: str = "127.0.0.1"
     
     def __post_init__(self):
         # Ensure backward compatibility
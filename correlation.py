@@ -0,0 +1,259 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from database import Token
+from metrics import LatencyTracker
+from pair_snapshot import PairSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Stay under SQLite's bound-parameter limit for IN (...) lookups
+IN_QUERY_CHUNK_SIZE = 500
+
+# Columns that describe the pump.fun side of a token; everything else may come from the DEX row
+PUMPFUN_COLUMNS = ('id', 'pumpfun_mint_address', 'pumpfun_metadata', 'is_pumpfun_launch',
+                   'description', 'first_seen_at', 'created_at', 'pumpfun_last_fetched')
+
+class Graduation:
+    """A pump.fun mint whose first DEX pair was found"""
+    __slots__ = ('mint', 'pair', 'snapshot', 'launched_at', 'detected_at')
+
+    def __init__(self, mint: str, pair: Dict[str, Any], snapshot: PairSnapshot, launched_at: float, detected_at: float):
+        self.mint = mint
+        self.pair = pair
+        self.snapshot = snapshot
+        self.launched_at = launched_at
+        self.detected_at = detected_at
+
+    @property
+    def graduated_at(self) -> float:
+        """Pair creation time, or detection time when DexScreener does not report it"""
+        created_ms = self.snapshot.pair_created_at_ms
+        return created_ms / 1000 if created_ms else self.detected_at
+
+    @property
+    def latency(self) -> float:
+        """Seconds from launch to graduation"""
+        return max(0.0, self.graduated_at - self.launched_at)
+
+class _PendingMint:
+    __slots__ = ('mint', 'launched_at', 'delay')
+
+    def __init__(self, mint: str, launched_at: float, delay: float):
+        self.mint = mint
+        self.launched_at = launched_at
+        self.delay = delay
+
+class GraduationTracker:
+    def __init__(self, fetch_pairs: Callable[[List[str]], List[Dict[str, Any]]], chain_id: str = "solana",
+                 initial_delay: float = 5.0, max_delay: float = 300.0, give_up_after: float = 86400.0,
+                 max_mints_per_check: int = 120):
+        """
+        Polls DexScreener for the first pair of newly launched pump.fun mints
+
+        Each tracked mint is due initial_delay seconds after it is tracked; when no
+        pair is found its delay doubles up to max_delay, and it is dropped after
+        give_up_after seconds. Due mints are looked up together through batched
+        /tokens/ requests.
+
+        Args:
+            fetch_pairs: Callable (mints) -> pair dicts, e.g. fetch_pairs_for_tokens without caching
+            chain_id: Chain the pairs must be on
+            initial_delay: Seconds before the first lookup of a mint
+            max_delay: Upper bound of the per-mint lookup delay
+            give_up_after: Seconds after launch after which a mint is no longer tracked
+            max_mints_per_check: Mints looked up per check_due() call
+        """
+        self.fetch_pairs = fetch_pairs
+        self.chain_id = chain_id
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.give_up_after = give_up_after
+        self.max_mints_per_check = max_mints_per_check
+
+        self._pending: Dict[str, _PendingMint] = {}
+        self._heap: List = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+        self.graduation_latency = LatencyTracker()
+        self.detection_lag = LatencyTracker()
+        self.graduated = 0
+        self.expired = 0
+        self.lookups = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def track(self, mint: str, launched_at: Optional[float] = None, now: Optional[float] = None) -> None:
+        """Start looking for the DEX pair of a newly seen mint"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            if mint in self._pending:
+                return
+            self._pending[mint] = _PendingMint(mint, launched_at if launched_at is not None else now, self.initial_delay)
+            heapq.heappush(self._heap, (now + self.initial_delay, next(self._sequence), mint))
+
+    def load_pending(self, db: Session, now: Optional[float] = None) -> int:
+        """
+        Track pump.fun launches from earlier runs that have no pair yet
+
+        Returns:
+            Number of mints tracked
+        """
+        now = now if now is not None else time.time()
+        since = datetime.fromtimestamp(now - self.give_up_after, tz=timezone.utc)
+        rows = db.execute(
+            select(Token.pumpfun_mint_address, Token.first_seen_at)
+            .where(Token.is_pumpfun_launch.is_(True), Token.pair_address.is_(None),
+                   Token.pumpfun_mint_address.is_not(None), Token.first_seen_at >= since)
+        ).all()
+        for mint, first_seen_at in rows:
+            if first_seen_at.tzinfo is None:
+                first_seen_at = first_seen_at.replace(tzinfo=timezone.utc)
+            self.track(mint, first_seen_at.timestamp(), now=now - self.initial_delay)
+        return len(rows)
+
+    def check_due(self, now: Optional[float] = None) -> List[Graduation]:
+        """
+        Look up every due mint and return those that now have a pair
+
+        Returns:
+            Graduations, one per mint, using the mint's most liquid pair
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.max_mints_per_check:
+                _, _, mint = heapq.heappop(self._heap)
+                entry = self._pending.get(mint)
+                if entry is not None:
+                    due.append(entry)
+        if not due:
+            return []
+
+        self.lookups += len(due)
+        try:
+            pairs = self.fetch_pairs([entry.mint for entry in due])
+        except Exception as e:
+            logger.error(f"Error looking up pairs for {len(due)} pending mints: {e}")
+            self.errors += 1
+            with self._lock:
+                # The request itself failed: retry at the current delay
+                for entry in due:
+                    if self._pending.get(entry.mint) is entry:
+                        heapq.heappush(self._heap, (now + entry.delay, next(self._sequence), entry.mint))
+            return []
+
+        best: Dict[str, tuple] = {}
+        for pair in pairs:
+            snapshot = PairSnapshot.from_pair(pair)
+            if snapshot is None or (self.chain_id and snapshot.chain_id != self.chain_id):
+                continue
+            current = best.get(snapshot.base_token_address)
+            if current is None or (snapshot.liquidity_usd or 0) > (current[1].liquidity_usd or 0):
+                best[snapshot.base_token_address] = (pair, snapshot)
+
+        graduations = []
+        with self._lock:
+            for entry in due:
+                found = best.get(entry.mint)
+                if found is not None:
+                    del self._pending[entry.mint]
+                    graduation = Graduation(entry.mint, found[0], found[1], entry.launched_at, now)
+                    graduations.append(graduation)
+                    self.graduated += 1
+                    self.graduation_latency.add(graduation.latency)
+                    self.detection_lag.add(max(0.0, now - graduation.graduated_at))
+                elif now - entry.launched_at >= self.give_up_after:
+                    del self._pending[entry.mint]
+                    self.expired += 1
+                else:
+                    heapq.heappush(self._heap, (now + entry.delay, next(self._sequence), entry.mint))
+                    entry.delay = min(self.max_delay, entry.delay * 2)
+        for graduation in graduations:
+            logger.info(f"Pump.fun mint {graduation.mint} graduated to pair {graduation.snapshot.pair_address} "
+                        f"after {graduation.latency:.0f}s")
+        return graduations
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "graduated": self.graduated,
+            "expired": self.expired,
+            "lookups": self.lookups,
+            "errors": self.errors,
+            "graduation_latency": self.graduation_latency.summary(),
+            "detection_lag": self.detection_lag.summary(),
+        }
+
+def link_graduations(db: Session, graduations: List[Graduation]) -> int:
+    """
+    Merge each graduated mint's pump.fun row and DEX pair into one tokens row
+
+    Rows are found through the base_token_address and pair_address indexes. When
+    the pair was already stored as a separate row (e.g. by a trending refresh),
+    its non-null DEX-side columns are folded into the pump.fun row and it is deleted.
+
+    Args:
+        db: Session to write through; the caller commits
+        graduations: Output of GraduationTracker.check_due
+
+    Returns:
+        Number of tokens linked
+    """
+    if not graduations:
+        return 0
+    mints = [graduation.mint for graduation in graduations]
+    pair_addresses = [graduation.snapshot.pair_address for graduation in graduations]
+    rows = []
+    for i in range(0, len(mints), IN_QUERY_CHUNK_SIZE):
+        rows.extend(db.execute(select(Token).where(or_(
+            Token.base_token_address.in_(mints[i:i + IN_QUERY_CHUNK_SIZE]),
+            Token.pair_address.in_(pair_addresses[i:i + IN_QUERY_CHUNK_SIZE]),
+        ))).scalars())
+    by_mint = {row.pumpfun_mint_address: row for row in rows if row.pumpfun_mint_address}
+    by_pair = {row.pair_address: row for row in rows if row.pair_address}
+
+    now = datetime.now(timezone.utc)
+    for graduation in graduations:
+        pump_row = by_mint.get(graduation.mint)
+        dex_row = by_pair.get(graduation.snapshot.pair_address)
+        if pump_row is not None and dex_row is not None and pump_row is not dex_row:
+            for column in Token.__table__.columns.keys():
+                value = getattr(dex_row, column)
+                if column not in PUMPFUN_COLUMNS and value is not None:
+                    setattr(pump_row, column, value)
+            pump_row.pair_address = None
+            db.delete(dex_row)
+            # The pair address is unique, so the duplicate must be gone before it moves over
+            db.flush()
+            target = pump_row
+        elif pump_row is not None:
+            target = pump_row
+        elif dex_row is not None:
+            target = dex_row
+        else:
+            target = Token(first_seen_at=now)
+            db.add(target)
+
+        for column, value in graduation.snapshot.to_row().items():
+            # Keep what pump.fun told us (name, symbol, ...) where the pair leaves a gap
+            if value is not None:
+                setattr(target, column, value)
+        target.pumpfun_mint_address = graduation.mint
+        target.is_pumpfun_launch = True
+        target.dexscreener_metadata = graduation.pair
+        target.graduated_at = datetime.fromtimestamp(graduation.graduated_at, tz=timezone.utc)
+        target.graduation_latency_seconds = graduation.latency
+    db.flush()
+    return len(graduations)
@@ -1,81 +1,463 @@
 # database.py additions/updates
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, JSON, Text, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from config import DATABASE_URL
+import logging
+import threading
+import time
+from config import (
+    DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, SEEN_INDEX_BLOOM_CAPACITY,
+    WRITE_BEHIND_BATCH_SIZE, WRITE_BEHIND_FLUSH_INTERVAL
+)
+from metrics import DISCOVERY_TO_STORE_SECONDS, TOKENS_STORED, LatencyTracker
+from pumpfun_fetcher import normalize_pumpfun_token
+from migrations import migrate
+from seen_index import SeenIndex, MINT, PAIR
+from write_behind import WriteBehindWriter
+
+logger = logging.getLogger(__name__)
+
+_tokens_stored = TOKENS_STORED.labels("pumpfun")
+_discovery_to_store = DISCOVERY_TO_STORE_SECONDS.labels()
 
 Base = declarative_base()
 
+# One engine (and connection pool) per database URL for the whole process
+_engines = {}
+_engines_lock = threading.Lock()
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer commits; NORMAL skips the fsync per commit
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+def get_engine(url=None):
+    """Return the shared engine for a database URL, creating it on first use"""
+    url = url or DATABASE_URL
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is not None:
+            return engine
+        
+        if url.startswith("sqlite"):
+            in_memory = url in ("sqlite://", "sqlite:///:memory:")
+            kwargs = {"connect_args": {"check_same_thread": False}}
+            if in_memory:
+                # Every connection to :memory: is a separate database, so share one
+                kwargs["poolclass"] = StaticPool
+            else:
+                kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+            engine = create_engine(url, **kwargs)
+            if not in_memory:
+                event.listen(engine, "connect", _set_sqlite_pragmas)
+        else:
+            engine = create_engine(url, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                                   pool_timeout=DB_POOL_TIMEOUT, pool_pre_ping=True)
+        _engines[url] = engine
+        return engine
+
+def dispose_engines():
+    """Close every pooled connection; engines are recreated on next use"""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+def prepare_schema(engine):
+    """Bring an existing database up to the model schema and create any missing tables"""
+    migrate(engine, Base.metadata)
+    Base.metadata.create_all(engine)
+
 class Database:
-    def __init__(self, db_path=None):
+    def __init__(self, db_path=None, bloom_capacity=None):
         # Use DATABASE_URL from config or override with db_path
-        from config import DATABASE_URL
-        self.engine = create_engine(DATABASE_URL if db_path is None else f"sqlite:///{db_path}")
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
-        self.session = self.Session()
+        self.engine = get_engine(DATABASE_URL if db_path is None else f"sqlite:///{db_path}")
+        prepare_schema(self.engine)
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        # Thread-local session for the attribute-style API (db.session.query(...))
+        self.session = scoped_session(self.Session)
+        
+        # Known mint/pair addresses, warm-loaded on first use so dedup checks skip the database
+        if bloom_capacity is None:
+            bloom_capacity = SEEN_INDEX_BLOOM_CAPACITY
+        self.seen_index = SeenIndex(confirm=self._confirm_seen, bloom_capacity=bloom_capacity)
+        self._seen_loaded = False
+        self._seen_lock = threading.Lock()
+        
+        # store_token() only enqueues; a background thread writes batches
+        self.tokens_stored = 0
+        self.store_latency = LatencyTracker()
+        self._token_writer = WriteBehindWriter(
+            self._flush_tokens,
+            batch_size=WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+            name="token-writer"
+        )
 
     def initialize(self):
-        Base.metadata.create_all(self.engine)
+        prepare_schema(self.engine)
+
+    @contextmanager
+    def session_scope(self):
+        """Session for one unit of work: committed on success, rolled back on error, always closed"""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
     def add_token(self, token_data):
         token = Token(**token_data)
         self.session.add(token)
         self.session.commit()
+        self.mark_seen(mints=[token.pumpfun_mint_address], pair_addresses=[token.pair_address])
+
+    def store_token(self, token, discovered_at=None):
+        """
+        Queue a pump.fun token payload for a batched write
+        
+        Args:
+            token: Raw token dict from PumpFunFetcher.get_new_tokens()
+            discovered_at: Epoch seconds the token was discovered; the lag to its
+                commit is recorded in store_latency
+            
+        Returns:
+            bool: True if queued, False if the payload has no mint address
+        """
+        row = normalize_pumpfun_token(token)
+        if row is None:
+            logger.warning(f"Skipping token without mint address: {token}")
+            return False
+        self._token_writer.put((row, discovered_at))
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Block until every token queued so far is committed
+
+        Returns:
+            bool: False on timeout or when a token write failed; the writer keeps
+            retrying the failed rows
+        """
+        return self._token_writer.flush(timeout)
+
+    def write_stats(self):
+        """Queue depth, flush counts and flush latency of the token writer"""
+        return self._token_writer.stats()
+
+    def _flush_tokens(self, items):
+        # The last payload wins when a mint was queued more than once
+        rows_by_mint = {row["pumpfun_mint_address"]: row for row, _ in items}
+        now = datetime.now(timezone.utc)
+        rows = [dict(row, first_seen_at=now) for row in rows_by_mint.values()]
+        
+        with self.session_scope() as session:
+            dialect = self.engine.dialect.name
+            if dialect in ("sqlite", "postgresql"):
+                insert_fn = sqlite_insert if dialect == "sqlite" else postgresql_insert
+                stmt = insert_fn(Token.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[Token.__table__.c.pumpfun_mint_address],
+                    set_={
+                        "pumpfun_metadata": stmt.excluded.pumpfun_metadata,
+                        "market_cap_usd": stmt.excluded.market_cap_usd,
+                        "last_updated": now,
+                    }
+                )
+                session.execute(stmt, rows)
+            else:
+                new_rows = [row for row in rows if not self.token_exists(row["pumpfun_mint_address"])]
+                if new_rows:
+                    session.execute(insert(Token), new_rows)
+        self.mark_seen(mints=rows_by_mint)
+        self.tokens_stored += len(rows)
+        _tokens_stored.inc(len(rows))
+        committed_at = time.time()
+        for _, discovered_at in items:
+            if discovered_at is not None:
+                lag = committed_at - discovered_at
+                self.store_latency.add(lag)
+                _discovery_to_store.observe(lag)
+
+    def warm_seen_index(self):
+        """Load every known mint and pair address from the tokens table into the seen index"""
+        with self._seen_lock:
+            if self._seen_loaded:
+                return
+            with self.session_scope() as session:
+                result = session.execute(select(Token.pumpfun_mint_address, Token.pair_address)).yield_per(10000)
+                for rows in result.partitions():
+                    self.seen_index.add_many(MINT, (row[0] for row in rows))
+                    self.seen_index.add_many(PAIR, (row[1] for row in rows))
+            self._seen_loaded = True
+        logger.info(f"Seen index loaded: {self.seen_index.stats()}")
+
+    def pumpfun_payload(self, mint_address):
+        """Stored pump.fun payload of one mint, or None"""
+        with self.session_scope() as session:
+            return session.execute(
+                select(Token.pumpfun_metadata).where(Token.pumpfun_mint_address == mint_address)
+            ).scalar()
+
+    def recent_pumpfun_payloads(self, limit):
+        """(mint, payload) of the most recently stored pump.fun tokens, newest first"""
+        with self.session_scope() as session:
+            return session.execute(
+                select(Token.pumpfun_mint_address, Token.pumpfun_metadata)
+                .where(Token.pumpfun_mint_address.is_not(None))
+                .order_by(Token.id.desc())
+                .limit(limit)
+            ).all()
+
+    def mark_seen(self, mints=(), pair_addresses=()):
+        """Record addresses that were just written so later dedup checks see them"""
+        self.seen_index.add_many(MINT, mints)
+        self.seen_index.add_many(PAIR, pair_addresses)
 
     def token_exists(self, mint_address):
-        return self.session.query(Token).filter_by(pumpfun_mint_address=mint_address).first() is not None
+        if not self._seen_loaded:
+            self.warm_seen_index()
+        return self.seen_index.contains(MINT, mint_address)
+
+    def known_mints(self, mints):
+        """
+        Split mints by the in-memory seen index without touching the database
+
+        Returns:
+            (known, unconfirmed): unconfirmed holds Bloom-filter hits to pass to confirm_mints()
+        """
+        if not self._seen_loaded:
+            self.warm_seen_index()
+        return self.seen_index.partition(MINT, mints)
+
+    def confirm_mints(self, mints):
+        """Subset of mints stored in the tokens table, checked in one query"""
+        mints = list(mints)
+        with self.session_scope() as session:
+            found = set(session.execute(
+                select(Token.pumpfun_mint_address).where(Token.pumpfun_mint_address.in_(mints))
+            ).scalars())
+        self.seen_index.confirmed(MINT, mints, found)
+        return found
+
+    def pair_exists(self, pair_address):
+        if not self._seen_loaded:
+            self.warm_seen_index()
+        return self.seen_index.contains(PAIR, pair_address)
+
+    def _confirm_seen(self, kind, address):
+        """Database check behind a Bloom-filter hit"""
+        column = Token.pumpfun_mint_address if kind == MINT else Token.pair_address
+        with self.session_scope() as session:
+            return session.execute(select(Token.id).where(column == address).limit(1)).first() is not None
 
     def close(self):
-        self.session.close()
+        # Drain the write-behind queue before releasing the session
+        self._token_writer.close()
+        logger.info(f"Token writer closed: {self.write_stats()}")
+        self.session.remove()
 
 class Token(Base):
     __tablename__ = 'tokens'
+    __table_args__ = (
+        # Hot queries: newest pairs per chain, and filtered pairs ranked by liquidity
+        Index('ix_tokens_chain_id_pair_created_at', 'chain_id', 'pair_created_at'),
+        Index('ix_tokens_passed_dex_filters_liquidity_usd', 'passed_dex_filters', 'liquidity_usd'),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
     
-    id = Column(Integer, primary_key=True)
-    pumpfun_mint_address = Column(String(44), unique=True, index=True)
-    dexscreener_pair_address = Column(String(44), unique=True, index=True, nullable=True)
+    # Pair identity (DexScreener); NULL until a pump.fun launch has a DEX pair
+    pair_address = Column(String, unique=True, index=True, nullable=True)
+    chain_id = Column(String, default="solana", index=True)
+    dex_id = Column(String)
+    url = Column(String)
     
     # Token metadata
-    name = Column(String(255))
-    symbol = Column(String(20))
+    base_token_address = Column(String, index=True)
+    base_token_name = Column(String)
+    base_token_symbol = Column(String, index=True)
+    quote_token_symbol = Column(String)
     description = Column(Text)
     
-    # Classification flags
-    is_pumpfun_launch = Column(Boolean, default=False)
-    is_dexscreener_tracked = Column(Boolean, default=False)
+    # Market data
+    price_usd = Column(Float)
+    price_native = Column(Float)
+    volume_h24 = Column(Float)
+    volume_h6 = Column(Float)
+    volume_h1 = Column(Float)
+    price_change_h24 = Column(Float)
+    price_change_h6 = Column(Float)
+    price_change_h1 = Column(Float)
+    liquidity_usd = Column(Float)
+    fdv = Column(Float)
+    market_cap_usd = Column(Float)
+    pair_created_at = Column(DateTime)
+    holders = Column(Integer)
+    passed_dex_filters = Column(Boolean, index=True)
     
-    # Chain information
-    chain_id = Column(String(20), default="solana")
-    
-    # Metadata storage
+    # pump.fun launch data
+    is_pumpfun_launch = Column(Boolean, default=False, index=True)
+    pumpfun_mint_address = Column(String, unique=True, index=True)
     pumpfun_metadata = Column(JSON)
     dexscreener_metadata = Column(JSON)
+    graduated_at = Column(DateTime)  # When the launch's first DEX pair was created
+    graduation_latency_seconds = Column(Float)  # graduated_at minus the pump.fun launch time
+    
+    # Trend analysis
+    market_state = Column(String, index=True)
+    last_ema_short = Column(Float)
+    ema_short_slope = Column(Float)
+    last_ema_long = Column(Float)
+    ema_long_slope = Column(Float)
+    rsi_value = Column(Float)
+    volatility_bands_data = Column(JSON)
+    last_trend_analysis_at = Column(DateTime)
+    
+    # Trading state
+    gmgn_trade_status = Column(String, index=True)
+    gmgn_last_order_id = Column(String)
+    gmgn_buy_price_usd = Column(Float)
+    gmgn_buy_timestamp = Column(DateTime)
+    gmgn_sell_price_usd = Column(Float)
+    gmgn_sell_timestamp = Column(DateTime)
+    continuously_monitor = Column(Boolean, default=False, index=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    last_updated = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    first_seen_at = Column(DateTime)
+    last_updated_at = Column(DateTime)
+    last_dexscreener_fetch_at = Column(DateTime)
+    
+    # Social links
+    social_links_raw = Column(JSON)
+    social_links_verified_status = Column(String, index=True)
+    verified_social_links = Column(JSON)
     
-    # Trading metrics (can be populated later)
-    market_cap = Column(String(50))
-    price_usd = Column(String(50))
-    volume_24h = Column(String(50))
+    last_updated = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    pumpfun_last_fetched = Column(DateTime)
+    fetch_error_count = Column(Integer, default=0)
     
     def __repr__(self):
-        return f"<Token(mint={self.pumpfun_mint_address}, name={self.name})>"
+        return f"<Token(mint={self.pumpfun_mint_address}, pair={self.pair_address}, symbol={self.base_token_symbol})>"
+
+class InsiderTransaction(Base):
+    __tablename__ = 'insider_transactions'
+    
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, index=True)
+    wallet_address = Column(String, nullable=False, index=True)
+    token_address = Column(String, nullable=False, index=True)
+    transaction_type = Column(String, nullable=False)
+    amount_tokens = Column(Float)
+    amount_usd = Column(Float)
+    transaction_hash = Column(String, nullable=False, unique=True)
+    source = Column(String)
+    notes = Column(String)
+
+class InsiderTokenSummary(Base):
+    """Running insider totals per token, maintained incrementally by InsiderFlowIndex"""
+    __tablename__ = 'insider_token_summary'
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    token_address = Column(String, primary_key=True)
+    buy_usd = Column(Float, nullable=False, default=0.0)
+    sell_usd = Column(Float, nullable=False, default=0.0)
+    net_flow_usd = Column(Float, nullable=False, default=0.0)
+    buys = Column(Integer, nullable=False, default=0)
+    sells = Column(Integer, nullable=False, default=0)
+    distinct_wallets = Column(Integer, nullable=False, default=0)
+    launched_at = Column(DateTime)
+    first_buy_at = Column(DateTime)
+    first_buy_latency_seconds = Column(Float)  # first_buy_at minus launched_at
+    last_transaction_at = Column(DateTime)
+
+class InsiderFlowBucket(Base):
+    """Insider flow of one token in one fixed-width time bucket"""
+    __tablename__ = 'insider_flow_buckets'
+    # Clustered on (bucket_start, token_address) so "last N minutes" reads one contiguous range
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    bucket_start = Column(BigInteger, primary_key=True)  # Epoch seconds
+    token_address = Column(String, primary_key=True)
+    buy_usd = Column(Float, nullable=False, default=0.0)
+    sell_usd = Column(Float, nullable=False, default=0.0)
+    net_flow_usd = Column(Float, nullable=False, default=0.0)
+    transactions = Column(Integer, nullable=False, default=0)
+
+class InsiderTokenWallet(Base):
+    """Insider wallets seen per token, backing InsiderTokenSummary.distinct_wallets"""
+    __tablename__ = 'insider_token_wallets'
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    token_address = Column(String, primary_key=True)
+    wallet_address = Column(String, primary_key=True)
+    first_seen_at = Column(DateTime)
+
+class TradeOrder(Base):
+    """One broker order with its lifecycle timestamps; tokens.gmgn_* hold the resulting position"""
+    __tablename__ = 'trade_orders'
+    
+    order_id = Column(String, primary_key=True)
+    pair_address = Column(String, nullable=False, index=True)
+    token_address = Column(String)
+    chain_id = Column(String)
+    side = Column(String, nullable=False)  # buy / sell
+    status = Column(String, nullable=False, index=True)  # pending / submitted / filled / failed
+    amount = Column(Float)  # Quote amount for buys, token amount for sells
+    reference_price_usd = Column(Float)
+    reference_price_native = Column(Float)
+    fill_price_usd = Column(Float)
+    fill_amount_tokens = Column(Float)
+    broker_order_id = Column(String)
+    error = Column(String)
+    discovered_at = Column(DateTime)
+    decided_at = Column(DateTime)
+    submitted_at = Column(DateTime)
+    filled_at = Column(DateTime)
+    discovery_to_fill_seconds = Column(Float)
+
+class PriceTick(Base):
+    """Append-only price observations of a pair; older ticks are compacted into segments by PriceHistoryStore"""
+    __tablename__ = 'price_ticks'
+    # Clustered on (pair_address, ts) so range reads of one pair are a single B-tree scan
+    __table_args__ = {'sqlite_with_rowid': False}
+    
+    pair_address = Column(String, primary_key=True)
+    ts = Column(BigInteger, primary_key=True)  # Epoch milliseconds
+    price_usd = Column(Float)
+    price_native = Column(Float)
+    liquidity_usd = Column(Float)
+    volume_h1 = Column(Float)
+    volume_h6 = Column(Float)
+    volume_h24 = Column(Float)
 
 # Database initialization
 def init_db():
-    engine = create_engine(DATABASE_URL)
-    Base.metadata.create_all(engine)
+    engine = get_engine()
+    prepare_schema(engine)
     return engine
 
+_session_factory = None
+
 def get_db_session():
-    engine = init_db()
-    SessionLocal = sessionmaker(bind=engine)
-    return SessionLocal()
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=init_db())
+    return _session_factory()
 # engine = create_engine(DATABASE_URL)
 # SessionLocal = sessionmaker(bind=engine)
 
@@ -84,5 +466,3 @@ def get_db_session():
 
 # def get_db_session():
 #     return SessionLocal()
-
-SessionLocal = sessionmaker(bind=init_db())
@@ -0,0 +1,234 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+import fast_json
+from database import Token
+from pair_snapshot import PairSnapshot
+
+logger = logging.getLogger(__name__)
+
+# PairSnapshot attributes a rule can test, plus values derived per batch
+SNAPSHOT_FIELDS = (
+    'price_usd', 'liquidity_usd', 'fdv', 'market_cap_usd', 'holders',
+    'volume_h24', 'volume_h6', 'volume_h1', 'price_change_h24', 'price_change_h6', 'price_change_h1',
+)
+DERIVED_FIELDS = ('age_seconds', 'volume_liquidity_ratio')
+
+@dataclass(frozen=True)
+class FilterRule:
+    """Keep pairs whose field lies within [min, max]; missing values fail unless missing == "pass" """
+    name: str
+    field: str
+    min: Optional[float] = None
+    max: Optional[float] = None
+    missing: str = "reject"
+
+    def __post_init__(self):
+        if self.field not in SNAPSHOT_FIELDS + DERIVED_FIELDS:
+            raise ValueError(f"Rule {self.name}: unknown field {self.field}")
+        if self.min is None and self.max is None:
+            raise ValueError(f"Rule {self.name}: needs min and/or max")
+        if self.missing not in ("reject", "pass"):
+            raise ValueError(f"Rule {self.name}: missing must be 'reject' or 'pass'")
+
+    def mask(self, values: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            keep = np.ones(len(values), dtype=bool)
+            if self.min is not None:
+                keep &= values >= self.min
+            if self.max is not None:
+                keep &= values <= self.max
+        if self.missing == "pass":
+            keep |= np.isnan(values)
+        return keep
+
+def default_rules(config) -> List[FilterRule]:
+    """Rules implied by Config when no rules file exists"""
+    return [
+        FilterRule("min_liquidity", "liquidity_usd", min=config.min_liquidity),
+        FilterRule("max_market_cap", "market_cap_usd", max=config.max_market_cap, missing="pass"),
+    ]
+
+def parse_rules(document: Dict[str, Any]) -> List[FilterRule]:
+    """
+    Build rules from a rules document
+
+    Format: {"rules": [{"name": "min_liquidity", "field": "liquidity_usd", "min": 1000}, ...]}
+    """
+    rules = [FilterRule(**spec) for spec in document.get("rules", [])]
+    names = [rule.name for rule in rules]
+    if len(set(names)) != len(names):
+        raise ValueError("Rule names must be unique")
+    return rules
+
+@dataclass
+class FilterResult:
+    pair_addresses: List[str]
+    passed: np.ndarray
+    rejections: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def passed_count(self) -> int:
+        return int(self.passed.sum())
+
+def _column(snapshots: Sequence[PairSnapshot], name: str) -> np.ndarray:
+    return np.fromiter((np.nan if value is None else value for value in (getattr(s, name) for s in snapshots)),
+                       dtype=np.float64, count=len(snapshots))
+
+class FilterPipeline:
+    def __init__(self, rules: List[FilterRule], path: Optional[str] = None,
+                 fallback_rules: Optional[List[FilterRule]] = None):
+        """
+        Declarative DEX filter evaluated over whole batches of PairSnapshots
+
+        Each rule yields one NumPy mask over the batch; a pair passes when every
+        mask is true. When path is set, the rules are re-read from that JSON file
+        whenever its modification time changes, so they can be edited while the
+        process runs. A missing file means fallback_rules; an invalid file keeps the
+        rules already loaded.
+
+        Args:
+            rules: Initial rules
+            path: Optional rules file to hot-reload (see parse_rules for the format)
+            fallback_rules: Rules used while path does not exist
+        """
+        self.rules = rules
+        self.path = path
+        self.fallback_rules = fallback_rules if fallback_rules is not None else list(rules)
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+        self.evaluated = 0
+        self.passed = 0
+        self.rejections: Dict[str, int] = {}
+        self.reloads = 0
+        self.reload_if_changed()
+
+    @classmethod
+    def from_config(cls, config) -> "FilterPipeline":
+        rules = default_rules(config)
+        return cls(rules, path=config.dex_filters_path or None, fallback_rules=rules)
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the rules file if it changed; returns True if the rules were replaced"""
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+
+        if mtime is None:
+            rules = self.fallback_rules
+        else:
+            try:
+                with open(self.path, "rb") as f:
+                    rules = parse_rules(fast_json.loads(f.read()))
+            except (OSError, TypeError, ValueError) as e:
+                logger.error(f"Invalid DEX filter rules in {self.path}, keeping current rules: {e}")
+                return False
+        with self._lock:
+            self.rules = rules
+        self.reloads += 1
+        logger.info(f"Loaded {len(rules)} DEX filter rule(s): {', '.join(rule.name for rule in rules)}")
+        return True
+
+    def evaluate(self, snapshots: Sequence[PairSnapshot], now: Optional[float] = None) -> FilterResult:
+        """
+        Evaluate every rule over the batch
+
+        Returns:
+            FilterResult with one pass flag per snapshot and, per rule, how many
+            snapshots it rejected (a snapshot failing several rules counts for each)
+        """
+        return self._evaluate([s.pair_address for s in snapshots], lambda name: _column(snapshots, name), now)
+
+    def evaluate_columns(self, pair_addresses: List[str], columns: Dict[str, np.ndarray],
+                         now: Optional[float] = None) -> FilterResult:
+        """
+        evaluate() over a batch already laid out as columns
+
+        Args:
+            pair_addresses: One address per row
+            columns: float64 arrays (NaN for missing) for every SNAPSHOT_FIELDS entry and pair_created_at_ms
+            now: Reference time for age_seconds
+        """
+        return self._evaluate(pair_addresses, columns.__getitem__, now)
+
+    def _evaluate(self, pair_addresses: List[str], column: Callable[[str], np.ndarray],
+                  now: Optional[float]) -> FilterResult:
+        self.reload_if_changed()
+        with self._lock:
+            rules = list(self.rules)
+        now = now if now is not None else time.time()
+
+        columns: Dict[str, np.ndarray] = {}
+
+        def values(name: str) -> np.ndarray:
+            if name not in columns:
+                if name == 'age_seconds':
+                    columns[name] = now - column('pair_created_at_ms') / 1000
+                elif name == 'volume_liquidity_ratio':
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        ratio = values('volume_h24') / values('liquidity_usd')
+                    columns[name] = np.where(np.isfinite(ratio), ratio, np.nan)
+                else:
+                    columns[name] = column(name)
+            return columns[name]
+
+        passed = np.ones(len(pair_addresses), dtype=bool)
+        rejections = {}
+        for rule in rules:
+            keep = rule.mask(values(rule.field))
+            rejections[rule.name] = int(len(keep) - keep.sum())
+            passed &= keep
+
+        result = FilterResult(pair_addresses, passed, rejections)
+        self.evaluated += len(pair_addresses)
+        self.passed += result.passed_count
+        for name, count in rejections.items():
+            self.rejections[name] = self.rejections.get(name, 0) + count
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules": [rule.name for rule in self.rules],
+            "evaluated": self.evaluated,
+            "passed": self.passed,
+            "rejections": dict(self.rejections),
+            "reloads": self.reloads,
+        }
+
+def store_filter_results(db: Session, result: FilterResult) -> int:
+    """
+    Write passed_dex_filters for every evaluated pair in one executemany
+
+    Args:
+        db: Session to write through; the caller commits
+        result: Output of FilterPipeline.evaluate
+
+    Returns:
+        Number of rows submitted
+    """
+    if not result.pair_addresses:
+        return 0
+    table = Token.__table__
+    stmt = (
+        update(table)
+        .where(table.c.pair_address == bindparam('b_pair_address'))
+        .values(passed_dex_filters=bindparam('passed'))
+    )
+    db.execute(stmt, [{'b_pair_address': pair_address, 'passed': bool(passed)}
+                      for pair_address, passed in zip(result.pair_addresses, result.passed)])
+    return len(result.pair_addresses)
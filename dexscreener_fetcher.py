@@ -138,14 +138,110 @@
 
 import requests
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+from requests.adapters import HTTPAdapter
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from config import DEXSCREENER_API_URL
+from config import (
+    DEXSCREENER_API_URL, DEXSCREENER_CACHE_TTL, DEXSCREENER_CACHE_SIZE, DEXSCREENER_CACHE_PATH,
+    DEXSCREENER_CACHE_DISK_SIZE, DEXSCREENER_CACHE_DISK_RETENTION
+)
 from database import Token
+from metrics import HttpEndpointMetrics
+from rate_limiter import default_scheduler, host_of, PRIORITY_LOOKUP, PRIORITY_TRENDING
+from response_cache import ResponseCache, cache_key
+from pair_snapshot import PairSnapshot
+from token_record import TokenRecord, records_from_profiles
+import fast_json
 from datetime import datetime, timezone
 
 logger_dexscreener = logging.getLogger(__name__ + ".dexscreener_fetcher")
 
-def fetch_dexscreener_pairs(chain_id: str = "solana", query: str = None, page: int = 1):
+DEXSCREENER_PROFILES_URL = "https://api.dexscreener.com/token-profiles/latest/v1"
+# DexScreener accepts up to 30 comma-separated addresses on /tokens/
+TOKENS_BATCH_SIZE = 30
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Pair data moves quickly; the profile feed and search results can be reused for longer
+ENDPOINT_TTLS = {"/token-profiles/": 30.0, "/search": 30.0, "/pairs/": 2.0}
+response_cache = ResponseCache(
+    max_entries=DEXSCREENER_CACHE_SIZE,
+    default_ttl=DEXSCREENER_CACHE_TTL,
+    endpoint_ttls=ENDPOINT_TTLS,
+    disk_path=DEXSCREENER_CACHE_PATH or None,
+    disk_max_entries=DEXSCREENER_CACHE_DISK_SIZE,
+    disk_retention=DEXSCREENER_CACHE_DISK_RETENTION
+)
+
+# Request metrics are pre-bound per endpoint; the first path fragment found in the URL wins
+ENDPOINT_METRICS = [
+    ("/token-profiles/", HttpEndpointMetrics("dexscreener_token_profiles")),
+    ("/search", HttpEndpointMetrics("dexscreener_search")),
+    ("/tokens/", HttpEndpointMetrics("dexscreener_tokens")),
+    ("/pairs/", HttpEndpointMetrics("dexscreener_pairs")),
+]
+OTHER_ENDPOINT_METRICS = HttpEndpointMetrics("dexscreener_other")
+
+def _endpoint_metrics(url: str) -> HttpEndpointMetrics:
+    for fragment, endpoint_metrics in ENDPOINT_METRICS:
+        if fragment in url:
+            return endpoint_metrics
+    return OTHER_ENDPOINT_METRICS
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_session(pool_size: int = DEFAULT_MAX_CONCURRENCY) -> requests.Session:
+    """Return the shared keep-alive session used for every DexScreener call"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"Accept": "application/json", "User-Agent": "DexSniper/1.0"})
+            _session = session
+        return _session
+
+def close_session():
+    """Close the shared session; the next call creates a fresh one"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def _get(url: str, priority: int = PRIORITY_TRENDING, **kwargs) -> requests.Response:
+    """GET through the shared session once the rate-limit scheduler grants a slot"""
+    host = host_of(url)
+    if not default_scheduler.acquire(host, priority):
+        raise requests.RequestException(f"Rate limit budget for {host} exhausted")
+    endpoint_metrics = _endpoint_metrics(url)
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, timeout=15, **kwargs)
+    except requests.RequestException:
+        endpoint_metrics.errors.inc()
+        raise
+    endpoint_metrics.observe(time.perf_counter() - start, response.status_code)
+    default_scheduler.observe(host, response)
+    return response
+
+def _cached_get(url: str, priority: int = PRIORITY_TRENDING, params: Optional[Dict] = None):
+    """_get behind the response cache; concurrent calls for the same URL share one request"""
+    return response_cache.get(
+        cache_key(url, params),
+        lambda headers: _get(url, priority, params=params, headers=headers)
+    )
+
+def fetch_dexscreener_pairs(chain_id: str = "solana", query: str = None, page: int = 1,
+                            priority: int = PRIORITY_TRENDING):
     try:
         # Use the correct DexScreener API endpoint
         # For getting trending/new pairs, we'll use the search endpoint
@@ -155,11 +251,11 @@ def fetch_dexscreener_pairs(chain_id: str = "solana", query: str = None, page: i
             params = {"q": query}
         else:
             # Get latest pairs for a specific chain
-            url = f"https://api.dexscreener.com/latest/dex/pairs/{chain_id}"
+            url = f"{DEXSCREENER_API_URL}/pairs/{chain_id}"
             params = {}
         
         logger_dexscreener.info(f"Fetching from Dexscreener: {url} with params {params}")
-        response = requests.get(url, params=params, timeout=15)
+        response = _cached_get(url, priority, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -185,28 +281,25 @@ def fetch_dexscreener_pairs(chain_id: str = "solana", query: str = None, page: i
         logger_dexscreener.error(f"An unexpected error occurred in dexscreener_fetcher: {e}", exc_info=True)
         return []
 
-def fetch_trending_pairs(chain_id: str = "solana", limit: int = 50):
+def fetch_token_profiles(priority: int = PRIORITY_TRENDING) -> List[TokenRecord]:
+    """Latest token profiles (every chain) as TokenRecords; raises on HTTP errors"""
+    response = _cached_get(DEXSCREENER_PROFILES_URL, priority)
+    response.raise_for_status()
+    data = response.json()
+    return records_from_profiles(data) if isinstance(data, list) else []
+
+def fetch_trending_pairs(chain_id: str = "solana", limit: int = 50, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                         priority: int = PRIORITY_TRENDING):
     """Fetch trending pairs using DexScreener's token profiles endpoint"""
     try:
         # Use the token profiles endpoint which gives us trending tokens
-        url = "https://api.dexscreener.com/token-profiles/latest/v1"
+        logger_dexscreener.info(f"Fetching trending pairs from: {DEXSCREENER_PROFILES_URL}")
+        profiles = fetch_token_profiles(priority)[:limit]
         
-        logger_dexscreener.info(f"Fetching trending pairs from: {url}")
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
+        # Filter for the specific chain, then resolve all pairs in batched requests
+        token_addresses = [profile.base_token_address for profile in profiles if profile.chain_id == chain_id]
         
-        # Filter for the specific chain and get pairs
-        pairs = []
-        if isinstance(data, list):
-            for item in data[:limit]:
-                if item.get('chainId') == chain_id:
-                    # Get the actual pair data for this token
-                    token_address = item.get('tokenAddress')
-                    if token_address:
-                        pair_data = fetch_token_pairs(token_address, chain_id)
-                        if pair_data:
-                            pairs.extend(pair_data)
+        pairs = fetch_pairs_for_tokens(token_addresses, chain_id, max_concurrency=max_concurrency, priority=priority)
         
         logger_dexscreener.info(f"Fetched {len(pairs)} trending pairs for chain {chain_id}")
         return pairs
@@ -215,16 +308,20 @@ def fetch_trending_pairs(chain_id: str = "solana", limit: int = 50):
         logger_dexscreener.error(f"Error fetching trending pairs: {e}")
         return []
 
-def fetch_token_pairs(token_address: str, chain_id: str = "solana"):
-    """Fetch pairs for a specific token address"""
+def _token_pairs_url(token_address: str) -> str:
+    return f"{DEXSCREENER_API_URL}/tokens/{token_address}"
+
+def _fetch_token_pairs_raw(token_address: str, priority: int = PRIORITY_TRENDING, use_cache: bool = True) -> List[Dict]:
+    """All pairs for one address or a comma-separated batch, any chain; raises on HTTP errors"""
+    url = _token_pairs_url(token_address)
+    response = _cached_get(url, priority) if use_cache else _get(url, priority)
+    response.raise_for_status()
+    return (fast_json.response_json(response) or {}).get("pairs") or []
+
+def fetch_token_pairs(token_address: str, chain_id: str = "solana", priority: int = PRIORITY_TRENDING):
+    """Fetch pairs for a specific token address (or up to 30 comma-separated addresses)"""
     try:
-        url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-        
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        pairs = data.get("pairs", [])
+        pairs = _fetch_token_pairs_raw(token_address, priority)
         # Filter pairs by chain if specified
         if chain_id:
             pairs = [pair for pair in pairs if pair.get('chainId') == chain_id]
@@ -235,114 +332,175 @@ def fetch_token_pairs(token_address: str, chain_id: str = "solana"):
         logger_dexscreener.error(f"Error fetching pairs for token {token_address}: {e}")
         return []
 
-def store_tokens_from_dexscreener(db: Session, pairs_data: list):
+def _fetch_batch(addresses: List[str], priority: int, use_cache: bool = True) -> List[Dict]:
+    """
+    Fetch one /tokens/ batch and cache each address's slice for single-token lookups
+
+    Uncached batches (use_cache=False) do not seed the cache either: their callers
+    poll for pairs that may not exist yet, and an empty slice cached now would hide
+    the pair from cached lookups until it expired.
+    """
+    try:
+        pairs = _fetch_token_pairs_raw(",".join(addresses), priority, use_cache)
+    except Exception as e:
+        logger_dexscreener.error(f"Error fetching pairs for {len(addresses)} token(s): {e}")
+        return []
+    if not use_cache:
+        return pairs
+    
+    by_address = {address: [] for address in addresses}
+    for pair in pairs:
+        for side in ('baseToken', 'quoteToken'):
+            address = (pair.get(side) or {}).get('address')
+            if address in by_address:
+                by_address[address].append(pair)
+    response_cache.put_many_json((_token_pairs_url(address), {"pairs": address_pairs})
+                                 for address, address_pairs in by_address.items())
+    return pairs
+
+def fetch_pairs_for_tokens(token_addresses: Iterable[str], chain_id: str = "solana",
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                           priority: int = PRIORITY_TRENDING, use_cache: bool = True) -> List[Dict]:
+    """
+    Fetch pairs for many tokens using batched /tokens/ requests issued concurrently
+
+    Addresses whose pairs are still fresh in the response cache are not requested again.
+
+    Args:
+        token_addresses: Token addresses to resolve; duplicates are ignored
+        chain_id: Only keep pairs on this chain (None keeps all)
+        max_concurrency: Maximum number of batch requests in flight
+        priority: Rate-limit priority of the batch requests
+        use_cache: False always asks the API (e.g. polling for a pair to appear)
+
+    Returns:
+        Pairs for all tokens, cached ones first, then in batch order
+    """
+    unique_addresses = list(dict.fromkeys(address for address in token_addresses if address))
+    if not unique_addresses:
+        return []
+    
+    results = []
+    missing = []
+    for address in unique_addresses:
+        cached = response_cache.peek(_token_pairs_url(address)) if use_cache else None
+        if cached is not None:
+            results.append(cached.json().get("pairs") or [])
+        else:
+            missing.append(address)
+    
+    batches = [missing[i:i + TOKENS_BATCH_SIZE] for i in range(0, len(missing), TOKENS_BATCH_SIZE)]
+    
+    if len(batches) <= 1 or max_concurrency <= 1:
+        results.extend(_fetch_batch(batch, priority, use_cache) for batch in batches)
+    else:
+        get_session(max_concurrency)
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches)),
+                                thread_name_prefix="dexscreener") as executor:
+            results.extend(executor.map(lambda batch: _fetch_batch(batch, priority, use_cache), batches))
+    
+    pairs = []
+    seen_pairs = set()
+    for batch_pairs in results:
+        for pair in batch_pairs:
+            # A pair can appear under both its base and quote token
+            key = pair.get('pairAddress')
+            if key in seen_pairs:
+                continue
+            seen_pairs.add(key)
+            if not chain_id or pair.get('chainId') == chain_id:
+                pairs.append(pair)
+    return pairs
+
+def _fetch_pairs_batch(chain_id: str, pair_addresses: List[str], priority: int) -> List[Dict]:
+    try:
+        response = _cached_get(f"{DEXSCREENER_API_URL}/pairs/{chain_id}/{','.join(pair_addresses)}", priority)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("pairs") or ([data["pair"]] if data.get("pair") else [])
+    except Exception as e:
+        logger_dexscreener.error(f"Error refreshing {len(pair_addresses)} {chain_id} pair(s): {e}")
+        return []
+
+def fetch_pairs_by_address(pair_addresses: Iterable[str], chain_id: str = "solana",
+                           max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                           priority: int = PRIORITY_LOOKUP) -> List[Dict]:
+    """
+    Refresh known pairs through /pairs/{chain}/{addresses}, up to TOKENS_BATCH_SIZE per request
+
+    Args:
+        pair_addresses: Pair addresses on chain_id; duplicates are ignored
+        chain_id: Chain of the pairs
+        max_concurrency: Maximum number of batch requests in flight
+        priority: Rate-limit priority of the batch requests
+
+    Returns:
+        Pairs returned by the API, in batch order; unknown addresses are simply absent
+    """
+    unique_addresses = list(dict.fromkeys(address for address in pair_addresses if address))
+    batches = [unique_addresses[i:i + TOKENS_BATCH_SIZE] for i in range(0, len(unique_addresses), TOKENS_BATCH_SIZE)]
+    if len(batches) <= 1 or max_concurrency <= 1:
+        results = [_fetch_pairs_batch(chain_id, batch, priority) for batch in batches]
+    else:
+        get_session(max_concurrency)
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches)),
+                                thread_name_prefix="dexscreener") as executor:
+            results = list(executor.map(lambda batch: _fetch_pairs_batch(chain_id, batch, priority), batches))
+    return [pair for batch_pairs in results for pair in batch_pairs]
+
+def _pair_to_row(pair_info) -> Optional[Dict]:
+    """Validate one Dexscreener pair (dict or PairSnapshot) and map it onto the tokens columns; None if unusable"""
+    snapshot = pair_info if isinstance(pair_info, PairSnapshot) else PairSnapshot.from_pair(pair_info)
+    return snapshot.to_row() if snapshot is not None else None
+
+def store_tokens_from_dexscreener(db: Session, pairs_data: list, bulk: bool = False):
+    """
+    Insert new Dexscreener pairs and refresh existing ones
+
+    Args:
+        db: Session to write through; committed before returning
+        pairs_data: Raw pair dicts from the Dexscreener API or PairSnapshots
+        bulk: Use one IN lookup and executemany upserts instead of per-pair ORM objects
+
+    Returns:
+        Tuple of (new, updated) counts
+    """
     if not pairs_data:
         logger_dexscreener.info("No Dexscreener pairs data to store.")
         return 0, 0
+    if bulk:
+        return _bulk_store_tokens(db, pairs_data)
     
     new_tokens_count = 0
     updated_tokens_count = 0
     processed_pair_addresses = set()
     
     for pair_info in pairs_data:
-        if not pair_info or not isinstance(pair_info, dict):
-            logger_dexscreener.warning(f"Skipping invalid pair_info item: {pair_info}")
-            continue
-            
-        pair_address = pair_info.get('pairAddress')
-        if not pair_address:
-            logger_dexscreener.warning(f"Skipping pair with missing pairAddress: {pair_info.get('baseToken', {}).get('symbol')}")
-            continue
-            
-        if pair_address in processed_pair_addresses:
+        if isinstance(pair_info, dict) and pair_info.get('pairAddress') in processed_pair_addresses:
             continue
-        processed_pair_addresses.add(pair_address)
         
-        base_token_info = pair_info.get('baseToken')
-        if not base_token_info or not base_token_info.get('address'):
-            logger_dexscreener.warning(f"Skipping pair {pair_address} with missing baseToken address.")
+        row = _pair_to_row(pair_info)
+        if row is None:
             continue
+        pair_address = row.pop("pair_address")
+        processed_pair_addresses.add(pair_address)
         
         try:
             existing_token = db.query(Token).filter(Token.pair_address == pair_address).first()
             
-            # Parse pair creation timestamp
-            pair_created_at_ts = pair_info.get('pairCreatedAt')
-            pair_created_at_dt = None
-            if pair_created_at_ts:
-                try:
-                    pair_created_at_dt = datetime.fromtimestamp(pair_created_at_ts / 1000, tz=timezone.utc)
-                except Exception as ts_e:
-                    logger_dexscreener.warning(f"Could not parse pairCreatedAt timestamp {pair_created_at_ts} for {pair_address}: {ts_e}")
-            
-            # Extract volume data
-            volume = pair_info.get('volume', {})
-            price_change = pair_info.get('priceChange', {})
-            liquidity = pair_info.get('liquidity', {})
-            
-            # Extract social links
-            info_section = pair_info.get('info', {})
-            social_links_raw = {}
-            if info_section:
-                websites = info_section.get('websites', [])
-                socials = info_section.get('socials', [])
-                
-                if websites and isinstance(websites, list) and websites[0].get('url'):
-                    social_links_raw['website'] = websites[0]['url']
-                
-                for social_item in socials:
-                    if isinstance(social_item, dict) and social_item.get('label') and social_item.get('url'):
-                        social_links_raw[social_item['label'].lower()] = social_item['url']
-            
-            # Check for top-level links
-            top_level_links = pair_info.get('links')
-            if isinstance(top_level_links, dict):
-                for k, v_link in top_level_links.items():
-                    if v_link and k not in social_links_raw:
-                        social_links_raw[k.lower()] = v_link
-            
-            common_data = {
-                "chain_id": pair_info.get('chainId'),
-                "dex_id": pair_info.get('dexId'),
-                "url": pair_info.get('url'),
-                "base_token_address": base_token_info['address'],
-                "base_token_name": base_token_info.get('name'),
-                "base_token_symbol": base_token_info.get('symbol'),
-                "quote_token_symbol": pair_info.get('quoteToken', {}).get('symbol'),
-                "price_usd": float(pair_info['priceUsd']) if pair_info.get('priceUsd') else None,
-                "price_native": float(pair_info['priceNative']) if pair_info.get('priceNative') else None,
-                "volume_h24": float(volume.get('h24')) if volume.get('h24') else None,
-                "volume_h6": float(volume.get('h6')) if volume.get('h6') else None,
-                "volume_h1": float(volume.get('h1')) if volume.get('h1') else None,
-                "price_change_h24": float(price_change.get('h24')) if price_change.get('h24') else None,
-                "price_change_h6": float(price_change.get('h6')) if price_change.get('h6') else None,
-                "price_change_h1": float(price_change.get('h1')) if price_change.get('h1') else None,
-                "liquidity_usd": float(liquidity.get('usd')) if liquidity.get('usd') else (float(liquidity.get('base')) * float(pair_info['priceUsd']) if liquidity.get('base') and pair_info.get('priceUsd') else None),
-                "fdv": float(pair_info.get('fdv')) if pair_info.get('fdv') else None,
-                "market_cap_usd": float(pair_info.get('marketCap')) if pair_info.get('marketCap') else None,
-                "holders": int(pair_info.get('holders')) if pair_info.get('holders') else None,
-                "pair_created_at": pair_created_at_dt,
-                "social_links_raw": social_links_raw if social_links_raw else None,
-                "last_dexscreener_fetch_at": datetime.now(timezone.utc)
-            }
-            
             if existing_token:
-                for key, value in common_data.items():
+                for key, value in row.items():
                     setattr(existing_token, key, value)
                 updated_tokens_count += 1
             else:
                 token_data = Token(
                     pair_address=pair_address,
-                    **common_data,
+                    **row,
                     first_seen_at=datetime.now(timezone.utc)
                 )
                 db.add(token_data)
                 new_tokens_count += 1
                 
-        except KeyError as e_key:
-            logger_dexscreener.error(f"Missing key {e_key} in Dexscreener pair data for {pair_address}: {pair_info}")
-        except ValueError as e_val:
-            logger_dexscreener.error(f"Data type error for {pair_address} (e.g. converting string to float): {e_val}. Data: {pair_info}")
         except Exception as e_gen:
             logger_dexscreener.error(f"Error processing/storing Dexscreener pair {pair_address}: {e_gen}", exc_info=True)
             db.rollback()
@@ -356,3 +514,62 @@ def store_tokens_from_dexscreener(db: Session, pairs_data: list):
         db.rollback()
     
     return new_tokens_count, updated_tokens_count
+
+# Stay under SQLite's bound-parameter limit for IN (...) lookups
+IN_QUERY_CHUNK_SIZE = 500
+
+def _bulk_store_tokens(db: Session, pairs_data: list):
+    rows_by_pair = {}
+    for pair_info in pairs_data:
+        if isinstance(pair_info, PairSnapshot):
+            pair_address = pair_info.pair_address
+        else:
+            pair_address = pair_info.get('pairAddress') if isinstance(pair_info, dict) else None
+        if pair_address in rows_by_pair:
+            continue
+        row = _pair_to_row(pair_info)
+        if row is not None:
+            rows_by_pair[row["pair_address"]] = row
+    if not rows_by_pair:
+        return 0, 0
+    
+    now = datetime.now(timezone.utc)
+    pair_addresses = list(rows_by_pair)
+    
+    try:
+        existing_ids = {}
+        for i in range(0, len(pair_addresses), IN_QUERY_CHUNK_SIZE):
+            chunk = pair_addresses[i:i + IN_QUERY_CHUNK_SIZE]
+            existing_ids.update(db.execute(select(Token.pair_address, Token.id).where(Token.pair_address.in_(chunk))).all())
+        
+        new_rows = []
+        updated_rows = []
+        for pair_address, row in rows_by_pair.items():
+            if pair_address in existing_ids:
+                updated_rows.append(dict(row, id=existing_ids[pair_address], last_updated=now))
+            else:
+                new_rows.append(dict(row, first_seen_at=now))
+        
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql") and new_rows:
+            # Native upsert also covers rows inserted by a concurrent writer since the lookup
+            insert_fn = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            stmt = insert_fn(Token.__table__)
+            update_columns = [key for key in new_rows[0] if key not in ("pair_address", "first_seen_at")]
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Token.__table__.c.pair_address],
+                set_={key: stmt.excluded[key] for key in update_columns}
+            )
+            db.execute(stmt, new_rows)
+        elif new_rows:
+            db.execute(insert(Token), new_rows)
+        if updated_rows:
+            db.execute(update(Token), updated_rows)
+        
+        db.commit()
+        logger_dexscreener.info(f"Dexscreener bulk sync: Stored {len(new_rows)} new tokens, updated {len(updated_rows)} tokens.")
+        return len(new_rows), len(updated_rows)
+    except Exception as e_commit:
+        logger_dexscreener.error(f"Database error during Dexscreener bulk sync: {e_commit}", exc_info=True)
+        db.rollback()
+        return 0, 0
@@ -0,0 +1,53 @@
+"""JSON decoding through the fastest installed backend: orjson, msgspec, then the stdlib"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = "orjson"
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+else:
+    BACKEND = "json"
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode a JSON document
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON, whichever backend is active
+    """
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "msgspec":
+        try:
+            return _msgspec_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise json.JSONDecodeError(str(e), '', 0) from e
+    return json.loads(data)
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj as compact UTF-8 JSON bytes"""
+    if BACKEND == "orjson":
+        return orjson.dumps(obj)
+    if BACKEND == "msgspec":
+        return _msgspec_encoder.encode(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+def response_json(response) -> Any:
+    """Decode a requests.Response body with the active backend instead of response.json()"""
+    content = getattr(response, 'content', None)
+    if isinstance(content, (bytes, bytearray)) and content:
+        return loads(content)
+    return response.json()
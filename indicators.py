@@ -0,0 +1,332 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from database import Token
+
+logger = logging.getLogger(__name__)
+
+# Columns written by store_indicators, in addition to the pair_address key
+INDICATOR_COLUMNS = (
+    'last_ema_short', 'ema_short_slope', 'last_ema_long', 'ema_long_slope',
+    'rsi_value', 'volatility_bands_data', 'last_trend_analysis_at',
+)
+
+# Stay under SQLite's bound-parameter limit for IN (...) lookups
+IN_QUERY_CHUNK_SIZE = 500
+
+class IndicatorEngine:
+    def __init__(self, ema_short_period: int = 9, ema_long_period: int = 21, rsi_period: int = 14,
+                 band_period: int = 20, band_width: float = 2.0, initial_capacity: int = 1024):
+        """
+        Incremental EMA, RSI and volatility-band state for many tokens
+
+        Every token owns one slot in a set of NumPy arrays. update() advances all
+        tokens of a tick batch at once in O(1) per tick: EMAs and the band mean/variance
+        are exponentially weighted, RSI uses Wilder smoothing seeded with the simple
+        average of the first rsi_period price changes. No price history is kept.
+
+        Args:
+            ema_short_period: Span of the short EMA in ticks
+            ema_long_period: Span of the long EMA in ticks
+            rsi_period: RSI smoothing period in ticks
+            band_period: Span of the exponentially weighted mean/stddev behind the bands
+            band_width: Band distance from the mean in standard deviations
+            initial_capacity: Slots allocated up front; grows by doubling
+        """
+        self.ema_short_period = ema_short_period
+        self.ema_long_period = ema_long_period
+        self.rsi_period = rsi_period
+        self.band_period = band_period
+        self.band_width = band_width
+        self._alpha_short = 2.0 / (ema_short_period + 1)
+        self._alpha_long = 2.0 / (ema_long_period + 1)
+        self._alpha_band = 2.0 / (band_period + 1)
+
+        self._slots: Dict[str, int] = {}
+        self._capacity = 0
+        self._grow(max(1, initial_capacity))
+        self.ticks = 0
+
+    def _grow(self, capacity: int) -> None:
+        def resize(array: Optional[np.ndarray], dtype) -> np.ndarray:
+            grown = np.zeros(capacity, dtype=dtype)
+            if array is not None:
+                grown[:len(array)] = array
+            return grown
+
+        first = self._capacity == 0
+        self.count = resize(None if first else self.count, np.int64)
+        for name in ('last_price', 'ema_short', 'ema_long', 'slope_short', 'slope_long',
+                     'avg_gain', 'avg_loss', 'band_mean', 'band_var'):
+            setattr(self, name, resize(None if first else getattr(self, name), np.float64))
+        self._capacity = capacity
+
+    def slot(self, key: str) -> int:
+        """Slot index of key, allocating one for unseen keys"""
+        index = self._slots.get(key)
+        if index is None:
+            index = len(self._slots)
+            if index >= self._capacity:
+                self._grow(self._capacity * 2)
+            self._slots[key] = index
+        return index
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._slots
+
+    def keys(self) -> List[str]:
+        return list(self._slots)
+
+    def update(self, keys: Sequence[str], prices: Sequence[float]) -> np.ndarray:
+        """
+        Apply one price tick per entry; a key may appear several times, in time order
+
+        Non-positive and non-finite prices are ignored.
+
+        Returns:
+            Slot indices of the updated keys
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        slots = np.fromiter((self.slot(key) for key in keys), dtype=np.intp, count=len(keys))
+        valid = np.isfinite(prices) & (prices > 0)
+        slots, prices = slots[valid], prices[valid]
+        if not len(slots):
+            return slots
+
+        # Fancy-indexed updates keep only the last write per slot, so repeated keys
+        # are applied in rounds: the k-th tick of every key goes into round k
+        order = np.argsort(slots, kind='stable')
+        sorted_slots = slots[order]
+        group_start = np.r_[0, np.flatnonzero(np.diff(sorted_slots)) + 1]
+        group_sizes = np.diff(np.r_[group_start, len(sorted_slots)])
+        if group_sizes.max() == 1:
+            self._apply(slots, prices)
+        else:
+            rank = np.empty(len(slots), dtype=np.intp)
+            rank[order] = np.arange(len(slots)) - np.repeat(group_start, group_sizes)
+            for r in range(int(rank.max()) + 1):
+                in_round = rank == r
+                self._apply(slots[in_round], prices[in_round])
+        self.ticks += len(slots)
+        return np.unique(slots)
+
+    def _apply(self, idx: np.ndarray, price: np.ndarray) -> None:
+        n = self.count[idx]
+        first = n == 0
+
+        ema_short = self.ema_short[idx]
+        new_short = np.where(first, price, ema_short + self._alpha_short * (price - ema_short))
+        self.slope_short[idx] = np.where(first, 0.0, new_short - ema_short)
+        self.ema_short[idx] = new_short
+
+        ema_long = self.ema_long[idx]
+        new_long = np.where(first, price, ema_long + self._alpha_long * (price - ema_long))
+        self.slope_long[idx] = np.where(first, 0.0, new_long - ema_long)
+        self.ema_long[idx] = new_long
+
+        # n is also the number of price changes seen once this tick is applied
+        delta = np.where(first, 0.0, price - self.last_price[idx])
+        weight = np.where(first, 0.0, np.where(n <= self.rsi_period, 1.0 / np.maximum(n, 1), 1.0 / self.rsi_period))
+        avg_gain = self.avg_gain[idx]
+        avg_loss = self.avg_loss[idx]
+        self.avg_gain[idx] = avg_gain + weight * (np.maximum(delta, 0.0) - avg_gain)
+        self.avg_loss[idx] = avg_loss + weight * (np.maximum(-delta, 0.0) - avg_loss)
+
+        mean = self.band_mean[idx]
+        diff = price - mean
+        increment = self._alpha_band * diff
+        self.band_mean[idx] = np.where(first, price, mean + increment)
+        self.band_var[idx] = np.where(first, 0.0, (1 - self._alpha_band) * (self.band_var[idx] + diff * increment))
+
+        self.last_price[idx] = price
+        self.count[idx] = n + 1
+
+    def rsi(self, idx: np.ndarray) -> np.ndarray:
+        """RSI of the given slots; NaN until rsi_period price changes have been seen"""
+        gain = self.avg_gain[idx]
+        loss = self.avg_loss[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = 100.0 - 100.0 / (1.0 + gain / loss)
+        value = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), value)
+        return np.where(self.count[idx] > self.rsi_period, value, np.nan)
+
+    def seed(self, key: str, row: Dict[str, Any]) -> bool:
+        """
+        Restore a slot from stored indicator columns (see rows())
+
+        Returns:
+            bool: False if the row carries no resumable state
+        """
+        bands = row.get('volatility_bands_data') or {}
+        state = bands.get('state') if isinstance(bands, dict) else None
+        if not state or row.get('last_ema_short') is None or row.get('last_ema_long') is None:
+            return False
+        index = self.slot(key)
+        self.count[index] = int(state.get('count', 0))
+        self.last_price[index] = float(state.get('last_price', 0.0))
+        self.avg_gain[index] = float(state.get('avg_gain', 0.0))
+        self.avg_loss[index] = float(state.get('avg_loss', 0.0))
+        self.band_var[index] = float(state.get('variance', 0.0))
+        self.band_mean[index] = float(bands.get('middle', self.last_price[index]))
+        self.ema_short[index] = float(row['last_ema_short'])
+        self.ema_long[index] = float(row['last_ema_long'])
+        self.slope_short[index] = float(row.get('ema_short_slope') or 0.0)
+        self.slope_long[index] = float(row.get('ema_long_slope') or 0.0)
+        return True
+
+    def rows(self, keys: Iterable[str], analyzed_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Indicator column values for keys, ready for store_indicators"""
+        keys = [key for key in keys if key in self._slots and self.count[self._slots[key]] > 0]
+        if not keys:
+            return []
+        analyzed_at = analyzed_at or datetime.now(timezone.utc)
+        idx = np.fromiter((self._slots[key] for key in keys), dtype=np.intp, count=len(keys))
+        rsi = self.rsi(idx)
+        stddev = np.sqrt(self.band_var[idx])
+        mean = self.band_mean[idx]
+
+        rows = []
+        for i, key in enumerate(keys):
+            index = idx[i]
+            rows.append({
+                'pair_address': key,
+                'last_ema_short': float(self.ema_short[index]),
+                'ema_short_slope': float(self.slope_short[index]),
+                'last_ema_long': float(self.ema_long[index]),
+                'ema_long_slope': float(self.slope_long[index]),
+                'rsi_value': None if np.isnan(rsi[i]) else float(rsi[i]),
+                'volatility_bands_data': {
+                    'middle': float(mean[i]),
+                    'upper': float(mean[i] + self.band_width * stddev[i]),
+                    'lower': float(mean[i] - self.band_width * stddev[i]),
+                    'stddev': float(stddev[i]),
+                    'state': {
+                        'count': int(self.count[index]),
+                        'last_price': float(self.last_price[index]),
+                        'avg_gain': float(self.avg_gain[index]),
+                        'avg_loss': float(self.avg_loss[index]),
+                        'variance': float(self.band_var[index]),
+                    },
+                },
+                'last_trend_analysis_at': analyzed_at,
+            })
+        return rows
+
+def recompute(prices: Sequence[float], ema_short_period: int = 9, ema_long_period: int = 21,
+              rsi_period: int = 14, band_period: int = 20, band_width: float = 2.0) -> Dict[str, Optional[float]]:
+    """
+    Indicators of one token from its full price history
+
+    Plain O(len(prices)) loop over the same recurrences as IndicatorEngine; used to
+    verify the engine and as the full-window baseline in benchmarks.
+    """
+    alpha_short = 2.0 / (ema_short_period + 1)
+    alpha_long = 2.0 / (ema_long_period + 1)
+    alpha_band = 2.0 / (band_period + 1)
+    count = 0
+    last = ema_short = ema_long = slope_short = slope_long = mean = 0.0
+    avg_gain = avg_loss = var = 0.0
+    for price in prices:
+        if not (price > 0 and np.isfinite(price)):
+            continue
+        if count == 0:
+            ema_short = ema_long = mean = price
+        else:
+            previous_short, previous_long = ema_short, ema_long
+            ema_short += alpha_short * (price - ema_short)
+            ema_long += alpha_long * (price - ema_long)
+            slope_short, slope_long = ema_short - previous_short, ema_long - previous_long
+            weight = 1.0 / count if count <= rsi_period else 1.0 / rsi_period
+            delta = price - last
+            avg_gain += weight * (max(delta, 0.0) - avg_gain)
+            avg_loss += weight * (max(-delta, 0.0) - avg_loss)
+            diff = price - mean
+            mean += alpha_band * diff
+            var = (1 - alpha_band) * (var + diff * alpha_band * diff)
+        last = price
+        count += 1
+    if count == 0:
+        return {}
+
+    rsi = None
+    if count > rsi_period:
+        if avg_loss == 0:
+            rsi = 50.0 if avg_gain == 0 else 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    stddev = var ** 0.5
+    return {
+        'last_ema_short': ema_short,
+        'ema_short_slope': slope_short,
+        'last_ema_long': ema_long,
+        'ema_long_slope': slope_long,
+        'rsi_value': rsi,
+        'volatility_bands_data': {
+            'middle': mean,
+            'upper': mean + band_width * stddev,
+            'lower': mean - band_width * stddev,
+            'stddev': stddev,
+        },
+    }
+
+def load_indicator_state(db: Session, engine: IndicatorEngine, pair_addresses: Optional[Iterable[str]] = None) -> int:
+    """
+    Seed engine from the indicator columns stored by a previous run
+
+    Args:
+        db: Session to read through
+        engine: Engine to seed
+        pair_addresses: Only these pairs; None loads every pair with stored indicators
+
+    Returns:
+        Number of slots restored
+    """
+    columns = (Token.pair_address, Token.last_ema_short, Token.ema_short_slope, Token.last_ema_long,
+               Token.ema_long_slope, Token.volatility_bands_data)
+    if pair_addresses is None:
+        chunks = [None]
+    else:
+        addresses = list(pair_addresses)
+        chunks = [addresses[i:i + IN_QUERY_CHUNK_SIZE] for i in range(0, len(addresses), IN_QUERY_CHUNK_SIZE)]
+
+    restored = 0
+    for chunk in chunks:
+        query = select(*columns).where(Token.pair_address.is_not(None), Token.last_ema_short.is_not(None))
+        if chunk is not None:
+            query = query.where(Token.pair_address.in_(chunk))
+        for row in db.execute(query).mappings():
+            restored += engine.seed(row['pair_address'], dict(row))
+    logger.info(f"Restored indicator state for {restored} pair(s)")
+    return restored
+
+def store_indicators(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Write indicator rows (from IndicatorEngine.rows) onto the matching tokens in one executemany
+
+    Args:
+        db: Session to write through; the caller commits
+        rows: Indicator rows keyed by pair_address
+
+    Returns:
+        Number of rows submitted
+    """
+    if not rows:
+        return 0
+    table = Token.__table__
+    stmt = (
+        update(table)
+        .where(table.c.pair_address == bindparam('b_pair_address'))
+        .values({column: bindparam(column) for column in INDICATOR_COLUMNS})
+    )
+    params = [dict({column: row[column] for column in INDICATOR_COLUMNS}, b_pair_address=row['pair_address'])
+              for row in rows]
+    db.execute(stmt, params)
+    return len(params)
@@ -0,0 +1,581 @@
+import asyncio
+import logging
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from config import Config
+from correlation import GraduationTracker, link_graduations
+from dex_filters import FilterPipeline, store_filter_results
+from indicators import IndicatorEngine, load_indicator_state, store_indicators
+from insider_flow import InsiderFlowIndex
+from metrics import (
+    PAIRS_FILTERED, TOKENS_DISCOVERED, TOKENS_STORED, LatencyTracker, MetricsServer,
+    default_registry
+)
+from multichain_sync import MultiChainSync, parse_chain_ids, parse_chain_limits
+from pair_snapshot import PairSnapshot, snapshots_from_pairs
+from price_history import PriceHistoryStore
+from token_record import payload_created_at
+from watchlist import WatchlistScheduler
+from rate_limiter import default_scheduler, PRIORITY_NEW_LAUNCH
+from response_log import ResponseRecorder
+from sharded_analysis import AnalysisResult, ShardedAnalyzer
+from trade_execution import Broker, Order, Position, SimulatedBroker, TradeExecutor, load_positions, store_order
+from pumpfun_fetcher import PumpFunFetcher, MoralisAPIError, RecentMints, extract_mint_address
+import dexscreener_fetcher
+
+logger = logging.getLogger(__name__)
+
+# Metric children bound once so each hot-path update is a single call
+_tokens_discovered = TOKENS_DISCOVERED.labels()
+_pairs_stored = TOKENS_STORED.labels("dexscreener")
+_pairs_passed = PAIRS_FILTERED.labels("passed")
+_pairs_rejected = PAIRS_FILTERED.labels("rejected")
+
+class IngestionEngine:
+    def __init__(self, config: Config, database, fetcher: PumpFunFetcher, recent_mint_limit: int = 10000,
+                 broker: Optional[Broker] = None):
+        """
+        Asyncio runner that polls every source concurrently and funnels results to the database
+
+        Args:
+            config: Application configuration (poll intervals, chain, timeouts)
+            database: Database used for persistence
+            fetcher: PumpFun fetcher used for new-launch polling
+            recent_mint_limit: Number of recently seen mints remembered for dedup
+            broker: Broker for trade execution; the simulated broker when trading is enabled without one
+        """
+        self.config = config
+        self.database = database
+        self.fetcher = fetcher
+
+        self.discovery_latency = LatencyTracker()
+        self.tokens_discovered = 0
+        self.pairs_stored = 0
+        self.indicators = IndicatorEngine(
+            config.ema_short_period, config.ema_long_period, config.rsi_period,
+            config.volatility_band_period, config.volatility_band_width
+        )
+        self.price_history: Optional[PriceHistoryStore] = None
+        self.insider_flow: Optional[InsiderFlowIndex] = None
+        self.filters = FilterPipeline.from_config(config)
+        self.analyzer = ShardedAnalyzer.from_config(config) if config.analysis_workers > 0 else None
+        self.chain_sync = MultiChainSync(
+            parse_chain_ids(config.dexscreener_chain_ids, config.dexscreener_chain_id),
+            dexscreener_fetcher.fetch_token_profiles,
+            lambda addresses, chain_id, max_concurrency: dexscreener_fetcher.fetch_pairs_for_tokens(
+                addresses, chain_id, max_concurrency=max_concurrency
+            ),
+            max_concurrency=config.dexscreener_max_concurrency,
+            chain_concurrency=parse_chain_limits(config.dexscreener_chain_concurrency)
+        )
+        self.watchlist = WatchlistScheduler(
+            lambda addresses, chain_id: dexscreener_fetcher.fetch_pairs_by_address(
+                addresses, chain_id, max_concurrency=config.dexscreener_max_concurrency
+            ),
+            min_interval=config.watchlist_min_interval,
+            max_interval=config.watchlist_max_interval,
+            requests_per_second=config.watchlist_requests_per_second,
+            batch_size=dexscreener_fetcher.TOKENS_BATCH_SIZE
+        )
+        # Graduation lookups must see pairs the moment they exist, so they bypass the response cache
+        self.graduations = GraduationTracker(
+            lambda mints: dexscreener_fetcher.fetch_pairs_for_tokens(
+                mints, config.dexscreener_chain_id, max_concurrency=config.dexscreener_max_concurrency,
+                priority=PRIORITY_NEW_LAUNCH, use_cache=False
+            ),
+            chain_id=config.dexscreener_chain_id,
+            initial_delay=config.graduation_initial_delay,
+            max_delay=config.graduation_max_delay,
+            give_up_after=config.graduation_give_up_after,
+            max_mints_per_check=dexscreener_fetcher.TOKENS_BATCH_SIZE * config.dexscreener_max_concurrency
+        )
+
+        self.executor = TradeExecutor(
+            broker if broker is not None else SimulatedBroker(),
+            self._queue_order,
+            max_positions=config.max_concurrent_tokens,
+            buy_amount=config.default_buy_amount,
+            max_in_flight=config.max_in_flight_orders,
+            take_profit=config.take_profit_multiple,
+            stop_loss=config.stop_loss_multiple
+        ) if config.trading_enabled else None
+
+        # Raw fetcher responses are logged for offline replay when record_dir is set
+        self.recorder = ResponseRecorder(config.record_dir, rotate_after=config.record_rotate_after) \
+            if config.record_dir else None
+
+        # Token details missing from memory are read back from the tokens table
+        if fetcher.token_cache.loader is None:
+            fetcher.token_cache.loader = database.pumpfun_payload
+
+        self.metrics_server: Optional[MetricsServer] = None
+        self._recent_mints = RecentMints(recent_mint_limit)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        # All database work runs on one thread so the SQLAlchemy session is never shared
+        self._db_thread: Optional[int] = None
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer",
+                                               initializer=self._bind_db_thread)
+
+    def _bind_db_thread(self) -> None:
+        self._db_thread = threading.get_ident()
+
+    def request_shutdown(self) -> None:
+        """Ask the engine to stop; safe to call from a signal handler on the loop thread"""
+        if self._stop is not None and not self._stop.is_set():
+            logger.info("Shutdown requested, stopping ingestion tasks...")
+            self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and latency summaries for the current run"""
+        return {
+            "tokens_discovered": self.tokens_discovered,
+            # Counted by the database once the write-behind batch commits
+            "tokens_stored": self.database.tokens_stored,
+            "pairs_stored": self.pairs_stored,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "discovery_latency": self.discovery_latency.summary(),
+            "store_latency": self.database.store_latency.summary(),
+            "indicator_pairs": len(self.indicators),
+            "indicator_ticks": self.indicators.ticks,
+            "watchlist": self.watchlist.stats(),
+            "dex_filters": self.filters.stats(),
+            "analysis_shards": self.analyzer.stats() if self.analyzer is not None else None,
+            "chain_sync": self.chain_sync.stats(),
+            "graduations": self.graduations.stats(),
+            "price_history": self.price_history.stats() if self.price_history is not None else None,
+            "insider_flow": self.insider_flow.stats() if self.insider_flow is not None else None,
+            "trading": self.executor.stats() if self.executor is not None else None,
+            "recorder": self.recorder.stats() if self.recorder is not None else None,
+            "rate_limits": default_scheduler.stats(),
+            "dexscreener_cache": dexscreener_fetcher.response_cache.stats(),
+            "pumpfun_token_cache": self.fetcher.token_cache.stats(),
+        }
+
+    @property
+    def tracks_graduations(self) -> bool:
+        return self.config.dexscreener_poll_interval > 0 and self.config.graduation_check_interval > 0
+
+    async def run(self, install_signal_handlers: bool = True) -> None:
+        """Run all ingestion tasks until shutdown is requested"""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._stop = asyncio.Event()
+
+        if install_signal_handlers:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, self.request_shutdown)
+                except (NotImplementedError, RuntimeError):
+                    # Not available on this platform or outside the main thread
+                    pass
+
+        if self.config.metrics_port > 0:
+            self._start_metrics_server()
+
+        # Load known addresses up front so the pollers' dedup checks never wait on the database
+        await loop.run_in_executor(self._db_executor, self.database.warm_seen_index)
+        await loop.run_in_executor(self._db_executor, self._warm_token_cache)
+        if self.config.dexscreener_poll_interval > 0:
+            await loop.run_in_executor(self._db_executor, self._load_indicator_state)
+            if self.analyzer is not None:
+                await loop.run_in_executor(self._db_executor, self._start_analyzer)
+            if self.config.price_history_dir:
+                self.price_history = PriceHistoryStore(
+                    self.database.engine, self.config.price_history_dir,
+                    compact_after=self.config.price_history_compact_after,
+                    downsample_after=self.config.price_history_downsample_after,
+                    downsample_interval=self.config.price_history_downsample_interval,
+                    retention=self.config.price_history_retention,
+                    merge_window=self.config.price_history_merge_window
+                )
+        if self.config.insider_flow_bucket_seconds > 0:
+            self.insider_flow = InsiderFlowIndex(
+                self.database.engine,
+                bucket_seconds=self.config.insider_flow_bucket_seconds,
+                retention=self.config.insider_flow_retention
+            )
+        if self.tracks_graduations:
+            await loop.run_in_executor(self._db_executor, self._load_pending_graduations)
+        if self.executor is not None:
+            await loop.run_in_executor(self._db_executor, self._restore_positions)
+
+        pollers = []
+        if self.config.pumpfun_poll_interval > 0:
+            pollers.append(asyncio.create_task(self._poll_pumpfun(), name="pumpfun-poller"))
+        if self.config.dexscreener_poll_interval > 0:
+            pollers.append(asyncio.create_task(self._poll_dexscreener(), name="dexscreener-poller"))
+            if self.config.watchlist_tick_interval > 0:
+                pollers.append(asyncio.create_task(self._poll_watchlist(), name="watchlist-poller"))
+            if self.tracks_graduations:
+                pollers.append(asyncio.create_task(self._poll_graduations(), name="graduation-poller"))
+        if self.price_history is not None and self.config.price_history_maintenance_interval > 0:
+            pollers.append(asyncio.create_task(self._maintain_price_history(), name="price-history-maintenance"))
+        if self.executor is not None and self.config.order_reconcile_interval > 0:
+            pollers.append(asyncio.create_task(self._reconcile_orders(), name="order-reconciler"))
+        writer = asyncio.create_task(self._db_writer(), name="db-writer")
+        self._tasks = pollers + [writer]
+
+        logger.info(f"Ingestion engine started with {len(pollers)} source(s)")
+        try:
+            await self._stop.wait()
+        finally:
+            for task in pollers:
+                task.cancel()
+            await asyncio.gather(*pollers, return_exceptions=True)
+            if self.executor is not None:
+                # In-flight orders still report their fills to the writer
+                await loop.run_in_executor(None, self.executor.close)
+
+            # Let the writer drain whatever the pollers already queued
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=self.config.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Shutdown timeout reached with {self._queue.qsize()} queued item(s) unwritten")
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+
+            if install_signal_handlers:
+                for sig in (signal.SIGINT, signal.SIGTERM):
+                    try:
+                        loop.remove_signal_handler(sig)
+                    except (NotImplementedError, RuntimeError):
+                        pass
+            if self.analyzer is not None:
+                self.analyzer.stop()
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.metrics_server is not None:
+                self.metrics_server.close()
+                self.metrics_server = None
+            self._db_executor.shutdown(wait=True)
+            logger.info(f"Ingestion engine stopped: {self.stats()}")
+
+    def submit_insider_transactions(self, events: List[Dict[str, Any]]) -> bool:
+        """
+        Queue insider buy/sell events for the database writer; safe to call from any thread
+
+        Returns:
+            bool: False if the engine is not running or insider flow is disabled
+        """
+        if self._loop is None or self._queue is None or self.insider_flow is None:
+            return False
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, ("insider", list(events), time.time()))
+        return True
+
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep that returns early when shutdown is requested"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _poll_pumpfun(self) -> None:
+        interval = self.config.pumpfun_poll_interval
+        while not self._stop.is_set():
+            try:
+                tokens = await asyncio.to_thread(self.fetcher.get_new_tokens)
+            except MoralisAPIError as e:
+                logger.error(f"API Error: {e}")
+                if e.status_code == 401:
+                    logger.error("Authentication failed. Check your RapidAPI key.")
+                    self.request_shutdown()
+                    return
+                await self._sleep(self.config.api_error_backoff)
+                continue
+            except Exception as e:
+                logger.error(f"Unexpected error polling PumpFun: {e}")
+                await self._sleep(interval)
+                continue
+
+            discovered_at = time.time()
+            if self.recorder is not None and tokens:
+                self.recorder.record("pumpfun", tokens, discovered_at)
+            known = await self._known_mints(tokens)
+            new_tokens = self._new_tokens(tokens, discovered_at, known)
+            for token in new_tokens:
+                await self._queue.put(("pumpfun", token, discovered_at))
+            if new_tokens:
+                logger.info(f"Found {len(new_tokens)} new tokens")
+            await self._sleep(interval)
+
+    async def _known_mints(self, tokens: Optional[List[Any]]) -> Set[str]:
+        """
+        Mints of a pump.fun response that are already stored
+
+        The in-memory seen index answers on the loop; Bloom-filter hits that need a
+        database check are confirmed in one query on the database thread.
+        """
+        mints = [mint for mint in map(extract_mint_address, tokens or []) if mint and mint not in self._recent_mints]
+        known, unconfirmed = self.database.known_mints(mints)
+        if unconfirmed:
+            loop = asyncio.get_running_loop()
+            known |= await loop.run_in_executor(self._db_executor, self.database.confirm_mints, unconfirmed)
+        return known
+
+    def _new_tokens(self, tokens: Optional[List[Any]], discovered_at: float,
+                    known: Optional[Set[str]] = None) -> List[Any]:
+        """
+        Drop already-known mints from a pump.fun response and start tracking the rest
+
+        Args:
+            tokens: Raw get_new_tokens() response
+            discovered_at: Epoch seconds the response was received
+            known: Stored mints from _known_mints(); None checks each mint with token_exists
+        """
+        new_tokens = []
+        for token in tokens or []:
+            mint = extract_mint_address(token)
+            if mint and not self._recent_mints.add(mint):
+                continue
+            if mint and (mint in known if known is not None else self.database.token_exists(mint)):
+                continue
+            new_tokens.append(token)
+            self.tokens_discovered += 1
+            _tokens_discovered.inc()
+            created_at = payload_created_at(token) if isinstance(token, dict) else None
+            if created_at is not None:
+                self.discovery_latency.add(max(0.0, discovered_at - created_at))
+            if mint and self.tracks_graduations:
+                self.graduations.track(mint, created_at if created_at is not None else discovered_at, now=discovered_at)
+        return new_tokens
+
+    async def _poll_dexscreener(self) -> None:
+        interval = self.config.dexscreener_poll_interval
+        # Every chain resolves its pairs concurrently; the session must hold all their connections
+        dexscreener_fetcher.get_session(self.chain_sync.total_concurrency())
+        while not self._stop.is_set():
+            try:
+                # One profile download for all chains, one queue item for the single writer
+                pairs = await asyncio.to_thread(self.chain_sync.sync)
+                if pairs:
+                    await self._queue.put(("dexscreener", pairs, self._observed("dexscreener", pairs)))
+            except Exception as e:
+                logger.error(f"Unexpected error polling DexScreener: {e}")
+            await self._sleep(interval)
+
+    def _observed(self, source: str, payload: Any) -> float:
+        """Timestamp a fetched response, recording it when record mode is on"""
+        observed_at = time.time()
+        if self.recorder is not None:
+            self.recorder.record(source, payload, observed_at)
+        return observed_at
+
+    async def _poll_watchlist(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_sync = None
+        while not self._stop.is_set():
+            try:
+                if last_sync is None or time.monotonic() - last_sync >= self.config.watchlist_sync_interval:
+                    await loop.run_in_executor(self._db_executor, self._sync_watchlist)
+                    last_sync = time.monotonic()
+                pairs = await asyncio.to_thread(self.watchlist.refresh_due)
+                if pairs:
+                    await self._queue.put(("dexscreener", pairs, self._observed("dexscreener", pairs)))
+            except Exception as e:
+                logger.error(f"Unexpected error refreshing watchlist: {e}")
+            await self._sleep(self.config.watchlist_tick_interval)
+
+    async def _poll_graduations(self) -> None:
+        while not self._stop.is_set():
+            try:
+                graduations = await asyncio.to_thread(self.graduations.check_due)
+                if graduations:
+                    await self._queue.put(("graduation", graduations, time.time()))
+            except Exception as e:
+                logger.error(f"Unexpected error checking graduations: {e}")
+            await self._sleep(self.config.graduation_check_interval)
+
+    def _start_metrics_server(self) -> None:
+        default_registry.gauge("dex_sniper_ingest_queue_depth", "Items waiting for the database writer",
+                               lambda: self._queue.qsize() if self._queue is not None else 0)
+        try:
+            self.metrics_server = MetricsServer(port=self.config.metrics_port, host=self.config.metrics_host).start()
+        except OSError as e:
+            logger.error(f"Metrics endpoint disabled, cannot listen on port {self.config.metrics_port}: {e}")
+
+    def _warm_token_cache(self) -> None:
+        cache = self.fetcher.token_cache
+        # Oldest first so the newest tokens end up most recently used
+        loaded = cache.put_many(reversed(self.database.recent_pumpfun_payloads(cache.max_entries)))
+        if loaded:
+            logger.info(f"Token detail cache loaded {loaded} payload(s) from the database")
+
+    def _load_pending_graduations(self) -> None:
+        with self.database.session_scope() as session:
+            loaded = self.graduations.load_pending(session)
+        if loaded:
+            logger.info(f"Tracking {loaded} pump.fun launch(es) still waiting for a DEX pair")
+
+    def _restore_positions(self) -> None:
+        with self.database.session_scope() as session:
+            items = load_positions(session)
+        active = self.executor.restore(items)
+        if items:
+            logger.info(f"Restored {len(items)} traded pair(s), {active} position(s) active")
+
+    def _queue_order(self, order: Order, position: Position) -> None:
+        """TradeExecutor store callback: order updates are persisted by the database writer"""
+        if self._loop is None or self._queue is None or threading.get_ident() == self._db_thread:
+            # Replays, or a new order decided by _trade on the writer thread: commit it
+            # before the executor calls the broker
+            self._write("order", (order, position))
+            return
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, ("order", (order, position), time.time()))
+
+    def _trade(self, snapshots: List[PairSnapshot], filter_result, observed_at: Optional[float]) -> None:
+        """Exit positions that hit their targets, then buy pairs that passed the filters"""
+        self.executor.check_exits(snapshots, observed_at)
+        by_address = {snapshot.pair_address: snapshot for snapshot in snapshots}
+        for pair_address, passed in zip(filter_result.pair_addresses, filter_result.passed.tolist()):
+            if passed and pair_address in by_address:
+                self.executor.buy(by_address[pair_address], discovered_at=observed_at)
+
+    async def _reconcile_orders(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            await self._sleep(self.config.order_reconcile_interval)
+            try:
+                await loop.run_in_executor(None, self.executor.reconcile)
+            except Exception as e:
+                logger.error(f"Order reconciliation failed: {e}")
+
+    def _sync_watchlist(self) -> None:
+        with self.database.session_scope() as session:
+            self.watchlist.sync_from_db(session)
+
+    def _load_indicator_state(self) -> None:
+        with self.database.session_scope() as session:
+            load_indicator_state(session, self.indicators)
+
+    def _start_analyzer(self) -> None:
+        """Start the shard processes and hand each its share of the restored indicator state"""
+        self.analyzer.start()
+        self.analyzer.seed(self.indicators.rows(self.indicators.keys()))
+
+    def _restart_analyzer(self) -> None:
+        """Replace the shard processes and seed them with the in-process indicator state"""
+        try:
+            self.analyzer.restart()
+            self.analyzer.seed(self.indicators.rows(self.indicators.keys()))
+            logger.info(f"Restarted {self.analyzer.workers} analysis shard(s)")
+        except Exception as e:
+            logger.error(f"Restarting analysis shards failed: {e}")
+
+    def _analyze(self, snapshots: List[PairSnapshot], observed_at: Optional[float]) -> Optional[AnalysisResult]:
+        """
+        Sharded analysis of one batch
+
+        Returns:
+            The shards' result, or None when they failed and the batch must be
+            analysed in-process; self.indicators is then reloaded from what the
+            shards last persisted
+        """
+        if not self.analyzer.alive():
+            logger.warning("An analysis shard is not running, restarting the shards")
+            self._load_indicator_state()
+            self._restart_analyzer()
+        try:
+            return self.analyzer.analyze(snapshots, now=observed_at)
+        except Exception as e:
+            logger.error(f"Sharded analysis failed, analysing {len(snapshots)} pair(s) in-process: {e}")
+            self._load_indicator_state()
+            return None
+
+    def _update_indicators(self, session, snapshots: List[PairSnapshot]) -> None:
+        """Feed each refreshed pair's price to the indicator engine and persist the result"""
+        priced = [snapshot for snapshot in snapshots if snapshot.price_usd is not None]
+        if priced:
+            keys = [snapshot.pair_address for snapshot in priced]
+            self.indicators.update(keys, [snapshot.price_usd for snapshot in priced])
+            store_indicators(session, self.indicators.rows(dict.fromkeys(keys)))
+
+    async def _maintain_price_history(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stop.is_set():
+            await self._sleep(self.config.price_history_maintenance_interval)
+            try:
+                result = await loop.run_in_executor(self._db_executor, self.price_history.maintain)
+                if any(result.values()):
+                    logger.info(f"Price history maintenance: {result}")
+            except Exception as e:
+                logger.error(f"Price history maintenance failed: {e}")
+
+    def ingest(self, source: str, payload: Any, observed_at: float) -> None:
+        """
+        Run one fetched response through dedup and the write path on the calling thread
+
+        Used by replays instead of run(); source is "pumpfun" (a raw get_new_tokens
+        response) or any queue source handled by _write.
+        """
+        if source == "pumpfun":
+            for token in self._new_tokens(payload, observed_at):
+                self._write("pumpfun", token, observed_at)
+        else:
+            self._write(source, payload, observed_at)
+
+    def _write(self, source: str, payload: Any, observed_at: Optional[float] = None) -> None:
+        """Blocking write, executed on the single database thread"""
+        if source == "pumpfun":
+            self.database.store_token(payload, discovered_at=observed_at)
+        elif source == "dexscreener":
+            # Parse every pair once and share the snapshots between all consumers
+            snapshots = snapshots_from_pairs(payload)
+            # Shard analysis runs before the write transaction opens so a slow shard never holds it
+            analysis = self._analyze(snapshots, observed_at) if self.analyzer is not None else None
+            with self.database.session_scope() as session:
+                new_count, updated_count = dexscreener_fetcher.store_tokens_from_dexscreener(session, snapshots, bulk=True)
+                if analysis is not None:
+                    store_indicators(session, analysis.indicator_rows)
+                    filter_result = analysis.filter_result
+                else:
+                    self._update_indicators(session, snapshots)
+                    filter_result = self.filters.evaluate(snapshots, now=observed_at)
+                store_filter_results(session, filter_result)
+            if self.analyzer is not None and analysis is None:
+                # The shards pick up from the state that now includes this batch
+                self._restart_analyzer()
+            passed = filter_result.passed_count
+            _pairs_passed.inc(passed)
+            _pairs_rejected.inc(len(filter_result.pair_addresses) - passed)
+            if self.executor is not None:
+                self._trade(snapshots, filter_result, observed_at)
+            if self.price_history is not None:
+                self.price_history.append_pairs(snapshots, observed_at)
+            if observed_at is not None:
+                self.chain_sync.record_written(snapshots, observed_at)
+            self.database.mark_seen(pair_addresses=[snapshot.pair_address for snapshot in snapshots])
+            self.pairs_stored += new_count + updated_count
+            _pairs_stored.inc(new_count + updated_count)
+        elif source == "graduation":
+            # Pump.fun rows go through the write-behind buffer; make sure they exist before merging
+            if not self.database.flush():
+                # Unwritten mints get rows from the pairs; the retried upsert lands on them by mint
+                logger.warning(f"Linking {len(payload)} graduation(s) while pump.fun rows are still unwritten")
+            with self.database.session_scope() as session:
+                link_graduations(session, payload)
+            self.database.mark_seen(pair_addresses=[graduation.snapshot.pair_address for graduation in payload])
+        elif source == "order":
+            with self.database.session_scope() as session:
+                store_order(session, *payload)
+        elif source == "insider":
+            inserted = self.insider_flow.ingest(payload, now=observed_at)
+            logger.debug(f"Stored {inserted} of {len(payload)} insider transaction(s)")
+
+    async def _db_writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            source, payload, discovered_at = await self._queue.get()
+            try:
+                await loop.run_in_executor(self._db_executor, self._write, source, payload, discovered_at)
+            except Exception as e:
+                logger.error(f"Error processing {source} item: {e}")
+            finally:
+                self._queue.task_done()
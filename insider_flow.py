@@ -0,0 +1,401 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.engine import Connection, Engine
+
+from database import InsiderFlowBucket, InsiderTokenSummary, InsiderTokenWallet, InsiderTransaction, Token
+from metrics import LatencyTracker
+from token_record import payload_created_at
+
+logger = logging.getLogger(__name__)
+
+BUY = "buy"
+SELL = "sell"
+
+# Accepted spellings of each InsiderTransaction column in feed payloads
+_FIELD_ALIASES = {
+    'transaction_hash': ('transaction_hash', 'signature', 'tx_hash', 'hash'),
+    'wallet_address': ('wallet_address', 'wallet', 'owner'),
+    'token_address': ('token_address', 'mint', 'token'),
+    'transaction_type': ('transaction_type', 'side', 'type'),
+    'timestamp': ('timestamp', 'block_time', 'time'),
+    'amount_tokens': ('amount_tokens', 'token_amount'),
+    'amount_usd': ('amount_usd', 'usd_amount', 'usd'),
+}
+
+# Bound parameters per IN (...) lookup, well under SQLite's variable limit
+_CHUNK = 500
+
+def _first(event: Dict[str, Any], column: str) -> Any:
+    for key in _FIELD_ALIASES[column]:
+        value = event.get(key)
+        if value not in (None, ''):
+            return value
+    return None
+
+def _epoch(value: Any) -> Optional[float]:
+    """datetime, ISO string or epoch seconds/milliseconds -> epoch seconds"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    try:
+        ts = float(value)
+    except (TypeError, ValueError):
+        try:
+            return _epoch(datetime.fromisoformat(str(value).replace('Z', '+00:00')))
+        except ValueError:
+            return None
+    return ts / 1000 if ts > 1e11 else ts
+
+def _datetime(ts: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(ts, tz=timezone.utc) if ts is not None else None
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def normalize_insider_event(event: Dict[str, Any], source: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Map one insider buy/sell event onto an insider_transactions row
+
+    Args:
+        event: Event dict; see _FIELD_ALIASES for the accepted keys
+        source: Value for the source column when the event has none
+
+    Returns:
+        Row dict, or None when the hash, wallet, token, side or timestamp is missing
+    """
+    side = str(_first(event, 'transaction_type') or '').lower()
+    ts = _epoch(_first(event, 'timestamp'))
+    row = {
+        'transaction_hash': _first(event, 'transaction_hash'),
+        'wallet_address': _first(event, 'wallet_address'),
+        'token_address': _first(event, 'token_address'),
+        'transaction_type': side,
+        'timestamp': _datetime(ts),
+        'amount_tokens': _float(_first(event, 'amount_tokens')),
+        'amount_usd': _float(_first(event, 'amount_usd')),
+        'source': event.get('source') or source,
+        'notes': event.get('notes'),
+    }
+    if side not in (BUY, SELL) or ts is None or not all(row[k] for k in ('transaction_hash', 'wallet_address', 'token_address')):
+        return None
+    return row
+
+def _chunks(items: Sequence[Any]) -> Iterable[Sequence[Any]]:
+    for i in range(0, len(items), _CHUNK):
+        yield items[i:i + _CHUNK]
+
+class InsiderFlowIndex:
+    def __init__(self, engine: Engine, bucket_seconds: int = 60, retention: float = 86400.0):
+        """
+        Insider transaction ingestion with incrementally maintained per-token aggregates
+
+        ingest() bulk-loads events into insider_transactions, skipping hashes already
+        stored, and folds only the newly inserted events into three summary tables:
+        insider_token_summary (running totals, distinct wallets, first-buy latency),
+        insider_flow_buckets (flow per token per bucket_seconds) and
+        insider_token_wallets (the wallets behind the distinct-wallet count). Window
+        queries read the buckets, so they never touch the raw events. Writes are expected
+        from a single thread, like every other writer of this database.
+
+        Args:
+            engine: Engine of the database holding the insider tables
+            bucket_seconds: Width of a flow bucket; windows are rounded down to it
+            retention: Age in seconds after which flow buckets are deleted
+        """
+        if bucket_seconds < 1:
+            raise ValueError("bucket_seconds must be at least 1")
+        self.engine = engine
+        self.bucket_seconds = int(bucket_seconds)
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._last_pruned = 0.0
+
+        self.batches = 0
+        self.transactions_ingested = 0
+        self.duplicates_skipped = 0
+        self.invalid_skipped = 0
+        self.ingest_latency = LatencyTracker()
+        self.query_latency = LatencyTracker()
+
+    def bucket_of(self, ts: float) -> int:
+        return int(ts) // self.bucket_seconds * self.bucket_seconds
+
+    def ingest(self, events: Iterable[Dict[str, Any]], source: Optional[str] = None,
+               now: Optional[float] = None) -> int:
+        """
+        Store new insider events and update the aggregates in the same transaction
+
+        Replaying a batch is a no-op: events whose transaction_hash is already stored,
+        or repeated within the batch, are skipped before any aggregate changes.
+
+        Args:
+            events: Event dicts (see normalize_insider_event)
+            source: Source recorded for events that carry none
+            now: Current epoch seconds, for bucket retention
+
+        Returns:
+            Number of events inserted
+        """
+        start = time.monotonic()
+        rows_by_hash = {}
+        submitted = invalid = 0
+        for event in events:
+            submitted += 1
+            row = normalize_insider_event(event, source)
+            if row is None:
+                invalid += 1
+            else:
+                rows_by_hash.setdefault(row['transaction_hash'], row)
+        if not rows_by_hash:
+            self._count(0, 0, invalid, start)
+            return 0
+
+        with self.engine.begin() as conn:
+            stored = set()
+            for chunk in _chunks(list(rows_by_hash)):
+                stored.update(conn.execute(
+                    select(InsiderTransaction.transaction_hash).where(InsiderTransaction.transaction_hash.in_(chunk))
+                ).scalars())
+            rows = [row for tx_hash, row in rows_by_hash.items() if tx_hash not in stored]
+            if rows:
+                conn.execute(insert(InsiderTransaction), rows)
+                self._apply(conn, rows)
+        duplicates = submitted - invalid - len(rows)
+        self._count(len(rows), duplicates, invalid, start)
+
+        now = now if now is not None else time.time()
+        if now - self._last_pruned >= self.bucket_seconds:
+            self.apply_retention(now)
+        return len(rows)
+
+    def _count(self, inserted: int, duplicates: int, invalid: int, start: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.transactions_ingested += inserted
+            self.duplicates_skipped += duplicates
+            self.invalid_skipped += invalid
+            self.ingest_latency.add(time.monotonic() - start)
+
+    def _apply(self, conn: Connection, rows: List[Dict[str, Any]]) -> None:
+        totals = defaultdict(lambda: {'buy_usd': 0.0, 'sell_usd': 0.0, 'buys': 0, 'sells': 0,
+                                      'first_buy': None, 'last': None})
+        buckets = defaultdict(lambda: [0.0, 0.0, 0])
+        wallets: Dict[Tuple[str, str], float] = {}
+        for row in rows:
+            token = row['token_address']
+            ts = row['timestamp'].timestamp()
+            usd = row['amount_usd'] or 0.0
+            total = totals[token]
+            bucket = buckets[(self.bucket_of(ts), token)]
+            if row['transaction_type'] == BUY:
+                total['buy_usd'] += usd
+                total['buys'] += 1
+                bucket[0] += usd
+                if total['first_buy'] is None or ts < total['first_buy']:
+                    total['first_buy'] = ts
+            else:
+                total['sell_usd'] += usd
+                total['sells'] += 1
+                bucket[1] += usd
+            bucket[2] += 1
+            total['last'] = ts if total['last'] is None else max(total['last'], ts)
+            key = (token, row['wallet_address'])
+            wallets[key] = min(ts, wallets.get(key, ts))
+
+        new_wallets = self._insert_wallets(conn, wallets)
+        self._merge_buckets(conn, buckets)
+        self._merge_summaries(conn, totals, new_wallets)
+
+    def _insert_wallets(self, conn: Connection, wallets: Dict[Tuple[str, str], float]) -> Dict[str, int]:
+        """Insert unseen (token, wallet) pairs; returns the number of new wallets per token"""
+        keys = list(wallets)
+        known = set()
+        for chunk in _chunks(keys):
+            known.update(tuple(row) for row in conn.execute(
+                select(InsiderTokenWallet.token_address, InsiderTokenWallet.wallet_address)
+                .where(tuple_(InsiderTokenWallet.token_address, InsiderTokenWallet.wallet_address).in_(chunk))
+            ))
+        fresh = [key for key in keys if key not in known]
+        if fresh:
+            conn.execute(insert(InsiderTokenWallet), [
+                {'token_address': token, 'wallet_address': wallet, 'first_seen_at': _datetime(wallets[(token, wallet)])}
+                for token, wallet in fresh
+            ])
+        counts = defaultdict(int)
+        for token, _ in fresh:
+            counts[token] += 1
+        return counts
+
+    def _merge_buckets(self, conn: Connection, buckets: Dict[Tuple[int, str], List[float]]) -> None:
+        keys = list(buckets)
+        existing = set()
+        for chunk in _chunks(keys):
+            existing.update(tuple(row) for row in conn.execute(
+                select(InsiderFlowBucket.bucket_start, InsiderFlowBucket.token_address)
+                .where(tuple_(InsiderFlowBucket.bucket_start, InsiderFlowBucket.token_address).in_(chunk))
+            ))
+        rows = [{'b_start': start, 'b_token': token, 'd_buy': buy, 'd_sell': sell, 'd_net': buy - sell, 'd_count': count}
+                for (start, token), (buy, sell, count) in buckets.items()]
+        increments = [row for row in rows if (row['b_start'], row['b_token']) in existing]
+        if increments:
+            table = InsiderFlowBucket.__table__
+            conn.execute(
+                update(table)
+                .where(table.c.bucket_start == bindparam('b_start'), table.c.token_address == bindparam('b_token'))
+                .values(buy_usd=table.c.buy_usd + bindparam('d_buy'), sell_usd=table.c.sell_usd + bindparam('d_sell'),
+                        net_flow_usd=table.c.net_flow_usd + bindparam('d_net'),
+                        transactions=table.c.transactions + bindparam('d_count')),
+                increments
+            )
+        new_rows = [{'bucket_start': row['b_start'], 'token_address': row['b_token'], 'buy_usd': row['d_buy'],
+                     'sell_usd': row['d_sell'], 'net_flow_usd': row['d_net'], 'transactions': row['d_count']}
+                    for row in rows if (row['b_start'], row['b_token']) not in existing]
+        if new_rows:
+            conn.execute(insert(InsiderFlowBucket), new_rows)
+
+    def _launch_times(self, conn: Connection, tokens: Sequence[str]) -> Dict[str, float]:
+        """Earliest known launch time per token: pump.fun creation, else pair creation or first sighting"""
+        launched: Dict[str, float] = {}
+        for chunk in _chunks(list(tokens)):
+            result = conn.execute(
+                select(Token.pumpfun_mint_address, Token.base_token_address, Token.pumpfun_metadata,
+                       Token.pair_created_at, Token.first_seen_at)
+                .where(or_(Token.pumpfun_mint_address.in_(chunk), Token.base_token_address.in_(chunk)))
+            )
+            for mint, base_token, metadata, pair_created_at, first_seen_at in result:
+                created = payload_created_at(metadata) if isinstance(metadata, dict) else None
+                candidates = [created] if created is not None else [_epoch(pair_created_at), _epoch(first_seen_at)]
+                candidates = [ts for ts in candidates if ts is not None]
+                if not candidates:
+                    continue
+                for token in {mint, base_token} & set(chunk):
+                    launched[token] = min(candidates + ([launched[token]] if token in launched else []))
+        return launched
+
+    def _merge_summaries(self, conn: Connection, totals: Dict[str, Dict[str, Any]], new_wallets: Dict[str, int]) -> None:
+        tokens = list(totals)
+        current = {}
+        for chunk in _chunks(tokens):
+            for row in conn.execute(select(InsiderTokenSummary.__table__).where(InsiderTokenSummary.token_address.in_(chunk))).mappings():
+                current[row['token_address']] = dict(row)
+        missing_launch = [token for token in tokens if current.get(token, {}).get('launched_at') is None]
+        launched = self._launch_times(conn, missing_launch) if missing_launch else {}
+
+        inserts, updates = [], []
+        for token, total in totals.items():
+            row = current.get(token) or {'token_address': token, 'buy_usd': 0.0, 'sell_usd': 0.0, 'buys': 0, 'sells': 0,
+                                         'distinct_wallets': 0, 'launched_at': None, 'first_buy_at': None,
+                                         'last_transaction_at': None}
+            row['buy_usd'] += total['buy_usd']
+            row['sell_usd'] += total['sell_usd']
+            row['net_flow_usd'] = row['buy_usd'] - row['sell_usd']
+            row['buys'] += total['buys']
+            row['sells'] += total['sells']
+            row['distinct_wallets'] += new_wallets.get(token, 0)
+            launched_ts = _epoch(row['launched_at']) if row['launched_at'] is not None else launched.get(token)
+            first_buy_ts = min(ts for ts in (_epoch(row['first_buy_at']), total['first_buy']) if ts is not None) \
+                if row['first_buy_at'] is not None or total['first_buy'] is not None else None
+            last_ts = max(ts for ts in (_epoch(row['last_transaction_at']), total['last']) if ts is not None)
+            row['launched_at'] = _datetime(launched_ts)
+            row['first_buy_at'] = _datetime(first_buy_ts)
+            row['first_buy_latency_seconds'] = first_buy_ts - launched_ts \
+                if first_buy_ts is not None and launched_ts is not None else None
+            row['last_transaction_at'] = _datetime(last_ts)
+            (updates if token in current else inserts).append(row)
+
+        if inserts:
+            conn.execute(insert(InsiderTokenSummary), inserts)
+        if updates:
+            table = InsiderTokenSummary.__table__
+            columns = [c.name for c in table.c if c.name != 'token_address']
+            conn.execute(
+                update(table).where(table.c.token_address == bindparam('key'))
+                .values({name: bindparam(f'v_{name}') for name in columns}),
+                [dict({f'v_{name}': row[name] for name in columns}, key=row['token_address']) for row in updates]
+            )
+
+    def top_by_net_flow(self, minutes: float, limit: int = 10, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Tokens with the largest insider net flow over the last `minutes`
+
+        The window starts at the bucket boundary at or before now - minutes, so it
+        may reach up to bucket_seconds further back.
+
+        Returns:
+            Dicts with token_address, net_flow_usd, buy_usd, sell_usd, transactions,
+            distinct_wallets and first_buy_latency_seconds, largest net flow first
+        """
+        start = time.monotonic()
+        now = now if now is not None else time.time()
+        since = self.bucket_of(now - minutes * 60)
+        net_flow = func.sum(InsiderFlowBucket.net_flow_usd).label('net_flow_usd')
+        with self.engine.connect() as conn:
+            top = conn.execute(
+                select(InsiderFlowBucket.token_address, net_flow,
+                       func.sum(InsiderFlowBucket.buy_usd).label('buy_usd'),
+                       func.sum(InsiderFlowBucket.sell_usd).label('sell_usd'),
+                       func.sum(InsiderFlowBucket.transactions).label('transactions'))
+                .where(InsiderFlowBucket.bucket_start >= since)
+                .group_by(InsiderFlowBucket.token_address)
+                .order_by(net_flow.desc())
+                .limit(limit)
+            ).mappings().all()
+            summaries = {}
+            if top:
+                summaries = {row.token_address: row for row in conn.execute(
+                    select(InsiderTokenSummary.token_address, InsiderTokenSummary.distinct_wallets,
+                           InsiderTokenSummary.first_buy_latency_seconds)
+                    .where(InsiderTokenSummary.token_address.in_([row['token_address'] for row in top]))
+                )}
+        result = []
+        for row in top:
+            summary = summaries.get(row['token_address'])
+            result.append(dict(row,
+                               distinct_wallets=summary.distinct_wallets if summary else 0,
+                               first_buy_latency_seconds=summary.first_buy_latency_seconds if summary else None))
+        with self._lock:
+            self.query_latency.add(time.monotonic() - start)
+        return result
+
+    def token_summary(self, token_address: str) -> Optional[Dict[str, Any]]:
+        """Running insider totals of one token, or None if no insider event was seen"""
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(InsiderTokenSummary.__table__).where(InsiderTokenSummary.token_address == token_address)
+            ).mappings().first()
+        return dict(row) if row is not None else None
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """
+        Delete flow buckets older than retention; running totals are kept
+
+        Returns:
+            Number of buckets deleted
+        """
+        now = now if now is not None else time.time()
+        self._last_pruned = now
+        with self.engine.begin() as conn:
+            return conn.execute(
+                delete(InsiderFlowBucket).where(InsiderFlowBucket.bucket_start < self.bucket_of(now - self.retention))
+            ).rowcount or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "transactions_ingested": self.transactions_ingested,
+                "duplicates_skipped": self.duplicates_skipped,
+                "invalid_skipped": self.invalid_skipped,
+                "ingest_latency": self.ingest_latency.summary(),
+                "query_latency": self.query_latency.summary(),
+            }
@@ -177,14 +177,16 @@
 # if __name__ == "__main__":
 #     main()
 
+import asyncio
 import logging
-import time
 import sys
-import signal
-from typing import Optional
 from config import Config
 from database import Database
-from pumpfun_fetcher import PumpFunFetcher, MoralisAPIError
+from pumpfun_fetcher import PumpFunFetcher
+from pumpfun_stream import PumpFunStreamFetcher
+from ingestion_engine import IngestionEngine
+import dexscreener_fetcher
+from rate_limiter import default_scheduler, PUMPFUN_HOST, DEXSCREENER_HOST
 
 def setup_logging(config: Config):
     logging.basicConfig(
@@ -201,6 +203,9 @@ def main():
     setup_logging(config)
     logger = logging.getLogger(__name__)
     
+    default_scheduler.configure_host(PUMPFUN_HOST, config.pumpfun_requests_per_second)
+    default_scheduler.configure_host(DEXSCREENER_HOST, config.dexscreener_requests_per_second, 2 * config.dexscreener_requests_per_second)
+    
     # Initialize components
     database = Database(config.db_path)
     fetcher = PumpFunFetcher(
@@ -208,61 +213,25 @@ def main():
         timeout=config.api_timeout,
         max_retries=config.max_retries
     )
-    
-    # Setup graceful shutdown
-    def signal_handler(signum, frame):
-        logger.info("Shutdown signal received. Cleaning up...")
-        fetcher.close()
-        database.close()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    if config.pumpfun_stream_enabled:
+        fetcher = PumpFunStreamFetcher(config.pumpfun_ws_url, fallback=fetcher)
     
     logger.info("Starting DEX Sniper with new PumpFun API...")
     
-    # Perform initial health check
-    if not fetcher.health_check():
-        logger.error("API health check failed. Exiting...")
-        return
-    
     try:
-        while True:
-            try:
-                # Fetch new tokens
-                tokens = fetcher.get_new_tokens()
-                if tokens:
-                    logger.info(f"Found {len(tokens)} new tokens")
-                    
-                    for token in tokens:
-                        try:
-                            # Process each token
-                            database.store_token(token)
-                            logger.debug(f"Stored token: {token.get('address', 'Unknown')}")
-                        except Exception as e:
-                            logger.error(f"Error processing token: {e}")
-                            
-                else:
-                    logger.info("No new tokens found")
-                
-                # Wait before next fetch
-                time.sleep(30)  # Adjust based on API rate limits
-                
-            except MoralisAPIError as e:
-                logger.error(f"API Error: {e}")
-                if e.status_code == 401:
-                    logger.error("Authentication failed. Check your RapidAPI key.")
-                    break
-                time.sleep(60)  # Wait longer on API errors
-                
-            except Exception as e:
-                logger.error(f"Unexpected error: {e}")
-                time.sleep(30)
-                
+        # Perform initial health check
+        if not fetcher.health_check():
+            logger.error("API health check failed. Exiting...")
+            return
+        
+        # SIGINT/SIGTERM are handled inside the engine and trigger a graceful drain
+        engine = IngestionEngine(config, database, fetcher)
+        asyncio.run(engine.run())
     except KeyboardInterrupt:
         logger.info("Manual shutdown requested")
     finally:
         fetcher.close()
+        dexscreener_fetcher.close_session()
         database.close()
 
 if __name__ == "__main__":
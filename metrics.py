@@ -0,0 +1,345 @@
+import logging
+import threading
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Request latencies span cache revalidations to throttled retries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Discovery-to-store lag is bounded below by the write-behind flush interval
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class LatencyTracker:
+    """Keeps a bounded window of latency samples (seconds) and summarises them"""
+
+    def __init__(self, window: int = 1000):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.samples.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        if not self.samples:
+            return {"count": self.count}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "mean": sum(ordered) / len(ordered),
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+        }
+
+class _Cells:
+    """
+    Per-thread accumulator slots
+
+    Every thread updates only its own list, so increments need no lock and never
+    contend; a scrape sums the lists. Slots of threads that have exited are folded
+    into one retired slot so short-lived worker threads do not pile up.
+    """
+    __slots__ = ("size", "_local", "_lock", "_cells", "_retired")
+
+    # Live slots kept before registering another one folds the dead ones
+    COMPACT_AFTER = 64
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cells: List[Tuple[threading.Thread, list]] = []
+        self._retired = [0] * size
+
+    def cell(self) -> list:
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0] * self.size
+            with self._lock:
+                if len(self._cells) >= self.COMPACT_AFTER:
+                    self._compact()
+                self._cells.append((threading.current_thread(), cell))
+            self._local.cell = cell
+            return cell
+
+    def totals(self) -> list:
+        with self._lock:
+            self._compact()
+            totals = list(self._retired)
+            for _, cell in self._cells:
+                for i, value in enumerate(cell):
+                    totals[i] += value
+        return totals
+
+    def _compact(self) -> None:
+        live = []
+        for thread, cell in self._cells:
+            if thread.is_alive():
+                live.append((thread, cell))
+            else:
+                for i, value in enumerate(cell):
+                    self._retired[i] += value
+        self._cells = live
+
+class Counter:
+    """Monotonic counter for one label set"""
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._cells.cell()[0] += amount
+
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+class Histogram:
+    """Fixed-bucket histogram for one label set"""
+    __slots__ = ("buckets", "_cells")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        # One count per bucket, the +Inf count, then the running sum
+        self._cells = _Cells(len(self.buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        cell = self._cells.cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """(cumulative bucket counts ending with +Inf, count, sum)"""
+        totals = self._cells.totals()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return str(value)
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class MetricFamily:
+    def __init__(self, name: str, documentation: str, kind: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        """
+        A named metric and its children, one per label set
+
+        Children are created once by labels() and meant to be kept by the caller, so
+        the hot path is a single method call on a pre-bound object.
+
+        Args:
+            name: Metric name, e.g. dex_sniper_http_request_seconds
+            documentation: HELP text
+            kind: "counter" or "histogram"
+            labelnames: Label names; labels() takes their values in this order
+            buckets: Upper bounds of a histogram's buckets
+        """
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """The Counter or Histogram for one label set, created on first use"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is not None:
+            return child
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = Counter() if self.kind == "counter" else Histogram(self.buckets)
+                self._children[key] = child
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            labels = _label_text(self.labelnames, values)
+            if self.kind == "counter":
+                lines.append(f"{self.name}{labels} {_format_value(child.value())}")
+                continue
+            cumulative, count, total = child.snapshot()
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), cumulative):
+                bucket_labels = _label_text(self.labelnames + ("le",), values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {bucket_count}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Named metric families and scrape-time gauges, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "counter", labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> MetricFamily:
+        return self._register(MetricFamily(name, documentation, "histogram", labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, fn: Callable[[], float]) -> None:
+        """Register (or replace) a gauge whose value is read from fn at scrape time"""
+        with self._lock:
+            self._gauges[name] = (documentation, fn)
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        return self._families.get(name)
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is None:
+                self._families[family.name] = family
+                return family
+        if (existing.kind, existing.labelnames) != (family.kind, family.labelnames):
+            raise ValueError(f"Metric {family.name} is already registered as a {existing.kind} "
+                             f"with labels {existing.labelnames}")
+        return existing
+
+    def render(self) -> str:
+        with self._lock:
+            families = list(self._families.values())
+            gauges = list(self._gauges.items())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        for name, (documentation, fn) in gauges:
+            try:
+                value = fn()
+            except Exception as e:
+                logger.warning(f"Gauge {name} failed: {e}")
+                continue
+            lines.extend((f"# HELP {name} {_escape(documentation)}", f"# TYPE {name} gauge",
+                          f"{name} {_format_value(value)}"))
+        return "\n".join(lines) + "\n"
+
+default_registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = default_registry.histogram(
+    "dex_sniper_http_request_seconds", "HTTP request latency by API endpoint", ("endpoint",)
+)
+HTTP_ERRORS = default_registry.counter(
+    "dex_sniper_http_errors_total", "Requests that failed with an error status, timeout or connection error", ("endpoint",)
+)
+HTTP_RATE_LIMITED = default_registry.counter(
+    "dex_sniper_http_rate_limited_total", "HTTP 429 responses by API endpoint", ("endpoint",)
+)
+HTTP_RETRIES = default_registry.counter(
+    "dex_sniper_http_retries_total", "Request attempts after the first by API endpoint", ("endpoint",)
+)
+DB_FLUSH_SECONDS = default_registry.histogram(
+    "dex_sniper_db_flush_seconds", "Write-behind batch flush latency by writer", ("writer",)
+)
+TOKENS_DISCOVERED = default_registry.counter(
+    "dex_sniper_tokens_discovered_total", "New pump.fun launches seen by the poller"
+)
+TOKENS_STORED = default_registry.counter(
+    "dex_sniper_tokens_stored_total", "Rows committed to the database by source", ("source",)
+)
+PAIRS_FILTERED = default_registry.counter(
+    "dex_sniper_pairs_filtered_total", "DexScreener pairs evaluated by the DEX filters by outcome", ("result",)
+)
+DISCOVERY_TO_STORE_SECONDS = default_registry.histogram(
+    "dex_sniper_discovery_to_store_seconds", "Seconds from a launch being discovered to its row being committed",
+    buckets=LAG_BUCKETS
+)
+
+class HttpEndpointMetrics:
+    """Pre-bound request metrics for one API endpoint"""
+    __slots__ = ("latency", "errors", "rate_limited", "retries")
+
+    def __init__(self, endpoint: str):
+        self.latency = HTTP_REQUEST_SECONDS.labels(endpoint)
+        self.errors = HTTP_ERRORS.labels(endpoint)
+        self.rate_limited = HTTP_RATE_LIMITED.labels(endpoint)
+        self.retries = HTTP_RETRIES.labels(endpoint)
+
+    def observe(self, seconds: float, status_code: int) -> None:
+        """Record one completed request"""
+        self.latency.observe(seconds)
+        if status_code == 429:
+            self.rate_limited.inc()
+        elif status_code >= 400:
+            self.errors.inc()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = default_registry
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry = default_registry, port: int = 9108, host: str = "127.0.0.1"):
+        """
+        Serves registry.render() on GET /metrics from a daemon thread
+
+        Rendering happens only when scraped, so the server costs nothing between scrapes.
+
+        Args:
+            registry: Metrics to expose
+            port: Listening port; 0 picks a free one
+            host: Bind address; loopback by default
+        """
+        handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self._server.server_address[0]}:{self.port}/metrics")
+        return self
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
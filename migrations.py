@@ -0,0 +1,301 @@
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (
+    JSON, BigInteger, Boolean, Column, DateTime, Float, Index, Integer, MetaData, String, Table, Text, cast, func,
+    inspect, select, text
+)
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+_version_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String, nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+# Columns of the pre-reconciliation Token model and where their data lives now
+LEGACY_TOKEN_COLUMNS = {
+    'dexscreener_pair_address': 'pair_address',
+    'name': 'base_token_name',
+    'symbol': 'base_token_symbol',
+    'market_cap': 'market_cap_usd',
+    'volume_24h': 'volume_h24',
+}
+
+def _tokens_v1() -> Table:
+    """
+    The tokens table as migration 1 defines it, frozen at that version
+
+    Columns added to the model later belong to later migrations, not here.
+    Composite indexes are left to migration 2.
+    """
+    return Table(
+        'tokens', MetaData(),
+        Column('id', Integer, primary_key=True, index=True),
+        Column('pair_address', String, unique=True, index=True, nullable=True),
+        Column('chain_id', String, index=True),
+        Column('dex_id', String),
+        Column('url', String),
+        Column('base_token_address', String, index=True),
+        Column('base_token_name', String),
+        Column('base_token_symbol', String, index=True),
+        Column('quote_token_symbol', String),
+        Column('description', Text),
+        Column('price_usd', Float),
+        Column('price_native', Float),
+        Column('volume_h24', Float),
+        Column('volume_h6', Float),
+        Column('volume_h1', Float),
+        Column('price_change_h24', Float),
+        Column('price_change_h6', Float),
+        Column('price_change_h1', Float),
+        Column('liquidity_usd', Float),
+        Column('fdv', Float),
+        Column('market_cap_usd', Float),
+        Column('pair_created_at', DateTime),
+        Column('holders', Integer),
+        Column('passed_dex_filters', Boolean, index=True),
+        Column('is_pumpfun_launch', Boolean, index=True),
+        Column('pumpfun_mint_address', String, unique=True, index=True),
+        Column('pumpfun_metadata', JSON),
+        Column('dexscreener_metadata', JSON),
+        Column('market_state', String, index=True),
+        Column('last_ema_short', Float),
+        Column('ema_short_slope', Float),
+        Column('last_ema_long', Float),
+        Column('ema_long_slope', Float),
+        Column('rsi_value', Float),
+        Column('volatility_bands_data', JSON),
+        Column('last_trend_analysis_at', DateTime),
+        Column('gmgn_trade_status', String, index=True),
+        Column('gmgn_last_order_id', String),
+        Column('gmgn_buy_price_usd', Float),
+        Column('gmgn_buy_timestamp', DateTime),
+        Column('gmgn_sell_price_usd', Float),
+        Column('gmgn_sell_timestamp', DateTime),
+        Column('continuously_monitor', Boolean, index=True),
+        Column('first_seen_at', DateTime),
+        Column('last_updated_at', DateTime),
+        Column('last_dexscreener_fetch_at', DateTime),
+        Column('social_links_raw', JSON),
+        Column('social_links_verified_status', String, index=True),
+        Column('verified_social_links', JSON),
+        Column('last_updated', DateTime),
+        Column('created_at', DateTime),
+        Column('pumpfun_last_fetched', DateTime),
+        Column('fetch_error_count', Integer),
+    )
+
+def _column_mismatch(existing_column, model_column) -> bool:
+    """True if the live column's type or nullability differs from the model"""
+    if existing_column['nullable'] != model_column.nullable and not model_column.primary_key:
+        return True
+    if isinstance(model_column.type, (Float, Integer)):
+        type_name = str(existing_column['type']).upper()
+        return not any(name in type_name for name in ('FLOAT', 'REAL', 'DOUBLE', 'NUMERIC', 'INT', 'DECIMAL'))
+    return False
+
+def _tokens_needs_rebuild(conn: Connection, tokens: Table) -> bool:
+    existing = {column['name']: column for column in inspect(conn).get_columns(tokens.name)}
+    if set(existing) != set(tokens.c.keys()):
+        return True
+    return any(_column_mismatch(existing[column.name], column) for column in tokens.c)
+
+def _reconcile_tokens(conn: Connection, metadata: MetaData) -> None:
+    """
+    Rebuild the tokens table into the version 1 schema, preserving every row
+
+    Handles both the shipped DexScreener-era schema (NOT NULL pair columns, no
+    description) and databases created by the old model (string-typed market data,
+    name/symbol/dexscreener_pair_address columns). The target is _tokens_v1(), not
+    the model, so this migration does the same thing whatever the model looks like.
+    """
+    tokens = _tokens_v1()
+    if not inspect(conn).has_table('tokens'):
+        tokens.create(conn)
+        return
+    if not _tokens_needs_rebuild(conn, tokens):
+        return
+
+    old_metadata = MetaData()
+    old = Table('tokens', old_metadata, autoload_with=conn)
+    # Index names are schema-wide, so drop them before the new table recreates them
+    for index in list(old.indexes):
+        index.drop(conn)
+    conn.execute(text("ALTER TABLE tokens RENAME TO tokens_pre_migration"))
+    old = Table('tokens_pre_migration', MetaData(), autoload_with=conn)
+    tokens.create(conn)
+
+    target_columns = []
+    source_exprs = []
+    for column in tokens.c:
+        sources = [old.c[column.name]] if column.name in old.c else []
+        sources += [old.c[legacy] for legacy, current in LEGACY_TOKEN_COLUMNS.items()
+                    if current == column.name and legacy in old.c]
+        if not sources:
+            continue
+        if isinstance(column.type, (Float, Integer)):
+            # Legacy string columns: empty strings become NULL rather than 0
+            sources = [cast(func.nullif(source, ''), column.type) for source in sources]
+        target_columns.append(column.name)
+        source_exprs.append(sources[0] if len(sources) == 1 else func.coalesce(*sources))
+
+    conn.execute(tokens.insert().from_select(target_columns, select(*source_exprs)))
+    conn.execute(text("DROP TABLE tokens_pre_migration"))
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text("SELECT setval(pg_get_serial_sequence('tokens', 'id'), COALESCE(MAX(id), 1)) FROM tokens"))
+    logger.info(f"Rebuilt tokens table with {len(target_columns)} carried-over column(s)")
+
+# Like _tokens_v1(), the definitions below are frozen copies of what each migration
+# created; a later model change needs a new migration, not an edit here
+
+def _create_hot_query_indexes(conn: Connection, metadata: MetaData) -> None:
+    """Composite indexes for chain/created-at scans and liquidity-ranked filter results"""
+    tokens = _tokens_v1()
+    Index('ix_tokens_chain_id_pair_created_at', tokens.c.chain_id, tokens.c.pair_created_at)
+    Index('ix_tokens_passed_dex_filters_liquidity_usd', tokens.c.passed_dex_filters, tokens.c.liquidity_usd)
+    for index in tokens.indexes:
+        index.create(conn, checkfirst=True)
+
+def _create_insider_transactions(conn: Connection, metadata: MetaData) -> None:
+    Table(
+        'insider_transactions', MetaData(),
+        Column('id', Integer, primary_key=True, index=True),
+        Column('timestamp', DateTime, index=True),
+        Column('wallet_address', String, nullable=False, index=True),
+        Column('token_address', String, nullable=False, index=True),
+        Column('transaction_type', String, nullable=False),
+        Column('amount_tokens', Float),
+        Column('amount_usd', Float),
+        Column('transaction_hash', String, nullable=False, unique=True),
+        Column('source', String),
+        Column('notes', String),
+    ).create(conn, checkfirst=True)
+
+def _create_price_ticks(conn: Connection, metadata: MetaData) -> None:
+    Table(
+        'price_ticks', MetaData(),
+        Column('pair_address', String, primary_key=True),
+        Column('ts', BigInteger, primary_key=True),
+        Column('price_usd', Float),
+        Column('price_native', Float),
+        Column('liquidity_usd', Float),
+        Column('volume_h1', Float),
+        Column('volume_h6', Float),
+        Column('volume_h24', Float),
+        sqlite_with_rowid=False,
+    ).create(conn, checkfirst=True)
+
+def _add_graduation_columns(conn: Connection, metadata: MetaData) -> None:
+    """Add pump.fun graduation columns (skipping any a hand-migrated table already has)"""
+    existing = {column['name'] for column in inspect(conn).get_columns('tokens')}
+    for name, column_type in (('graduated_at', DateTime()), ('graduation_latency_seconds', Float())):
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE tokens ADD COLUMN {name} {column_type.compile(dialect=conn.dialect)}"))
+
+def _create_insider_aggregates(conn: Connection, metadata: MetaData) -> None:
+    frozen = MetaData()
+    Table(
+        'insider_token_summary', frozen,
+        Column('token_address', String, primary_key=True),
+        Column('buy_usd', Float, nullable=False),
+        Column('sell_usd', Float, nullable=False),
+        Column('net_flow_usd', Float, nullable=False),
+        Column('buys', Integer, nullable=False),
+        Column('sells', Integer, nullable=False),
+        Column('distinct_wallets', Integer, nullable=False),
+        Column('launched_at', DateTime),
+        Column('first_buy_at', DateTime),
+        Column('first_buy_latency_seconds', Float),
+        Column('last_transaction_at', DateTime),
+        sqlite_with_rowid=False,
+    )
+    Table(
+        'insider_flow_buckets', frozen,
+        Column('bucket_start', BigInteger, primary_key=True),
+        Column('token_address', String, primary_key=True),
+        Column('buy_usd', Float, nullable=False),
+        Column('sell_usd', Float, nullable=False),
+        Column('net_flow_usd', Float, nullable=False),
+        Column('transactions', Integer, nullable=False),
+        sqlite_with_rowid=False,
+    )
+    Table(
+        'insider_token_wallets', frozen,
+        Column('token_address', String, primary_key=True),
+        Column('wallet_address', String, primary_key=True),
+        Column('first_seen_at', DateTime),
+        sqlite_with_rowid=False,
+    )
+    frozen.create_all(conn, checkfirst=True)
+
+def _create_trade_orders(conn: Connection, metadata: MetaData) -> None:
+    Table(
+        'trade_orders', MetaData(),
+        Column('order_id', String, primary_key=True),
+        Column('pair_address', String, nullable=False, index=True),
+        Column('token_address', String),
+        Column('chain_id', String),
+        Column('side', String, nullable=False),
+        Column('status', String, nullable=False, index=True),
+        Column('amount', Float),
+        Column('reference_price_usd', Float),
+        Column('reference_price_native', Float),
+        Column('fill_price_usd', Float),
+        Column('fill_amount_tokens', Float),
+        Column('broker_order_id', String),
+        Column('error', String),
+        Column('discovered_at', DateTime),
+        Column('decided_at', DateTime),
+        Column('submitted_at', DateTime),
+        Column('filled_at', DateTime),
+        Column('discovery_to_fill_seconds', Float),
+    ).create(conn, checkfirst=True)
+
+# Ordered, append-only: never renumber or edit an applied migration, add a new one
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection, MetaData], None]]] = [
+    (1, "reconcile tokens table with model", _reconcile_tokens),
+    (2, "hot query composite indexes", _create_hot_query_indexes),
+    (3, "insider transactions table", _create_insider_transactions),
+    (4, "price ticks table", _create_price_ticks),
+    (5, "token graduation columns", _add_graduation_columns),
+    (6, "insider flow aggregate tables", _create_insider_aggregates),
+    (7, "trade orders table", _create_trade_orders),
+]
+
+def current_version(engine: Engine) -> int:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table('schema_version'):
+            return 0
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+def migrate(engine: Engine, metadata: MetaData) -> int:
+    """
+    Apply every pending migration, each in its own transaction
+
+    Args:
+        engine: Engine of the database to upgrade
+        metadata: Model metadata, passed to each step; steps build their DDL from
+            frozen definitions so their result never depends on it
+
+    Returns:
+        Schema version after migrating
+    """
+    _version_metadata.create_all(engine)
+    version = current_version(engine)
+    for number, name, step in MIGRATIONS:
+        if number <= version:
+            continue
+        logger.info(f"Applying migration {number}: {name}")
+        with engine.begin() as conn:
+            step(conn, metadata)
+            conn.execute(schema_version.insert().values(
+                version=number, name=name, applied_at=datetime.now(timezone.utc)
+            ))
+        version = number
+    return version
@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from metrics import LatencyTracker
+from pair_snapshot import PairSnapshot
+from token_record import TokenRecord
+
+logger = logging.getLogger(__name__)
+
+def parse_chain_ids(value: str, default: str) -> List[str]:
+    """"solana, base,bsc" -> ["solana", "base", "bsc"]; empty means [default]"""
+    chain_ids = [chain.strip().lower() for chain in (value or "").split(",") if chain.strip()]
+    return list(dict.fromkeys(chain_ids)) or [default]
+
+def parse_chain_limits(value: str) -> Dict[str, int]:
+    """"base:2,bsc:1" -> {"base": 2, "bsc": 1}"""
+    limits = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        chain_id, _, limit = item.partition(":")
+        try:
+            limits[chain_id.strip().lower()] = int(limit)
+        except ValueError:
+            raise ValueError(f"Invalid per-chain limit {item.strip()!r}, expected chain:number")
+    return limits
+
+class ChainStats:
+    __slots__ = ('syncs', 'tokens', 'pairs', 'errors', 'fetch_seconds', 'last_synced_at', 'write_lag')
+
+    def __init__(self):
+        self.syncs = 0
+        self.tokens = 0
+        self.pairs = 0
+        self.errors = 0
+        self.fetch_seconds = 0.0
+        self.last_synced_at: Optional[float] = None
+        self.write_lag = LatencyTracker()
+
+    def summary(self, now: float) -> Dict[str, Any]:
+        return {
+            "syncs": self.syncs,
+            "tokens": self.tokens,
+            "pairs": self.pairs,
+            "errors": self.errors,
+            "pairs_per_second": self.pairs / self.fetch_seconds if self.fetch_seconds else None,
+            "since_last_sync": now - self.last_synced_at if self.last_synced_at is not None else None,
+            "write_lag": self.write_lag.summary(),
+        }
+
+class MultiChainSync:
+    def __init__(self, chain_ids: Iterable[str],
+                 fetch_profiles: Callable[[], List[TokenRecord]],
+                 fetch_pairs: Callable[[List[str], str, int], List[Dict[str, Any]]],
+                 max_concurrency: int = 8, chain_concurrency: Optional[Dict[str, int]] = None,
+                 limit_per_chain: int = 50):
+        """
+        Trending sync across several chains from one download of the token-profile feed
+
+        The feed is fetched once per sync and partitioned by chainId; each chain then
+        resolves its tokens' pairs on its own thread, with at most its concurrency cap
+        of batch requests in flight. All chains share the DexScreener rate budget, and
+        the combined result is handed to the caller's single database writer.
+
+        Args:
+            chain_ids: Chains to sync, e.g. ["solana", "base", "ethereum", "bsc"]
+            fetch_profiles: Callable () -> profile TokenRecords for every chain
+            fetch_pairs: Callable (token_addresses, chain_id, max_concurrency) -> pair dicts
+            max_concurrency: Batch requests in flight per chain unless overridden
+            chain_concurrency: Per-chain overrides of max_concurrency
+            limit_per_chain: Profiles resolved per chain and sync
+        """
+        self.chain_ids = list(chain_ids)
+        self.fetch_profiles = fetch_profiles
+        self.fetch_pairs = fetch_pairs
+        self.max_concurrency = max_concurrency
+        self.chain_concurrency = dict(chain_concurrency or {})
+        self.limit_per_chain = limit_per_chain
+
+        self._stats = {chain_id: ChainStats() for chain_id in self.chain_ids}
+        self._lock = threading.Lock()
+        self.profile_fetches = 0
+
+    def concurrency_for(self, chain_id: str) -> int:
+        return max(1, self.chain_concurrency.get(chain_id, self.max_concurrency))
+
+    def total_concurrency(self) -> int:
+        """Connections the shared session needs when every chain runs at its cap"""
+        return sum(self.concurrency_for(chain_id) for chain_id in self.chain_ids)
+
+    def partition(self, profiles: Iterable[TokenRecord]) -> Dict[str, List[str]]:
+        """Token addresses per synced chain, feed order kept, at most limit_per_chain each"""
+        by_chain = defaultdict(list)
+        for profile in profiles:
+            if profile.chain_id not in self._stats:
+                continue
+            addresses = by_chain[profile.chain_id]
+            if len(addresses) < self.limit_per_chain:
+                addresses.append(profile.base_token_address)
+        return {chain_id: by_chain.get(chain_id, []) for chain_id in self.chain_ids}
+
+    def _sync_chain(self, chain_id: str, addresses: List[str]) -> List[Dict[str, Any]]:
+        stats = self._stats[chain_id]
+        start = time.monotonic()
+        try:
+            pairs = self.fetch_pairs(addresses, chain_id, self.concurrency_for(chain_id)) if addresses else []
+        except Exception as e:
+            logger.error(f"Error syncing {chain_id} pairs: {e}")
+            with self._lock:
+                stats.errors += 1
+            return []
+        with self._lock:
+            stats.syncs += 1
+            stats.tokens += len(addresses)
+            stats.pairs += len(pairs)
+            stats.fetch_seconds += time.monotonic() - start
+            stats.last_synced_at = time.time()
+        return pairs
+
+    def sync(self) -> List[Dict[str, Any]]:
+        """
+        Run one sync of every chain
+
+        Returns:
+            Pairs of all chains, chain by chain in chain_ids order
+        """
+        profiles = self.fetch_profiles()
+        self.profile_fetches += 1
+        partitions = self.partition(profiles)
+        if len(partitions) == 1:
+            return [pair for chain_id, addresses in partitions.items() for pair in self._sync_chain(chain_id, addresses)]
+        with ThreadPoolExecutor(max_workers=len(partitions), thread_name_prefix="chain-sync") as executor:
+            results = list(executor.map(lambda item: self._sync_chain(*item), partitions.items()))
+        pairs = [pair for chain_pairs in results for pair in chain_pairs]
+        logger.info(f"Multi-chain sync: {', '.join(f'{c}={len(r)}' for c, r in zip(partitions, results))} pair(s)")
+        return pairs
+
+    def record_written(self, snapshots: Iterable[PairSnapshot], observed_at: float,
+                       written_at: Optional[float] = None) -> None:
+        """Record, per chain, the delay between fetching pairs and committing them"""
+        written_at = written_at if written_at is not None else time.time()
+        chains = {snapshot.chain_id for snapshot in snapshots}
+        with self._lock:
+            for chain_id in chains:
+                stats = self._stats.get(chain_id)
+                if stats is not None:
+                    stats.write_lag.add(max(0.0, written_at - observed_at))
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            return {
+                "profile_fetches": self.profile_fetches,
+                "chains": {chain_id: stats.summary(now) for chain_id, stats in self._stats.items()},
+            }
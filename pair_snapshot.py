@@ -0,0 +1,137 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import fast_json
+from token_record import SOURCE_DEXSCREENER, TokenRecord, _intern, _number, _social_links
+
+logger = logging.getLogger(__name__)
+
+class PairSnapshot(TokenRecord):
+    """
+    TokenRecord of one DexScreener pair, the shape every DEX consumer works with
+
+    Built once per pair by from_pair(); numeric fields are converted on construction
+    while the creation timestamp and the tokens row are materialized on demand.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_pair(cls, pair: Any) -> Optional["PairSnapshot"]:
+        """
+        Parse one pair dict from the API
+
+        Returns:
+            PairSnapshot, or None if the pair is unusable (the reason is logged)
+        """
+        if not pair or not isinstance(pair, dict):
+            logger.warning(f"Skipping invalid pair_info item: {pair}")
+            return None
+
+        pair_address = pair.get('pairAddress')
+        if not pair_address:
+            logger.warning(f"Skipping pair with missing pairAddress: {(pair.get('baseToken') or {}).get('symbol')}")
+            return None
+
+        base_token = pair.get('baseToken')
+        if not base_token or not base_token.get('address'):
+            logger.warning(f"Skipping pair {pair_address} with missing baseToken address.")
+            return None
+
+        try:
+            volume = pair.get('volume') or {}
+            price_change = pair.get('priceChange') or {}
+            liquidity = pair.get('liquidity') or {}
+            price_usd = _number(pair.get('priceUsd'))
+            liquidity_usd = _number(liquidity.get('usd'))
+            if liquidity_usd is None and price_usd is not None:
+                liquidity_base = _number(liquidity.get('base'))
+                liquidity_usd = liquidity_base * price_usd if liquidity_base is not None else None
+            holders = pair.get('holders')
+            created_ms = pair.get('pairCreatedAt')
+
+            return cls(
+                pair_address,
+                base_token['address'],
+                source=SOURCE_DEXSCREENER,
+                chain_id=_intern(pair.get('chainId')),
+                dex_id=_intern(pair.get('dexId')),
+                url=pair.get('url'),
+                base_token_name=base_token.get('name'),
+                base_token_symbol=base_token.get('symbol'),
+                quote_token_symbol=(pair.get('quoteToken') or {}).get('symbol'),
+                price_usd=price_usd,
+                price_native=_number(pair.get('priceNative')),
+                volume_h24=_number(volume.get('h24')),
+                volume_h6=_number(volume.get('h6')),
+                volume_h1=_number(volume.get('h1')),
+                price_change_h24=_number(price_change.get('h24')),
+                price_change_h6=_number(price_change.get('h6')),
+                price_change_h1=_number(price_change.get('h1')),
+                liquidity_usd=liquidity_usd,
+                fdv=_number(pair.get('fdv')),
+                market_cap_usd=_number(pair.get('marketCap')),
+                holders=int(holders) if holders else None,
+                pair_created_at_ms=int(created_ms) if created_ms else None,
+                social_links_raw=_social_links(pair),
+                fetched_at=datetime.now(timezone.utc),
+            )
+        except (TypeError, ValueError) as e_val:
+            logger.error(f"Data type error for {pair_address} (e.g. converting string to float): {e_val}. Data: {pair}")
+            return None
+
+    @property
+    def pair_created_at(self) -> Optional[datetime]:
+        if not self.pair_created_at_ms:
+            return None
+        try:
+            return datetime.fromtimestamp(self.pair_created_at_ms / 1000, tz=timezone.utc)
+        except (TypeError, ValueError, OverflowError, OSError) as ts_e:
+            logger.warning(f"Could not parse pairCreatedAt timestamp {self.pair_created_at_ms} for {self.pair_address}: {ts_e}")
+            return None
+
+    def to_row(self) -> Dict[str, Any]:
+        """Column values for the tokens table"""
+        return {
+            "pair_address": self.pair_address,
+            "chain_id": self.chain_id,
+            "dex_id": self.dex_id,
+            "url": self.url,
+            "base_token_address": self.base_token_address,
+            "base_token_name": self.base_token_name,
+            "base_token_symbol": self.base_token_symbol,
+            "quote_token_symbol": self.quote_token_symbol,
+            "price_usd": self.price_usd,
+            "price_native": self.price_native,
+            "volume_h24": self.volume_h24,
+            "volume_h6": self.volume_h6,
+            "volume_h1": self.volume_h1,
+            "price_change_h24": self.price_change_h24,
+            "price_change_h6": self.price_change_h6,
+            "price_change_h1": self.price_change_h1,
+            "liquidity_usd": self.liquidity_usd,
+            "fdv": self.fdv,
+            "market_cap_usd": self.market_cap_usd,
+            "holders": self.holders,
+            "pair_created_at": self.pair_created_at,
+            "social_links_raw": self.social_links_raw,
+            "last_dexscreener_fetch_at": self.fetched_at,
+        }
+
+    def __repr__(self) -> str:
+        return f"PairSnapshot({self.pair_address!r}, {self.base_token_symbol!r}, price_usd={self.price_usd})"
+
+def snapshots_from_pairs(pairs: Iterable[Any]) -> List[PairSnapshot]:
+    """Parse pair dicts, dropping unusable ones"""
+    return [snapshot for snapshot in map(PairSnapshot.from_pair, pairs) if snapshot is not None]
+
+def decode_pairs(content: bytes) -> List[PairSnapshot]:
+    """
+    Decode a DexScreener response body straight into snapshots
+
+    Accepts the {"pairs": [...]}, {"pair": {...}} and bare-list response shapes.
+    """
+    data = fast_json.loads(content)
+    if isinstance(data, dict):
+        data = data.get('pairs') or ([data['pair']] if data.get('pair') else [])
+    return snapshots_from_pairs(data if isinstance(data, list) else [])
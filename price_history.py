@@ -0,0 +1,359 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+import fast_json
+from database import PriceTick
+from pair_snapshot import PairSnapshot
+
+logger = logging.getLogger(__name__)
+
+VALUE_COLUMNS = ('price_usd', 'price_native', 'liquidity_usd', 'volume_h1', 'volume_h6', 'volume_h24')
+TICK_DTYPE = np.dtype([('ts', '<i8')] + [(column, '<f8') for column in VALUE_COLUMNS])
+
+SEGMENT_PREFIX = "seg-"
+
+def _empty() -> np.ndarray:
+    return np.empty(0, dtype=TICK_DTYPE)
+
+def _rows_to_array(rows: List[Any]) -> np.ndarray:
+    """(ts, *VALUE_COLUMNS) tuples -> TICK_DTYPE array, None becoming NaN"""
+    array = np.empty(len(rows), dtype=TICK_DTYPE)
+    if rows:
+        columns = list(zip(*rows))
+        array['ts'] = columns[0]
+        for position, column in enumerate(VALUE_COLUMNS, start=1):
+            array[column] = np.array(columns[position], dtype=np.float64)
+    return array
+
+class _Segment:
+    """One immutable, memory-mapped block of ticks sorted by (pair, ts)"""
+    __slots__ = ('path', 'start_ms', 'end_ms', 'resolution_ms', 'ticks', 'index')
+
+    def __init__(self, path: str, start_ms: int, end_ms: int, resolution_ms: int):
+        self.path = path
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.resolution_ms = resolution_ms
+        self.ticks = np.load(os.path.join(path, "ticks.npy"), mmap_mode='r')
+        with open(os.path.join(path, "index.json"), "rb") as f:
+            self.index: Dict[str, List[int]] = fast_json.loads(f.read())
+
+    @staticmethod
+    def name(start_ms: int, end_ms: int, resolution_ms: int) -> str:
+        return f"{SEGMENT_PREFIX}{start_ms:015d}-{end_ms:015d}-{resolution_ms}"
+
+    @classmethod
+    def open(cls, path: str) -> Optional["_Segment"]:
+        try:
+            start_ms, end_ms, resolution_ms = (int(part) for part in os.path.basename(path)[len(SEGMENT_PREFIX):].split("-"))
+            return cls(path, start_ms, end_ms, resolution_ms)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable price segment {path}: {e}")
+            return None
+
+    @classmethod
+    def write(cls, directory: str, pairs: List[str], ticks: np.ndarray, resolution_ms: int) -> "_Segment":
+        """
+        Persist ticks (sorted by pair, then ts; pairs[i] is the pair of ticks[i])
+
+        Files are written to a temporary directory that is renamed into place, so a
+        crash never leaves a half-written segment behind.
+        """
+        index = {}
+        boundaries = [0] + [i for i in range(1, len(pairs)) if pairs[i] != pairs[i - 1]] + [len(pairs)]
+        for start, stop in zip(boundaries, boundaries[1:]):
+            index[pairs[start]] = [start, stop]
+
+        path = os.path.join(directory, cls.name(int(ticks['ts'].min()), int(ticks['ts'].max()) + 1, resolution_ms))
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "ticks.npy"), ticks)
+        with open(os.path.join(tmp_path, "index.json"), "wb") as f:
+            f.write(fast_json.dumps(index))
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+        return cls.open(path)
+
+    def read(self, pair_address: str, start_ms: int, end_ms: int) -> np.ndarray:
+        bounds = self.index.get(pair_address)
+        if bounds is None or end_ms < self.start_ms or start_ms >= self.end_ms:
+            return _empty()
+        ticks = self.ticks[bounds[0]:bounds[1]]
+        lo = np.searchsorted(ticks['ts'], start_ms, side='left')
+        hi = np.searchsorted(ticks['ts'], end_ms, side='right')
+        return np.array(ticks[lo:hi])
+
+def _combine(segments: List[_Segment], resolution_ms: int) -> Tuple[List[str], np.ndarray]:
+    """
+    Ticks of several segments sorted by (pair, ts)
+
+    One tick is kept per (pair, ts), or per (pair, resolution_ms bucket) when
+    resolution_ms is set; the last one wins, with segments taken in list order.
+    """
+    names = sorted({pair for segment in segments for pair in segment.index})
+    ids = {pair: pair_id for pair_id, pair in enumerate(names)}
+    tick_parts, id_parts = [], []
+    for segment in segments:
+        pair_ids = np.empty(len(segment.ticks), dtype=np.int64)
+        for pair, (start, stop) in segment.index.items():
+            pair_ids[start:stop] = ids[pair]
+        tick_parts.append(np.array(segment.ticks))
+        id_parts.append(pair_ids)
+    ticks, pair_ids = np.concatenate(tick_parts), np.concatenate(id_parts)
+    # lexsort is stable, so equal keys keep segment order and the later tick stays last
+    order = np.lexsort((ticks['ts'], pair_ids))
+    ticks, pair_ids = ticks[order], pair_ids[order]
+    key = ticks['ts'] // resolution_ms if resolution_ms else ticks['ts']
+    keep = np.r_[(key[1:] != key[:-1]) | (pair_ids[1:] != pair_ids[:-1]), True]
+    return [names[pair_id] for pair_id in pair_ids[keep]], ticks[keep]
+
+class PriceHistoryStore:
+    def __init__(self, engine: Engine, segment_dir: str, compact_after: float = 3600.0,
+                 downsample_after: float = 86400.0, downsample_interval: float = 60.0,
+                 retention: float = 30 * 86400.0, merge_window: float = 3600.0,
+                 downsampled_window: float = 86400.0):
+        """
+        Append-only price history per pair
+
+        New ticks go to the price_ticks table, clustered on (pair_address, ts). Ticks
+        older than compact_after are moved into immutable columnar NumPy segments that
+        are memory-mapped for reads. Compacted segments are merged into one segment per
+        merge_window once that window is over. Segments older than downsample_after are
+        reduced to the last tick per downsample_interval and merged into one segment per
+        downsampled_window, and anything older than retention is dropped. The segment
+        count therefore stays bounded by the windows covered, not the number of
+        maintenance runs.
+
+        Args:
+            engine: Engine of the database holding price_ticks
+            segment_dir: Directory for compacted segments
+            compact_after: Seconds a tick stays in the table before compaction
+            downsample_after: Age in seconds after which segments are downsampled
+            downsample_interval: Bucket width in seconds for downsampled segments
+            retention: Age in seconds after which ticks are deleted
+            merge_window: Seconds of compacted ticks per merged segment (0 keeps one segment per compaction)
+            downsampled_window: Seconds of downsampled ticks per segment
+        """
+        self.engine = engine
+        self.segment_dir = segment_dir
+        self.compact_after = compact_after
+        self.downsample_after = downsample_after
+        self.downsample_interval = downsample_interval
+        self.retention = retention
+        self.merge_window = merge_window
+        self.downsampled_window = downsampled_window
+        self._lock = threading.Lock()
+        self.ticks_appended = 0
+
+        os.makedirs(segment_dir, exist_ok=True)
+        self._segments: List[_Segment] = []
+        for name in sorted(os.listdir(segment_dir)):
+            path = os.path.join(segment_dir, name)
+            if name.endswith(".tmp"):
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.startswith(SEGMENT_PREFIX):
+                segment = _Segment.open(path)
+                if segment is not None:
+                    self._segments.append(segment)
+
+    def append(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append tick rows (pair_address, ts in epoch milliseconds, VALUE_COLUMNS)
+
+        A tick repeating an existing (pair_address, ts) is ignored.
+
+        Returns:
+            Number of rows submitted
+        """
+        rows = [{column: row.get(column) for column in ('pair_address', 'ts') + VALUE_COLUMNS}
+                for row in rows if row.get('pair_address') and row.get('ts') is not None]
+        if not rows:
+            return 0
+        dialect = self.engine.dialect.name
+        if dialect == "sqlite":
+            stmt = sqlite_insert(PriceTick).on_conflict_do_nothing()
+        elif dialect == "postgresql":
+            stmt = postgresql_insert(PriceTick).on_conflict_do_nothing()
+        else:
+            stmt = insert(PriceTick)
+        with self.engine.begin() as conn:
+            conn.execute(stmt, rows)
+        self.ticks_appended += len(rows)
+        return len(rows)
+
+    def append_pairs(self, pairs: Iterable[Any], observed_at: Optional[float] = None) -> int:
+        """Append one tick per DexScreener pair (dict or PairSnapshot) observed at observed_at (epoch seconds)"""
+        ts = int((observed_at if observed_at is not None else time.time()) * 1000)
+        rows = []
+        for pair in pairs:
+            snapshot = pair if isinstance(pair, PairSnapshot) else PairSnapshot.from_pair(pair)
+            if snapshot is None:
+                continue
+            row = {column: getattr(snapshot, column) for column in VALUE_COLUMNS}
+            row.update(pair_address=snapshot.pair_address, ts=ts)
+            rows.append(row)
+        return self.append(rows)
+
+    def range(self, pair_address: str, start: float, end: Optional[float] = None) -> np.ndarray:
+        """
+        Ticks of one pair with start <= ts <= end (epoch seconds), oldest first
+
+        Returns:
+            Structured array with TICK_DTYPE fields; ts in epoch milliseconds
+        """
+        start_ms = int(start * 1000)
+        end_ms = int((end if end is not None else time.time()) * 1000)
+        with self._lock:
+            segments = list(self._segments)
+        parts = [segment.read(pair_address, start_ms, end_ms) for segment in segments]
+
+        columns = [PriceTick.ts] + [getattr(PriceTick, column) for column in VALUE_COLUMNS]
+        with self.engine.connect() as conn:
+            rows = conn.execute(
+                select(*columns)
+                .where(PriceTick.pair_address == pair_address, PriceTick.ts >= start_ms, PriceTick.ts <= end_ms)
+                .order_by(PriceTick.ts)
+            ).all()
+        parts.append(_rows_to_array(rows))
+
+        ticks = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        if len(ticks) > 1 and not np.all(np.diff(ticks['ts']) > 0):
+            # Overlapping segments (e.g. after an interrupted compaction): keep one tick per ts
+            ticks = ticks[np.unique(ticks['ts'], return_index=True)[1]]
+        return ticks
+
+    def last(self, pair_address: str, seconds: float, now: Optional[float] = None) -> np.ndarray:
+        """Ticks of one pair from the last `seconds` seconds"""
+        now = now if now is not None else time.time()
+        return self.range(pair_address, now - seconds, now)
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """
+        Move ticks older than compact_after from the table into a new segment
+
+        Returns:
+            Number of ticks moved
+        """
+        cutoff_ms = int(((now if now is not None else time.time()) - self.compact_after) * 1000)
+        columns = [PriceTick.pair_address, PriceTick.ts] + [getattr(PriceTick, column) for column in VALUE_COLUMNS]
+        with self.engine.begin() as conn:
+            rows = conn.execute(
+                select(*columns).where(PriceTick.ts < cutoff_ms).order_by(PriceTick.pair_address, PriceTick.ts)
+            ).all()
+            if not rows:
+                return 0
+            segment = _Segment.write(self.segment_dir, [row[0] for row in rows],
+                                     _rows_to_array([row[1:] for row in rows]), resolution_ms=0)
+            conn.execute(delete(PriceTick).where(PriceTick.ts < cutoff_ms))
+        with self._lock:
+            self._segments.append(segment)
+            self._segments.sort(key=lambda s: s.start_ms)
+        logger.info(f"Compacted {len(rows)} price tick(s) into {os.path.basename(segment.path)}")
+
+        if self.merge_window > 0:
+            window_ms = int(self.merge_window * 1000)
+            with self._lock:
+                # Only windows that compaction has moved past; the current one still grows
+                closed = [s for s in self._segments
+                          if s.resolution_ms == 0 and (s.start_ms // window_ms + 1) * window_ms <= cutoff_ms]
+            self._merge_windows(closed, window_ms, resolution_ms=0)
+        return len(rows)
+
+    def downsample(self, now: Optional[float] = None) -> int:
+        """
+        Keep only the last tick per downsample_interval in segments older than downsample_after
+
+        Aged segments are merged into one segment per downsampled_window, together with
+        whatever was already downsampled in that window.
+
+        Returns:
+            Number of ticks removed
+        """
+        cutoff_ms = int(((now if now is not None else time.time()) - self.downsample_after) * 1000)
+        with self._lock:
+            aged = [s for s in self._segments if s.end_ms <= cutoff_ms]
+        return self._merge_windows(aged, int(self.downsampled_window * 1000),
+                                   resolution_ms=int(self.downsample_interval * 1000))
+
+    def _merge_windows(self, segments: List[_Segment], window_ms: int, resolution_ms: int) -> int:
+        """
+        Rewrite segments as one segment per window (keyed by segment start) at resolution_ms
+
+        A window already held by a single segment at that resolution is left alone.
+
+        Returns:
+            Number of ticks removed by deduplication or downsampling
+        """
+        windows: Dict[int, List[_Segment]] = {}
+        for segment in segments:
+            windows.setdefault(segment.start_ms // window_ms, []).append(segment)
+        removed = 0
+        for group in windows.values():
+            if len(group) > 1 or group[0].resolution_ms != resolution_ms:
+                removed += self._replace(group, resolution_ms)
+        return removed
+
+    def _replace(self, segments: List[_Segment], resolution_ms: int) -> int:
+        """Swap segments for one combined segment; the new files exist before the old ones go"""
+        pairs, ticks = _combine(segments, resolution_ms)
+        replacement = _Segment.write(self.segment_dir, pairs, ticks, resolution_ms=resolution_ms)
+        with self._lock:
+            for segment in segments:
+                self._segments.remove(segment)
+            self._segments.append(replacement)
+            self._segments.sort(key=lambda s: s.start_ms)
+        for segment in segments:
+            if segment.path != replacement.path:
+                shutil.rmtree(segment.path, ignore_errors=True)
+        return sum(len(segment.ticks) for segment in segments) - len(ticks)
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """
+        Delete segments and table rows older than retention
+
+        Returns:
+            Number of ticks deleted
+        """
+        cutoff_ms = int(((now if now is not None else time.time()) - self.retention) * 1000)
+        with self._lock:
+            expired = [s for s in self._segments if s.end_ms <= cutoff_ms]
+            for segment in expired:
+                self._segments.remove(segment)
+        deleted = 0
+        for segment in expired:
+            deleted += len(segment.ticks)
+            shutil.rmtree(segment.path, ignore_errors=True)
+        with self.engine.begin() as conn:
+            deleted += conn.execute(delete(PriceTick).where(PriceTick.ts < cutoff_ms)).rowcount or 0
+        return deleted
+
+    def maintain(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Run compaction, downsampling and retention in order"""
+        now = now if now is not None else time.time()
+        return {
+            "compacted": self.compact(now),
+            "downsampled": self.downsample(now),
+            "expired": self.apply_retention(now),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            segments = list(self._segments)
+        return {
+            "ticks_appended": self.ticks_appended,
+            "segments": len(segments),
+            "segment_ticks": sum(len(s.ticks) for s in segments),
+            "segment_bytes": sum(s.ticks.nbytes for s in segments),
+        }
@@ -200,11 +200,54 @@ import time
 import os
 from typing import Dict, List, Optional, Any
 import json
+from collections import OrderedDict
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+import fast_json
+from metrics import HttpEndpointMetrics
+from config import PUMPFUN_TOKEN_CACHE_SIZE, PUMPFUN_TOKEN_CACHE_TTL, PUMPFUN_TOKEN_CACHE_MAX_BYTES
+from token_cache import TokenDetailCache
+from token_record import TokenRecord, extract_mint_address
+from rate_limiter import RateLimitScheduler, default_scheduler, host_of, PRIORITY_NEW_LAUNCH
 
 logger = logging.getLogger(__name__)
 
+def normalize_pumpfun_token(token: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Map a raw pump.fun token payload onto the tokens table columns
+    
+    Args:
+        token: Token dict as returned by get_new_tokens(), or its TokenRecord
+        
+    Returns:
+        Column dict, or None if the payload carries no mint address
+    """
+    record = token if isinstance(token, TokenRecord) else TokenRecord.from_pumpfun(token)
+    return record.to_pumpfun_row() if record is not None else None
+
+class RecentMints:
+    """Bounded insertion-ordered set of recently seen mint addresses"""
+
+    def __init__(self, limit: int = 10000):
+        self.limit = limit
+        self._mints: "OrderedDict[str, None]" = OrderedDict()
+
+    def add(self, mint: str) -> bool:
+        """Remember a mint; returns False if it was already seen"""
+        if mint in self._mints:
+            self._mints.move_to_end(mint)
+            return False
+        self._mints[mint] = None
+        if len(self._mints) > self.limit:
+            self._mints.popitem(last=False)
+        return True
+
+    def __contains__(self, mint: str) -> bool:
+        return mint in self._mints
+
+    def __len__(self) -> int:
+        return len(self._mints)
+
 class MoralisAPIError(Exception):
     """Custom exception for API errors"""
     def __init__(self, message, status_code=None):
@@ -212,14 +255,18 @@ class MoralisAPIError(Exception):
         self.status_code = status_code
 
 class PumpFunFetcher:
-    def __init__(self, api_key: Optional[str] = None, timeout: int = 30, max_retries: int = 3):
+    def __init__(self, api_key: Optional[str] = None, timeout: int = 30, max_retries: int = 3,
+                 scheduler: Optional[RateLimitScheduler] = None, token_cache: Optional[TokenDetailCache] = None):
         """
         Initialize PumpFun fetcher with RapidAPI integration
         
         Args:
             api_key: RapidAPI key (if None, will try to get from environment)
             timeout: Request timeout in seconds
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts per call; each 429 uses one and the next
+                attempt waits out the scheduler's pause
+            scheduler: Rate-limit scheduler shared with other fetchers (defaults to the process-wide one)
+            token_cache: Cache filled from every get_new_tokens response and used by get_token_details
         """
         # Use provided API key or the one specified by user
         self.api_key = api_key or "47f8a0ad6cmsh0931d63e060bd42p167f5djsn78b3278e46b0"
@@ -229,14 +276,23 @@ class PumpFunFetcher:
         self.endpoint = "/get_latest_token"
         self.timeout = timeout
         self.max_retries = max_retries
+        self.scheduler = scheduler or default_scheduler
+        self.metrics = HttpEndpointMetrics("pumpfun_latest_token")
+        self.token_cache = token_cache or TokenDetailCache(
+            max_entries=PUMPFUN_TOKEN_CACHE_SIZE,
+            ttl=PUMPFUN_TOKEN_CACHE_TTL,
+            max_bytes=PUMPFUN_TOKEN_CACHE_MAX_BYTES
+        )
         
-        # Setup session with retry strategy
+        # Setup session with retry strategy; 429s are left to the rate-limit scheduler
+        # so urllib3 does not add hidden retries and backoff on top of get_new_tokens'
         self.session = requests.Session()
         retry_strategy = Retry(
             total=max_retries,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["HEAD", "GET", "OPTIONS"],
+            respect_retry_after_header=False
         )
         adapter = HTTPAdapter(max_retries=retry_strategy)
         self.session.mount("http://", adapter)
@@ -272,7 +328,14 @@ class PumpFunFetcher:
         
         try:
             logger.info(f"Making health check request to {full_url}")
+            host = host_of(full_url)
+            if not self.scheduler.acquire(host, PRIORITY_NEW_LAUNCH, timeout=self.timeout):
+                logger.error("API health check failed: Rate limit budget exhausted")
+                return False
+            start = time.perf_counter()
             response = self.session.get(full_url, timeout=self.timeout)
+            self.metrics.observe(time.perf_counter() - start, response.status_code)
+            self.scheduler.observe(host, response)
             
             if response.status_code == 200:
                 logger.info("API health check successful")
@@ -288,9 +351,11 @@ class PumpFunFetcher:
                 return False
                 
         except requests.exceptions.Timeout:
+            self.metrics.errors.inc()
             logger.error("API health check failed: Request timeout")
             return False
         except requests.exceptions.ConnectionError:
+            self.metrics.errors.inc()
             logger.error("API health check failed: Connection error")
             return False
         except Exception as e:
@@ -308,34 +373,46 @@ class PumpFunFetcher:
             List of token data or None if request fails
         """
         full_url = f"{self.base_url}{self.endpoint}"
+        host = host_of(full_url)
         
         for attempt in range(1, self.max_retries + 1):
+            if attempt > 1:
+                self.metrics.retries.inc()
             try:
+                if not self.scheduler.acquire(host, PRIORITY_NEW_LAUNCH, timeout=self.timeout):
+                    raise MoralisAPIError("Rate limit budget exhausted", 429)
                 logger.info(f"Making request to {full_url} (attempt {attempt}/{self.max_retries})")
+                start = time.perf_counter()
                 response = self.session.get(full_url, timeout=self.timeout)
+                self.metrics.observe(time.perf_counter() - start, response.status_code)
+                self.scheduler.observe(host, response)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = fast_json.response_json(response)
                     # Handle different response formats - new API might return different structure
                     if isinstance(data, list):
                         logger.info(f"Successfully retrieved {len(data)} tokens")
-                        return data[:limit] if limit and len(data) > limit else data
+                        tokens = data[:limit] if limit and len(data) > limit else data
                     elif isinstance(data, dict) and 'tokens' in data:
                         tokens = data['tokens']
                         logger.info(f"Successfully retrieved {len(tokens)} tokens")
-                        return tokens[:limit] if limit and len(tokens) > limit else tokens
+                        tokens = tokens[:limit] if limit and len(tokens) > limit else tokens
                     else:
                         logger.info("Successfully retrieved token data")
-                        return [data] if isinstance(data, dict) else []
+                        tokens = [data] if isinstance(data, dict) else []
+                    self.token_cache.put_many((extract_mint_address(token), token) for token in tokens)
+                    return tokens
                         
                 elif response.status_code == 401:
                     logger.error("Authentication failed: Invalid RapidAPI key")
                     raise MoralisAPIError("Invalid RapidAPI key", response.status_code)
                 elif response.status_code == 429:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Rate limit exceeded. Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
-                    continue
+                    # The scheduler has paused this host (Retry-After or backoff); the next acquire waits it out.
+                    # Every 429 is retried once after that pause, until max_retries attempts are spent
+                    logger.warning(f"Rate limit exceeded (attempt {attempt}/{self.max_retries})")
+                    if attempt < self.max_retries:
+                        continue
+                    raise MoralisAPIError("Rate limit exceeded", response.status_code)
                 else:
                     logger.error(f"Request failed: HTTP {response.status_code} - {response.text}")
                     if attempt < self.max_retries:
@@ -344,12 +421,14 @@ class PumpFunFetcher:
                     raise MoralisAPIError(f"API request failed with status {response.status_code}", response.status_code)
                     
             except requests.exceptions.Timeout:
+                self.metrics.errors.inc()
                 logger.error(f"Request timeout (attempt {attempt}/{self.max_retries})")
                 if attempt < self.max_retries:
                     time.sleep(2 ** attempt)
                     continue
                 raise MoralisAPIError("Request timeout")
             except requests.exceptions.ConnectionError:
+                self.metrics.errors.inc()
                 logger.error(f"Connection error (attempt {attempt}/{self.max_retries})")
                 if attempt < self.max_retries:
                     time.sleep(2 ** attempt)
@@ -369,33 +448,27 @@ class PumpFunFetcher:
     def get_token_details(self, token_address: str) -> Optional[Dict[str, Any]]:
         """
         Get detailed information about a specific token
-        Note: This functionality may not be available in the new API
+        
+        The API has no single-token endpoint, so details come from the token cache,
+        which every get_new_tokens response (and the database loader, if set) fills.
+        Only a token that was never seen triggers one feed refetch.
         
         Args:
-            token_address: The token contract address
+            token_address: The token mint address
             
         Returns:
-            Token details or None if not supported
+            Token details or None if the token is unknown
         """
-        logger.warning("get_token_details may not be supported by the new PumpFun API")
-        logger.info(f"Token details requested for {token_address} - functionality may be limited")
+        token = self.token_cache.get(token_address)
+        if token is not None:
+            return token
         
-        # If the new API doesn't support individual token lookup,
-        # we could fetch all tokens and filter by address
         try:
-            all_tokens = self.get_new_tokens()
-            if all_tokens:
-                for token in all_tokens:
-                    if isinstance(token, dict):
-                        # Check various possible address fields
-                        if (token.get('address') == token_address or 
-                            token.get('token_address') == token_address or
-                            token.get('contract_address') == token_address):
-                            return token
-            return None
+            self.get_new_tokens()
         except Exception as e:
             logger.error(f"Error fetching token details: {str(e)}")
             return None
+        return self.token_cache.get(token_address)
     
     def close(self):
         """Close the session"""
@@ -0,0 +1,197 @@
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import websocket
+
+import fast_json
+from config import PUMPFUN_TOKEN_CACHE_SIZE, PUMPFUN_TOKEN_CACHE_TTL, PUMPFUN_TOKEN_CACHE_MAX_BYTES
+from token_cache import TokenDetailCache
+from pumpfun_fetcher import PumpFunFetcher, MoralisAPIError, RecentMints, extract_mint_address
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WS_URL = "wss://pumpportal.fun/api/data"
+DEFAULT_SUBSCRIBE_MESSAGE = {"method": "subscribeNewToken"}
+
+class PumpFunStreamFetcher:
+    def __init__(self, ws_url: str = DEFAULT_WS_URL, fallback: Optional[PumpFunFetcher] = None,
+                 subscribe_message: Optional[Dict[str, Any]] = None, reconnect_delay: float = 1.0,
+                 max_reconnect_delay: float = 30.0, buffer_size: int = 10000, recent_mint_limit: int = 10000):
+        """
+        Stream new pump.fun launches from a WebSocket push feed
+
+        Tokens are buffered by a background thread and handed out by get_new_tokens(),
+        which has the same contract as PumpFunFetcher.get_new_tokens(). While the socket
+        is down, get_new_tokens() polls the fallback fetcher instead.
+
+        Args:
+            ws_url: WebSocket feed URL
+            fallback: Polling fetcher used while disconnected and to backfill after a reconnect
+            subscribe_message: Message sent on every (re)connect to subscribe to new launches
+            reconnect_delay: Initial reconnect delay in seconds, doubled on each failure
+            max_reconnect_delay: Upper bound for the reconnect delay
+            buffer_size: Maximum number of undelivered tokens kept in memory
+            recent_mint_limit: Number of recently seen mints remembered for dedup
+        """
+        self.ws_url = ws_url
+        self.fallback = fallback
+        self.subscribe_message = subscribe_message or DEFAULT_SUBSCRIBE_MESSAGE
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        # Shared with the fallback so streamed and polled payloads land in one cache
+        self.token_cache: TokenDetailCache = getattr(fallback, "token_cache", None)
+        if self.token_cache is None:
+            self.token_cache = TokenDetailCache(
+                max_entries=PUMPFUN_TOKEN_CACHE_SIZE,
+                ttl=PUMPFUN_TOKEN_CACHE_TTL,
+                max_bytes=PUMPFUN_TOKEN_CACHE_MAX_BYTES
+            )
+
+        self.connected = threading.Event()
+        self.reconnects = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+        self._buffer: deque = deque()
+        self._buffer_size = buffer_size
+        self._recent_mints = RecentMints(recent_mint_limit)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ws: Optional[websocket.WebSocketApp] = None
+        self._thread: Optional[threading.Thread] = None
+        self._backfill_thread: Optional[threading.Thread] = None
+        self._has_connected = False
+
+    def start(self) -> None:
+        """Start the background streaming thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pumpfun-stream", daemon=True)
+        self._thread.start()
+
+    def health_check(self) -> bool:
+        """Healthy if the socket is up, otherwise defer to the polling fallback"""
+        self.start()
+        if self.connected.wait(timeout=5):
+            return True
+        return self.fallback.health_check() if self.fallback else False
+
+    def get_new_tokens(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Return tokens received since the previous call
+
+        Args:
+            limit: Maximum number of tokens to return; the rest stay buffered
+
+        Returns:
+            List of token data, oldest first
+        """
+        self.start()
+        if not self.connected.is_set() and self.fallback is not None:
+            logger.debug("Stream disconnected, polling fallback fetcher")
+            self._ingest(self.fallback.get_new_tokens(limit) or [])
+
+        tokens = []
+        with self._lock:
+            while self._buffer and (not limit or len(tokens) < limit):
+                tokens.append(self._buffer.popleft())
+        return tokens
+
+    def close(self) -> None:
+        """Stop the stream and close the fallback session"""
+        self._stop.set()
+        if self._ws is not None:
+            self._ws.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._backfill_thread is not None:
+            self._backfill_thread.join(timeout=5)
+        if self.fallback is not None:
+            self.fallback.close()
+
+    def _run(self) -> None:
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            self._ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_open=self._on_open,
+                on_message=self._on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+            )
+            self._ws.run_forever(ping_interval=20, ping_timeout=10)
+            was_connected = self.connected.is_set()
+            self.connected.clear()
+            if self._stop.is_set():
+                break
+            if was_connected:
+                delay = self.reconnect_delay
+            logger.warning(f"PumpFun stream disconnected, reconnecting in {delay:.1f}s")
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _on_open(self, ws) -> None:
+        ws.send(fast_json.dumps(self.subscribe_message).decode())
+        self.connected.set()
+        if self._has_connected:
+            self.reconnects += 1
+            logger.info("PumpFun stream reconnected, backfilling missed launches")
+            self._start_backfill()
+        else:
+            logger.info(f"PumpFun stream connected to {self.ws_url}")
+        self._has_connected = True
+
+    def _on_message(self, ws, message) -> None:
+        try:
+            data = fast_json.loads(message)
+        except (TypeError, ValueError):
+            logger.warning("Ignoring non-JSON stream message")
+            return
+        if isinstance(data, dict) and 'tokens' in data:
+            data = data['tokens']
+        self._ingest(data if isinstance(data, list) else [data])
+
+    def _on_error(self, ws, error) -> None:
+        logger.error(f"PumpFun stream error: {error}")
+
+    def _on_close(self, ws, status_code, message) -> None:
+        logger.info(f"PumpFun stream closed (status={status_code})")
+
+    def _start_backfill(self) -> None:
+        """Backfill on a worker thread so the REST poll never stalls message handling and pings"""
+        if self.fallback is None:
+            return
+        if self._backfill_thread is not None and self._backfill_thread.is_alive():
+            return
+        self._backfill_thread = threading.Thread(target=self._backfill, name="pumpfun-backfill", daemon=True)
+        self._backfill_thread.start()
+
+    def _backfill(self) -> None:
+        """Resume after a reconnect by polling for launches missed while the socket was down"""
+        if self.fallback is None:
+            return
+        try:
+            self._ingest(self.fallback.get_new_tokens() or [])
+        except MoralisAPIError as e:
+            logger.error(f"Backfill after reconnect failed: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error during backfill after reconnect: {e}")
+
+    def _ingest(self, tokens: List[Dict[str, Any]]) -> None:
+        self.token_cache.put_many((extract_mint_address(token), token) for token in tokens)
+        with self._lock:
+            for token in tokens:
+                mint = extract_mint_address(token)
+                # Subscription acknowledgements and other control messages carry no mint
+                if not mint:
+                    continue
+                if not self._recent_mints.add(mint):
+                    self.duplicates += 1
+                    continue
+                if len(self._buffer) >= self._buffer_size:
+                    self._buffer.popleft()
+                    self.dropped += 1
+                self._buffer.append(token)
@@ -0,0 +1,208 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first when several callers wait on the same host
+PRIORITY_NEW_LAUNCH = 0
+PRIORITY_LOOKUP = 5
+PRIORITY_TRENDING = 10
+
+PUMPFUN_HOST = "pumpfun-scraper-api.p.rapidapi.com"
+DEXSCREENER_HOST = "api.dexscreener.com"
+
+# (requests per second, burst capacity); DexScreener documents 300 requests/minute
+HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+    PUMPFUN_HOST: (5.0, 5.0),
+    DEXSCREENER_HOST: (5.0, 10.0),
+}
+DEFAULT_LIMIT = (10.0, 10.0)
+
+# Backoff applied to a 429 that carries no Retry-After header (doubles per consecutive 429)
+DEFAULT_THROTTLE_BACKOFF = 1.0
+MAX_THROTTLE_BACKOFF = 60.0
+
+def host_of(url: str) -> str:
+    return urlparse(url).hostname or url
+
+def _parse_seconds(value: Any, now_epoch: float) -> Optional[float]:
+    """Parse a Retry-After / reset header: delta seconds, epoch seconds or an HTTP date"""
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            return max(0.0, parsedate_to_datetime(str(value)).timestamp() - now_epoch)
+        except (TypeError, ValueError):
+            return None
+    # Large values are absolute epoch timestamps
+    return max(0.0, seconds - now_epoch) if seconds > 1e9 else max(0.0, seconds)
+
+def _lower_headers(response) -> Dict[str, Any]:
+    headers = getattr(response, 'headers', None)
+    try:
+        return {str(key).lower(): value for key, value in headers.items()}
+    except (AttributeError, TypeError):
+        return {}
+
+class _HostState:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waiters = []
+        self.cond = threading.Condition()
+
+        self.granted = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.consecutive_throttles = 0
+        self.header_remaining: Optional[int] = None
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self.refill(now)
+        token_wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(self.blocked_until - now, token_wait)
+
+class RateLimitScheduler:
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default_limit: Tuple[float, float] = DEFAULT_LIMIT):
+        """
+        Per-host token buckets shared by every fetcher
+
+        Callers acquire() before each request and observe() every response, so a
+        429 or exhausted X-RateLimit budget pauses all callers of that host. When
+        several callers wait, the lowest priority value is served first.
+
+        Args:
+            limits: Mapping of host -> (requests per second, burst capacity)
+            default_limit: Limit for hosts not in limits
+        """
+        self.limits = dict(HOST_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def configure_host(self, host: str, rate: float, capacity: Optional[float] = None) -> None:
+        """Set (or reset) the budget of a host"""
+        with self._lock:
+            self.limits[host] = (rate, capacity if capacity is not None else max(1.0, rate))
+            self._hosts.pop(host, None)
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                rate, capacity = self.limits.get(host, self.default_limit)
+                state = self._hosts[host] = _HostState(rate, capacity)
+            return state
+
+    def acquire(self, host: str, priority: int = PRIORITY_LOOKUP, timeout: Optional[float] = 30.0) -> bool:
+        """
+        Wait for permission to send one request to host
+
+        Args:
+            host: API host name
+            priority: Lower values go first (see PRIORITY_*)
+            timeout: Maximum seconds to wait; None waits indefinitely
+
+        Returns:
+            bool: True if a request slot was granted, False on timeout
+        """
+        state = self._state(host)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        entry = (priority, next(self._sequence))
+        with state.cond:
+            heapq.heappush(state.waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if state.waiters[0] == entry:
+                        wait = state.wait_time(now)
+                        if wait <= 0:
+                            state.tokens -= 1
+                            state.granted += 1
+                            return True
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            state.timeouts += 1
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    state.cond.wait(wait)
+            finally:
+                state.waiters.remove(entry)
+                heapq.heapify(state.waiters)
+                state.cond.notify_all()
+
+    def observe(self, host: str, response) -> None:
+        """Update the host budget from a response's status and rate-limit headers"""
+        state = self._state(host)
+        headers = _lower_headers(response)
+        now, now_epoch = time.monotonic(), time.time()
+        with state.cond:
+            if getattr(response, 'status_code', None) == 429:
+                state.throttled += 1
+                state.consecutive_throttles += 1
+                delay = _parse_seconds(headers.get('retry-after'), now_epoch)
+                if delay is None:
+                    delay = min(MAX_THROTTLE_BACKOFF, DEFAULT_THROTTLE_BACKOFF * 2 ** (state.consecutive_throttles - 1))
+                state.tokens = 0
+                state.blocked_until = max(state.blocked_until, now + delay)
+                logger.warning(f"Rate limited by {host}, pausing requests for {delay:.1f}s")
+            else:
+                state.consecutive_throttles = 0
+
+            remaining = headers.get('x-ratelimit-remaining', headers.get('x-ratelimit-requests-remaining'))
+            try:
+                state.header_remaining = int(remaining) if remaining is not None else state.header_remaining
+            except (TypeError, ValueError):
+                pass
+            if remaining is not None and state.header_remaining is not None:
+                state.refill(now)
+                state.tokens = min(state.tokens, state.header_remaining)
+                if state.header_remaining <= 0:
+                    reset = _parse_seconds(headers.get('x-ratelimit-reset', headers.get('x-ratelimit-requests-reset')), now_epoch)
+                    if reset is not None:
+                        state.blocked_until = max(state.blocked_until, now + reset)
+            state.cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Remaining budget and counters per host"""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            hosts = dict(self._hosts)
+        for host, state in hosts.items():
+            with state.cond:
+                state.refill(now)
+                result[host] = {
+                    "rate_per_sec": state.rate,
+                    "capacity": state.capacity,
+                    "tokens_available": state.tokens,
+                    "blocked_for": max(0.0, state.blocked_until - now),
+                    "header_remaining": state.header_remaining,
+                    "waiting": len(state.waiters),
+                    "granted": state.granted,
+                    "throttled": state.throttled,
+                    "timeouts": state.timeouts,
+                }
+        return result
+
+# Process-wide scheduler used by the fetchers unless one is passed in explicitly
+default_scheduler = RateLimitScheduler()
@@ -0,0 +1,196 @@
+import argparse
+import dataclasses
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config import Config
+from database import Database, Token
+from ingestion_engine import IngestionEngine
+from pumpfun_fetcher import PumpFunFetcher
+from response_log import read_responses
+from trade_execution import CLOSED, OPEN, Broker, SimulatedBroker
+
+logger = logging.getLogger(__name__)
+
+class VirtualClock:
+    """Clock that only moves when told to; time() and sleep() stand in for the time module"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += max(0.0, seconds)
+
+    def advance_to(self, ts: float) -> None:
+        self.now = max(self.now, ts)
+
+@dataclass
+class ReplayReport:
+    responses: int = 0
+    errors: int = 0
+    first_observed_at: Optional[float] = None
+    last_observed_at: Optional[float] = None
+    wall_seconds: float = 0.0
+    tokens_discovered: int = 0
+    pairs_stored: int = 0
+    pnl: Dict[str, Any] = dataclasses.field(default_factory=dict)
+
+    @property
+    def recorded_seconds(self) -> float:
+        if self.first_observed_at is None:
+            return 0.0
+        return self.last_observed_at - self.first_observed_at
+
+    @property
+    def speedup(self) -> Optional[float]:
+        return self.recorded_seconds / self.wall_seconds if self.wall_seconds else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(dataclasses.asdict(self), recorded_seconds=self.recorded_seconds, speedup=self.speedup)
+
+def simulated_pnl(db: Session, buy_amount: float) -> Dict[str, Any]:
+    """
+    PnL of the positions recorded in the gmgn_* columns
+
+    Closed positions are valued at gmgn_sell_price_usd, open ones at the pair's last
+    price_usd. Every buy spends buy_amount of the quote token, so PnL is reported in
+    that unit.
+
+    Args:
+        db: Session on the replayed database
+        buy_amount: Quote amount spent per buy (Config.default_buy_amount)
+
+    Returns:
+        Dict with trade counts, win rate and realized/unrealized PnL
+    """
+    rows = db.execute(
+        select(Token.gmgn_trade_status, Token.gmgn_buy_price_usd, Token.gmgn_sell_price_usd, Token.price_usd)
+        .where(Token.gmgn_trade_status.in_((OPEN, CLOSED)))
+    ).all()
+    realized = unrealized = 0.0
+    closed = wins = opened = 0
+    for status, buy_price, sell_price, last_price in rows:
+        if not buy_price:
+            continue
+        if status == CLOSED and sell_price is not None:
+            change = sell_price / buy_price - 1
+            realized += buy_amount * change
+            closed += 1
+            wins += change > 0
+        elif status == OPEN:
+            opened += 1
+            if last_price:
+                unrealized += buy_amount * (last_price / buy_price - 1)
+    return {
+        "closed_trades": closed,
+        "open_positions": opened,
+        "wins": wins,
+        "win_rate": wins / closed if closed else None,
+        "realized_pnl": realized,
+        "unrealized_pnl": unrealized,
+        "total_pnl": realized + unrealized,
+    }
+
+def replay_config(config: Config) -> Config:
+    """Config for a replay: paper trading with inline orders, and nothing that reaches the network"""
+    return dataclasses.replace(
+        config, trading_enabled=True, max_in_flight_orders=0, analysis_workers=0,
+        graduation_check_interval=0, record_dir="", price_history_dir=""
+    )
+
+class ReplayEngine:
+    def __init__(self, config: Config, database, broker: Optional[Broker] = None,
+                 fetcher: Optional[PumpFunFetcher] = None, broker_latency: float = 0.0):
+        """
+        Feeds a recorded response log through the ingestion pipeline as fast as possible
+
+        Every response goes through IngestionEngine.ingest() on the calling thread:
+        pump.fun dedup, the token writer, DexScreener upserts, indicators, filters
+        and trade execution on a SimulatedBroker. A virtual clock follows the
+        recorded timestamps, so filter ages, order lifecycles and fills see the
+        recorded time rather than the wall clock.
+
+        Args:
+            config: Configuration of the run being evaluated (see replay_config)
+            database: Database to replay into, normally a fresh one
+            broker: Broker for the simulated trades; a SimulatedBroker on the virtual clock by default
+            fetcher: PumpFun fetcher whose token cache is filled; never called
+            broker_latency: Virtual seconds the default broker takes per order
+        """
+        self.clock = VirtualClock()
+        self.config = replay_config(config)
+        self.database = database
+        self.broker = broker if broker is not None else SimulatedBroker(
+            latency=broker_latency, clock=self.clock.time, sleep=self.clock.sleep
+        )
+        self.engine = IngestionEngine(self.config, database, fetcher or PumpFunFetcher(), broker=self.broker)
+        self.engine.executor.clock = self.clock.time
+
+    def run(self, path: str, limit: Optional[int] = None) -> ReplayReport:
+        """
+        Replay a recording
+
+        Args:
+            path: Recording directory or segment file (see ResponseRecorder)
+            limit: Stop after this many responses
+
+        Returns:
+            ReplayReport with throughput and simulated PnL
+        """
+        report = ReplayReport()
+        start = time.perf_counter()
+        self.database.warm_seen_index()
+        self.engine._load_indicator_state()
+        self.engine._restore_positions()
+        for observed_at, source, payload in read_responses(path):
+            if limit is not None and report.responses >= limit:
+                break
+            self.clock.advance_to(observed_at)
+            if report.first_observed_at is None:
+                report.first_observed_at = observed_at
+            report.last_observed_at = observed_at
+            report.responses += 1
+            try:
+                self.engine.ingest(source, payload, observed_at)
+            except Exception as e:
+                report.errors += 1
+                logger.error(f"Error replaying {source} response at {observed_at}: {e}")
+        if not self.database.flush():
+            report.errors += 1
+            logger.error("Replayed pump.fun tokens could not all be written")
+        report.wall_seconds = time.perf_counter() - start
+        report.tokens_discovered = self.engine.tokens_discovered
+        report.pairs_stored = self.engine.pairs_stored
+        with self.database.session_scope() as session:
+            report.pnl = simulated_pnl(session, self.config.default_buy_amount)
+        logger.info(f"Replayed {report.responses} response(s) covering {report.recorded_seconds:.0f}s "
+                    f"in {report.wall_seconds:.1f}s")
+        return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded response log and report simulated PnL")
+    parser.add_argument("recording", help="Recording directory or segment file")
+    parser.add_argument("--db", default="replay.db", help="SQLite file to replay into")
+    parser.add_argument("--limit", type=int, help="Stop after this many responses")
+    parser.add_argument("--broker-latency", type=float, default=0.0, help="Virtual seconds per simulated order")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    database = Database(args.db)
+    try:
+        report = ReplayEngine(Config(), database, broker_latency=args.broker_latency).run(args.recording, args.limit)
+    finally:
+        database.close()
+    print(json.dumps(report.to_dict(), indent=2))
+
+if __name__ == "__main__":
+    main()
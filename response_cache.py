@@ -0,0 +1,328 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import fast_json
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response built from a cached 200 body"""
+    __slots__ = ('url', 'status_code', 'content', 'etag', 'last_modified', 'stored_at', 'expires_at', 'from_cache')
+
+    def __init__(self, url: str, content: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 stored_at: float = 0.0, expires_at: float = 0.0, from_cache: bool = False):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.from_cache = from_cache
+
+    def json(self) -> Any:
+        return fast_json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def copy(self, from_cache: bool) -> "CachedResponse":
+        return CachedResponse(self.url, self.content, self.etag, self.last_modified,
+                              self.stored_at, self.expires_at, from_cache)
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+class _DiskTier:
+    """SQLite-backed second tier so the cache survives restarts"""
+
+    # Seconds between pruning passes triggered by writes
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(self, path: str, max_entries: int = 50000, retention: float = 3600.0):
+        """
+        Args:
+            path: SQLite file
+            max_entries: Rows kept; the oldest are deleted past this
+            retention: Seconds an expired row is kept for revalidation before deletion
+        """
+        self.max_entries = max_entries
+        self.retention = retention
+        self.pruned = 0
+        self._next_prune = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, content BLOB, etag TEXT, "
+                "last_modified TEXT, stored_at REAL, expires_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_stored_at ON responses (stored_at)")
+            self._conn.commit()
+        self.prune()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, etag, last_modified, stored_at, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return CachedResponse(key, *row) if row else None
+
+    def put_many(self, items: List[Tuple[str, CachedResponse]]) -> None:
+        """Write entries in one transaction; an entry never replaces a newer one for its key"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "content = excluded.content, etag = excluded.etag, last_modified = excluded.last_modified, "
+                "stored_at = excluded.stored_at, expires_at = excluded.expires_at "
+                "WHERE excluded.stored_at >= responses.stored_at",
+                [(key, entry.content, entry.etag, entry.last_modified, entry.stored_at, entry.expires_at)
+                 for key, entry in items]
+            )
+            self._conn.commit()
+        if time.monotonic() >= self._next_prune:
+            self.prune()
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        Delete rows expired for longer than retention, then the oldest rows beyond max_entries
+
+        Returns:
+            Number of rows deleted
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (now - self.retention,)).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if excess > 0:
+                deleted += self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY stored_at LIMIT ?)", (excess,)
+                ).rowcount
+            self._conn.commit()
+            self._next_prune = time.monotonic() + self.PRUNE_INTERVAL
+            self.pruned += deleted
+        return deleted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 2048, default_ttl: float = 10.0,
+                 endpoint_ttls: Optional[Dict[str, float]] = None, disk_path: Optional[str] = None,
+                 disk_max_entries: int = 50000, disk_retention: float = 3600.0):
+        """
+        LRU cache of successful GET responses with TTL, revalidation and request coalescing
+
+        Expired entries that carry an ETag or Last-Modified header are revalidated with
+        a conditional request; a 304 refreshes the entry without a new download.
+        Concurrent lookups of the same key share one in-flight request.
+
+        Args:
+            max_entries: In-memory entries kept before least-recently-used eviction
+            default_ttl: Seconds a response stays fresh when no endpoint TTL matches
+            endpoint_ttls: URL substring -> TTL seconds; the first match wins
+            disk_path: SQLite file for an optional persistent second tier
+            disk_max_entries: Rows kept in the disk tier before the oldest are pruned
+            disk_retention: Seconds past expiry a disk row is kept for revalidation
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.endpoint_ttls = endpoint_ttls or {}
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(disk_path, disk_max_entries, disk_retention) if disk_path else None
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.coalesced = 0
+        self.bytes_saved = 0
+        self.bytes_downloaded = 0
+
+    def ttl_for(self, url: str) -> float:
+        for fragment, ttl in self.endpoint_ttls.items():
+            if fragment in url:
+                return ttl
+        return self.default_ttl
+
+    def _lookup(self, key: str) -> Optional[CachedResponse]:
+        """Memory tier only; callers hold _lock"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        """Memory tier, then the disk tier read outside _lock and promoted to memory"""
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is not None or self._disk is None:
+            return entry
+        entry = self._disk.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            # Another thread may have stored a newer response while the disk was read
+            current = self._lookup(key)
+            if current is not None and current.stored_at >= entry.stored_at:
+                return current
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        """Insert into the memory tier; callers hold _lock and persist() afterwards"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _persist(self, items: List[Tuple[str, CachedResponse]]) -> None:
+        """Write entries to the disk tier; called after releasing _lock so lookups never wait on SQLite"""
+        if self._disk is not None and items:
+            self._disk.put_many(items)
+
+    def peek(self, key: str) -> Optional[CachedResponse]:
+        """Return a fresh entry without fetching (counts as a hit), else None"""
+        entry = self._read(key)
+        if entry is None or entry.expires_at <= time.time():
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry.content)
+            return entry.copy(from_cache=True)
+
+    def put_json(self, key: str, data: Any, ttl: Optional[float] = None) -> None:
+        """Store a derived JSON document (e.g. one token's slice of a batch response)"""
+        self.put_many_json([(key, data)], ttl)
+
+    def put_many_json(self, items: Iterable[Tuple[str, Any]], ttl: Optional[float] = None) -> None:
+        """put_json for several documents, persisted to the disk tier in one transaction"""
+        now = time.time()
+        entries = [(key, CachedResponse(key, fast_json.dumps(data), stored_at=now,
+                                        expires_at=now + (self.ttl_for(key) if ttl is None else ttl)))
+                   for key, data in items]
+        with self._lock:
+            for key, entry in entries:
+                self._store(key, entry)
+        self._persist(entries)
+
+    def get(self, key: str, fetch: Callable[[Dict[str, str]], Any]):
+        """
+        Return the cached response for key, fetching or revalidating when needed
+
+        Args:
+            key: Cache key (see cache_key)
+            fetch: Called with extra request headers; returns a requests.Response
+
+        Returns:
+            CachedResponse for 200/304 results, otherwise the raw response (not cached)
+        """
+        now = time.time()
+        entry = self._read(key)
+        with self._lock:
+            # Pick up a response stored since the read; keep the read one if it was evicted
+            entry = self._lookup(key) or entry
+            if entry is not None and entry.expires_at > now:
+                self.hits += 1
+                self.bytes_saved += len(entry.content)
+                return entry.copy(from_cache=True)
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                future = self._inflight[key] = Future()
+                owner = True
+
+        if not owner:
+            result = future.result()
+            if not isinstance(result, CachedResponse):
+                return result
+            with self._lock:
+                self.bytes_saved += len(result.content)
+            return result.copy(from_cache=True)
+
+        try:
+            result = self._fetch(key, entry, fetch)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch(self, key: str, stale: Optional[CachedResponse], fetch: Callable[[Dict[str, str]], Any]):
+        headers = {}
+        if stale is not None:
+            if stale.etag:
+                headers['If-None-Match'] = stale.etag
+            if stale.last_modified:
+                headers['If-Modified-Since'] = stale.last_modified
+
+        response = fetch(headers)
+        now = time.time()
+        expires_at = now + self.ttl_for(key)
+
+        if response.status_code == 304 and stale is not None:
+            refreshed = CachedResponse(key, stale.content, stale.etag, stale.last_modified, now, expires_at)
+            with self._lock:
+                self.revalidated += 1
+                self.bytes_saved += len(stale.content)
+                self._store(key, refreshed)
+            self._persist([(key, refreshed)])
+            return refreshed.copy(from_cache=True)
+
+        with self._lock:
+            self.misses += 1
+        if response.status_code != 200:
+            return response
+
+        response_headers = getattr(response, 'headers', None) or {}
+        entry = CachedResponse(key, response.content, response_headers.get('ETag'),
+                               response_headers.get('Last-Modified'), now, expires_at)
+        with self._lock:
+            self.bytes_downloaded += len(entry.content)
+            self._store(key, entry)
+        self._persist([(key, entry)])
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.revalidated + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.hits + self.revalidated + self.coalesced) / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "bytes_downloaded": self.bytes_downloaded,
+                "disk_pruned": self._disk.pruned if self._disk is not None else 0,
+            }
+
+    def clear(self) -> None:
+        """Drop every entry from memory and from the disk tier"""
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
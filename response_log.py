@@ -0,0 +1,110 @@
+import gzip
+import logging
+import os
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import fast_json
+from write_behind import WriteBehindWriter
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = "responses-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+def segment_name(start: float) -> str:
+    # Fixed-width milliseconds so segments sort by name in time order
+    return f"{SEGMENT_PREFIX}{int(start * 1000):013d}{SEGMENT_SUFFIX}"
+
+class ResponseRecorder:
+    def __init__(self, directory: str, rotate_after: float = 3600.0, batch_size: int = 200,
+                 flush_interval: float = 1.0, compresslevel: int = 6):
+        """
+        Append-only, gzip-compressed log of raw fetcher responses
+
+        record() only enqueues; a background writer serializes each response as one
+        JSON line ({"t": observed_at, "source": ..., "payload": ...}) and appends every
+        batch as a new gzip member, so a segment stays readable up to the last
+        completed flush even if the process dies. A new segment is started once the
+        current one spans rotate_after seconds of observations.
+
+        Args:
+            directory: Directory holding the log segments
+            rotate_after: Seconds of observations per segment
+            batch_size: Responses per appended gzip member, at most
+            flush_interval: Seconds a response waits before being written, at most
+            compresslevel: gzip level; 6 keeps record mode cheap on the ingest host
+        """
+        self.directory = directory
+        self.rotate_after = rotate_after
+        self.compresslevel = compresslevel
+        os.makedirs(directory, exist_ok=True)
+
+        self._segment_path: Optional[str] = None
+        self._segment_start: Optional[float] = None
+        self.responses_recorded = 0
+        self.bytes_written = 0
+        self._writer = WriteBehindWriter(self._append, batch_size=batch_size,
+                                         flush_interval=flush_interval, name="response-recorder")
+
+    def record(self, source: str, payload: Any, observed_at: float) -> None:
+        """Queue one raw response; payload must be JSON-serializable and not mutated afterwards"""
+        self._writer.put((observed_at, source, payload))
+
+    def _append(self, items: List[Tuple[float, str, Any]]) -> None:
+        chunks: Dict[str, List[bytes]] = {}
+        for observed_at, source, payload in items:
+            if self._segment_start is None or observed_at - self._segment_start >= self.rotate_after:
+                self._segment_start = observed_at
+                self._segment_path = os.path.join(self.directory, segment_name(observed_at))
+            line = fast_json.dumps({"t": observed_at, "source": source, "payload": payload})
+            chunks.setdefault(self._segment_path, []).append(line + b"\n")
+        for path, lines in chunks.items():
+            data = gzip.compress(b"".join(lines), compresslevel=self.compresslevel, mtime=0)
+            with open(path, "ab") as f:
+                f.write(data)
+            self.bytes_written += len(data)
+        self.responses_recorded += len(items)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every response recorded so far is on disk"""
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "responses_recorded": self.responses_recorded,
+            "bytes_written": self.bytes_written,
+            "segment": self._segment_path,
+            "writer": self._writer.stats(),
+        }
+
+def segment_paths(path: str) -> List[str]:
+    """Log segments under a directory in time order; a file path is returned as is"""
+    if os.path.isfile(path):
+        return [path]
+    names = sorted(name for name in os.listdir(path)
+                   if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(path, name) for name in names]
+
+def read_responses(path: str) -> Iterator[Tuple[float, str, Any]]:
+    """
+    Iterate a recording in order
+
+    Args:
+        path: Recording directory or a single segment file
+
+    Yields:
+        (observed_at, source, payload) per recorded response; a segment cut short by
+        a crash ends at its last complete gzip member
+    """
+    for segment in segment_paths(path):
+        with gzip.open(segment, "rb") as f:
+            try:
+                for line in f:
+                    record = fast_json.loads(line)
+                    yield record["t"], record["source"], record["payload"]
+            except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+                logger.warning(f"Recording segment {segment} is truncated: {e}")
@@ -0,0 +1,146 @@
+import hashlib
+import math
+import sys
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+MINT = "mint"
+PAIR = "pair"
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Fixed-size Bloom filter over strings
+
+        Args:
+            capacity: Expected number of items
+            error_rate: Target false-positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class SeenIndex:
+    def __init__(self, confirm: Optional[Callable[[str, str], bool]] = None, bloom_capacity: int = 0,
+                 bloom_error_rate: float = 0.001):
+        """
+        In-process index of known mint and pair addresses
+
+        By default exact sets are kept and the database is never consulted after the
+        warm load. With bloom_capacity set, only Bloom filters are kept in memory and
+        probable hits are confirmed through the confirm callback.
+
+        Args:
+            confirm: Callable (kind, address) -> bool checking the database; required for Bloom mode
+            bloom_capacity: Expected number of addresses per kind; 0 keeps exact sets
+            bloom_error_rate: Bloom filter false-positive rate at capacity
+        """
+        if bloom_capacity and confirm is None:
+            raise ValueError("Bloom mode needs a confirm callback for probable hits")
+        self.confirm = confirm
+        self.use_bloom = bool(bloom_capacity)
+        self._lock = threading.Lock()
+        if self.use_bloom:
+            self._known = {MINT: BloomFilter(bloom_capacity, bloom_error_rate), PAIR: BloomFilter(bloom_capacity, bloom_error_rate)}
+        else:
+            self._known = {MINT: set(), PAIR: set()}
+
+        self.hits = 0
+        self.misses = 0
+        self.db_lookups = 0
+        self.false_positives = 0
+
+    def add(self, kind: str, address: Optional[str]) -> None:
+        if address:
+            with self._lock:
+                self._known[kind].add(address)
+
+    def add_many(self, kind: str, addresses: Iterable[Optional[str]]) -> None:
+        with self._lock:
+            known = self._known[kind]
+            for address in addresses:
+                if address:
+                    known.add(address)
+
+    def contains(self, kind: str, address: str) -> bool:
+        """O(1) membership check; touches the database only on a Bloom-filter hit"""
+        if address not in self._known[kind]:
+            self.misses += 1
+            return False
+        if self.use_bloom:
+            self.db_lookups += 1
+            if not self.confirm(kind, address):
+                self.false_positives += 1
+                self.misses += 1
+                return False
+        self.hits += 1
+        return True
+
+    def partition(self, kind: str, addresses: Iterable[str]) -> Tuple[Set[str], List[str]]:
+        """
+        Split addresses by the in-memory index alone, never calling confirm
+
+        Returns:
+            (known, unconfirmed): unconfirmed holds Bloom-filter hits still to be checked
+            against the database (see confirmed()); it is always empty with exact sets
+        """
+        known, unconfirmed = set(), []
+        container = self._known[kind]
+        for address in addresses:
+            if address not in container:
+                self.misses += 1
+            elif self.use_bloom:
+                unconfirmed.append(address)
+            else:
+                self.hits += 1
+                known.add(address)
+        return known, unconfirmed
+
+    def confirmed(self, kind: str, checked: List[str], found: Set[str]) -> None:
+        """Record the database answer for unconfirmed addresses returned by partition()"""
+        self.db_lookups += len(checked)
+        self.hits += len(found)
+        self.false_positives += len(checked) - len(found)
+        self.misses += len(checked) - len(found)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the index"""
+        total = 0
+        for known in self._known.values():
+            if isinstance(known, BloomFilter):
+                total += sys.getsizeof(known.bits)
+            else:
+                total += sys.getsizeof(known) + sum(sys.getsizeof(address) for address in known)
+        return total
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "mode": "bloom" if self.use_bloom else "exact",
+            "mints": len(self._known[MINT]) if not self.use_bloom else self._known[MINT].count,
+            "pairs": len(self._known[PAIR]) if not self.use_bloom else self._known[PAIR].count,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "db_lookups": self.db_lookups,
+            "false_positives": self.false_positives,
+            "memory_bytes": self.memory_bytes(),
+        }
@@ -0,0 +1,264 @@
+import logging
+import multiprocessing
+import operator
+import queue
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from dex_filters import SNAPSHOT_FIELDS, FilterPipeline, FilterResult, FilterRule
+from indicators import IndicatorEngine
+from pair_snapshot import PairSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Snapshots cross the process boundary as one float matrix with these columns, which
+# pickles far cheaper than the snapshot objects themselves
+PACKED_FIELDS = SNAPSHOT_FIELDS + ('pair_created_at_ms',)
+_PRICE_COLUMN = PACKED_FIELDS.index('price_usd')
+_pack_values = operator.attrgetter(*PACKED_FIELDS)
+
+def _pack(snapshots: Sequence[PairSnapshot]):
+    keys = [snapshot.pair_address for snapshot in snapshots]
+    # None becomes NaN under a float dtype
+    values = np.array([_pack_values(snapshot) for snapshot in snapshots], dtype=np.float64).reshape(len(keys), len(PACKED_FIELDS))
+    return keys, values
+
+def shard_of(pair_address: str, shards: int) -> int:
+    """Stable shard of a pair; Python's hash() is salted per process, so it cannot be used here"""
+    return zlib.crc32(pair_address.encode()) % shards
+
+class AnalysisResult:
+    """Indicator rows and filter flags of one batch, merged from every shard"""
+    __slots__ = ('indicator_rows', 'filter_result')
+
+    def __init__(self, indicator_rows: List[Dict[str, Any]], filter_result: FilterResult):
+        self.indicator_rows = indicator_rows
+        self.filter_result = filter_result
+
+def _worker_main(shard: int, inbox, outbox, indicator_params: Dict[str, Any],
+                 rules: List[FilterRule], rules_path: Optional[str]) -> None:
+    """Worker process: owns the indicator state of its shard and answers batches in order"""
+    engine = IndicatorEngine(**indicator_params)
+    filters = FilterPipeline(rules, path=rules_path, fallback_rules=rules)
+    while True:
+        message = inbox.get()
+        kind = message[0]
+        if kind == "stop":
+            break
+        try:
+            if kind == "seed":
+                restored = sum(engine.seed(row['pair_address'], row) for row in message[1])
+                outbox.put(("seeded", shard, restored))
+            elif kind == "batch":
+                _, batch_id, keys, values, now = message
+                prices = values[:, _PRICE_COLUMN]
+                priced = np.isfinite(prices)
+                priced_keys = [key for key, has_price in zip(keys, priced.tolist()) if has_price]
+                if priced_keys:
+                    engine.update(priced_keys, prices[priced])
+                rows = engine.rows(dict.fromkeys(priced_keys))
+                columns = {name: values[:, i] for i, name in enumerate(PACKED_FIELDS)}
+                result = filters.evaluate_columns(keys, columns, now)
+                outbox.put(("result", batch_id, shard, rows, result.pair_addresses, result.passed, result.rejections))
+        except Exception as e:
+            outbox.put(("error", message[1] if kind == "batch" else None, shard, repr(e)))
+
+class ShardedAnalyzer:
+    def __init__(self, workers: int, indicator_params: Optional[Dict[str, Any]] = None,
+                 rules: Optional[List[FilterRule]] = None, rules_path: Optional[str] = None,
+                 start_method: str = "spawn", timeout: float = 30.0):
+        """
+        Indicator and filter analysis spread over worker processes by pair_address
+
+        Each pair is hashed to one of `workers` processes, which keeps that pair's
+        indicator state in memory for the life of the analyzer, so the per-tick work
+        runs outside the ingest process's GIL. analyze() sends each worker its share
+        of a batch and merges the answers, which the caller writes through its single
+        database writer. A shard that dies or stops answering loses its state;
+        restart() replaces every process, after which the caller seeds them again.
+
+        Args:
+            workers: Number of worker processes (shards)
+            indicator_params: IndicatorEngine keyword arguments
+            rules: Filter rules evaluated by every worker
+            rules_path: Rules file each worker hot-reloads (see FilterPipeline)
+            start_method: multiprocessing start method; spawn avoids forking a threaded process
+            timeout: Seconds to wait for a shard's answer
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.indicator_params = dict(indicator_params or {})
+        self.rules = list(rules or [])
+        self.rules_path = rules_path
+        self.timeout = timeout
+
+        self._context = multiprocessing.get_context(start_method)
+        self._inboxes = []
+        self._processes = []
+        self._outbox = None
+        self._batch_ids = 0
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.snapshots = 0
+        self.passed = 0
+        self.rejections: Dict[str, int] = {}
+        self.shard_snapshots = [0] * workers
+        self.analyze_latency_total = 0.0
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, config) -> "ShardedAnalyzer":
+        pipeline = FilterPipeline.from_config(config)
+        return cls(
+            config.analysis_workers,
+            indicator_params={
+                "ema_short_period": config.ema_short_period,
+                "ema_long_period": config.ema_long_period,
+                "rsi_period": config.rsi_period,
+                "band_period": config.volatility_band_period,
+                "band_width": config.volatility_band_width,
+            },
+            rules=pipeline.fallback_rules,
+            rules_path=pipeline.path
+        )
+
+    def start(self) -> None:
+        if self._processes:
+            return
+        self._outbox = self._context.Queue()
+        for shard in range(self.workers):
+            inbox = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main, name=f"analysis-shard-{shard}", daemon=True,
+                args=(shard, inbox, self._outbox, self.indicator_params, self.rules, self.rules_path)
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+        logger.info(f"Started {self.workers} analysis shard(s)")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop every shard, terminating those that do not exit within timeout (default self.timeout)"""
+        for inbox in self._inboxes:
+            inbox.put(("stop",))
+        for process in self._processes:
+            process.join(self.timeout if timeout is None else timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._inboxes, self._processes = [], []
+
+    def alive(self) -> bool:
+        """True when every shard process is running"""
+        return bool(self._processes) and all(process.is_alive() for process in self._processes)
+
+    def restart(self) -> None:
+        """
+        Replace every shard process and the shared result queue
+
+        Killing a single shard can leave the queue it shares with the others
+        corrupted, so all of them are replaced. Indicator state starts empty.
+        """
+        with self._lock:
+            self.stop(timeout=1.0)
+            self.start()
+            self.restarts += 1
+
+    def __enter__(self) -> "ShardedAnalyzer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _receive(self, expected: str, batch_id: Optional[int], count: int) -> List[tuple]:
+        answers = []
+        deadline = time.monotonic() + self.timeout
+        while len(answers) < count:
+            try:
+                message = self._outbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                raise TimeoutError(f"{count - len(answers)} analysis shard(s) did not answer within {self.timeout}s")
+            if message[0] == "error":
+                raise RuntimeError(f"Analysis shard {message[2]} failed: {message[3]}")
+            if message[0] == expected and (batch_id is None or message[1] == batch_id):
+                answers.append(message)
+        return answers
+
+    def seed(self, rows: Sequence[Dict[str, Any]]) -> int:
+        """
+        Restore indicator state (rows as produced by IndicatorEngine.rows) on the owning shards
+
+        Returns:
+            Number of slots restored
+        """
+        parts = [[] for _ in range(self.workers)]
+        for row in rows:
+            parts[shard_of(row['pair_address'], self.workers)].append(row)
+        with self._lock:
+            for inbox, part in zip(self._inboxes, parts):
+                inbox.put(("seed", part))
+            return sum(answer[2] for answer in self._receive("seeded", None, self.workers))
+
+    def analyze(self, snapshots: Sequence[PairSnapshot], now: Optional[float] = None) -> AnalysisResult:
+        """
+        Advance indicators and evaluate filters for one batch on the owning shards
+
+        Args:
+            snapshots: Batch to analyse
+            now: Epoch seconds the batch was observed, for age rules (default: current time)
+
+        Returns:
+            AnalysisResult with indicator rows ready for store_indicators and a
+            FilterResult ready for store_filter_results
+        """
+        start = time.monotonic()
+        if now is None:
+            now = time.time()
+        parts = [[] for _ in range(self.workers)]
+        for snapshot in snapshots:
+            parts[shard_of(snapshot.pair_address, self.workers)].append(snapshot)
+        with self._lock:
+            self._batch_ids += 1
+            batch_id = self._batch_ids
+            busy = [shard for shard, part in enumerate(parts) if part]
+            for shard in busy:
+                self._inboxes[shard].put(("batch", batch_id, *_pack(parts[shard]), now))
+            answers = self._receive("result", batch_id, len(busy))
+
+        rows, addresses, passed, rejections = [], [], [], {}
+        for _, _, shard, shard_rows, shard_addresses, shard_passed, shard_rejections in sorted(answers, key=lambda a: a[2]):
+            rows.extend(shard_rows)
+            addresses.extend(shard_addresses)
+            passed.append(shard_passed)
+            self.shard_snapshots[shard] += len(shard_addresses)
+            for name, count in shard_rejections.items():
+                rejections[name] = rejections.get(name, 0) + count
+        result = FilterResult(addresses, np.concatenate(passed) if passed else np.zeros(0, dtype=bool), rejections)
+
+        self.batches += 1
+        self.snapshots += len(snapshots)
+        self.passed += result.passed_count
+        for name, count in rejections.items():
+            self.rejections[name] = self.rejections.get(name, 0) + count
+        self.analyze_latency_total += time.monotonic() - start
+        return AnalysisResult(rows, result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "alive": sum(process.is_alive() for process in self._processes),
+            "restarts": self.restarts,
+            "batches": self.batches,
+            "snapshots": self.snapshots,
+            "passed": self.passed,
+            "rejections": dict(self.rejections),
+            "shard_snapshots": list(self.shard_snapshots),
+            "mean_batch_seconds": self.analyze_latency_total / self.batches if self.batches else None,
+        }
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import time
+import unittest
+
+from correlation import GraduationTracker, link_graduations
+from database import Database, Token, dispose_engines
+
+NOW = 1_700_000_000.0
+
+
+class FakeTokenLookup:
+    """Returns pairs for the mints in `listed`: {mint: [(pair_address, liquidity), ...]}"""
+
+    def __init__(self, listed=None):
+        self.calls = []
+        self.listed = listed or {}
+
+    def __call__(self, mints):
+        self.calls.append(list(mints))
+        pairs = []
+        for mint in mints:
+            for pair_address, liquidity in self.listed.get(mint, []):
+                pairs.append({
+                    "pairAddress": pair_address,
+                    "chainId": "solana",
+                    "dexId": "raydium",
+                    "baseToken": {"address": mint, "symbol": "TST"},
+                    "priceUsd": "0.01",
+                    "liquidity": {"usd": liquidity},
+                    "pairCreatedAt": int((NOW - 30) * 1000),
+                })
+        return pairs
+
+
+class TestGraduationTracker(unittest.TestCase):
+
+    def make_tracker(self, lookup, **kwargs):
+        return GraduationTracker(lookup, initial_delay=5, max_delay=40, give_up_after=3600, **kwargs)
+
+    def test_due_mints_are_looked_up_in_one_batch(self):
+        lookup = FakeTokenLookup({"mint1": [("pair1", 5000)]})
+        tracker = self.make_tracker(lookup)
+        tracker.track("mint1", launched_at=NOW - 100, now=NOW)
+        tracker.track("mint2", launched_at=NOW - 100, now=NOW)
+        tracker.track("later", launched_at=NOW, now=NOW + 60)
+
+        self.assertEqual(tracker.check_due(now=NOW + 1), [])
+        graduations = tracker.check_due(now=NOW + 5)
+
+        self.assertEqual(lookup.calls, [["mint1", "mint2"]])
+        self.assertEqual([g.mint for g in graduations], ["mint1"])
+        self.assertEqual(graduations[0].snapshot.pair_address, "pair1")
+        # Launch at NOW - 100, pair created at NOW - 30
+        self.assertAlmostEqual(graduations[0].latency, 70.0)
+        self.assertEqual(len(tracker), 2)
+
+    def test_most_liquid_pair_wins(self):
+        lookup = FakeTokenLookup({"mint1": [("thin", 100), ("deep", 90000)]})
+        tracker = self.make_tracker(lookup)
+        tracker.track("mint1", now=NOW)
+
+        graduations = tracker.check_due(now=NOW + 5)
+
+        self.assertEqual(graduations[0].snapshot.pair_address, "deep")
+
+    def test_unlisted_mints_back_off_and_expire(self):
+        lookup = FakeTokenLookup()
+        tracker = self.make_tracker(lookup)
+        tracker.track("mint1", launched_at=NOW, now=NOW)
+
+        checks = []
+        for t in range(3700):
+            calls = len(lookup.calls)
+            tracker.check_due(now=NOW + t)
+            if len(lookup.calls) > calls:
+                checks.append(t)
+
+        # 5s, then +5, +10, +20, +40, +40, ...
+        self.assertEqual(checks[:5], [5, 10, 20, 40, 80])
+        self.assertEqual(tracker.stats()["expired"], 1)
+        self.assertEqual(len(tracker), 0)
+
+    def test_tracking_twice_keeps_first_schedule(self):
+        tracker = self.make_tracker(FakeTokenLookup())
+        tracker.track("mint1", now=NOW)
+        tracker.track("mint1", now=NOW + 100)
+
+        tracker.check_due(now=NOW + 5)
+
+        self.assertEqual(tracker.stats()["lookups"], 1)
+
+    def test_failed_lookup_keeps_mints_scheduled(self):
+        lookup = FakeTokenLookup({"mint1": [("pair1", 5000)]})
+
+        def failing(mints):
+            raise ConnectionError("timed out")
+
+        tracker = self.make_tracker(failing)
+        tracker.track("mint1", now=NOW)
+
+        self.assertEqual(tracker.check_due(now=NOW + 5), [])
+        self.assertEqual(tracker.stats()["errors"], 1)
+        self.assertEqual(len(tracker), 1)
+
+        tracker.fetch_pairs = lookup
+        self.assertEqual(tracker.check_due(now=NOW + 9), [])
+        graduations = tracker.check_due(now=NOW + 10)
+        self.assertEqual([g.mint for g in graduations], ["mint1"])
+
+
+class TestLinkGraduations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def graduate(self, listed, launched_at=NOW - 100):
+        tracker = GraduationTracker(FakeTokenLookup(listed), initial_delay=0)
+        for mint in listed:
+            tracker.track(mint, launched_at=launched_at, now=NOW)
+        return tracker.check_due(now=NOW)
+
+    def test_pumpfun_row_gains_its_pair(self):
+        self.db.store_token({"mint": "mint1", "name": "Test", "symbol": "TST"})
+        self.db.flush()
+
+        with self.db.session_scope() as session:
+            self.assertEqual(link_graduations(session, self.graduate({"mint1": [("pair1", 5000)]})), 1)
+
+        with self.db.session_scope() as session:
+            token = session.query(Token).one()
+            self.assertEqual(token.pumpfun_mint_address, "mint1")
+            self.assertEqual(token.pair_address, "pair1")
+            self.assertEqual(token.liquidity_usd, 5000)
+            self.assertEqual(token.base_token_name, "Test")
+            self.assertAlmostEqual(token.graduation_latency_seconds, 70.0)
+            self.assertIsNotNone(token.graduated_at)
+
+    def test_separate_dex_row_is_merged_into_pumpfun_row(self):
+        self.db.store_token({"mint": "mint1", "name": "Test", "symbol": "TST"})
+        self.db.flush()
+        with self.db.session_scope() as session:
+            session.add(Token(pair_address="pair1", base_token_address="mint1", continuously_monitor=True))
+
+        with self.db.session_scope() as session:
+            link_graduations(session, self.graduate({"mint1": [("pair1", 5000)]}))
+
+        with self.db.session_scope() as session:
+            token = session.query(Token).one()
+            self.assertEqual(token.pumpfun_mint_address, "mint1")
+            self.assertEqual(token.pair_address, "pair1")
+            self.assertTrue(token.continuously_monitor)
+            self.assertTrue(token.is_pumpfun_launch)
+
+    def test_load_pending_resumes_unpaired_launches(self):
+        self.db.store_token({"mint": "waiting"})
+        self.db.store_token({"mint": "paired"})
+        self.db.flush()
+        with self.db.session_scope() as session:
+            session.query(Token).filter_by(pumpfun_mint_address="paired").update({"pair_address": "pair1"})
+
+        tracker = GraduationTracker(FakeTokenLookup(), initial_delay=5)
+        with self.db.session_scope() as session:
+            self.assertEqual(tracker.load_pending(session), 1)
+        tracker.check_due(now=time.time())
+        self.assertEqual(tracker.stats()["lookups"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
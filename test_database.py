@@ -0,0 +1,116 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlalchemy import text
+
+from database import Database, Token, get_engine, dispose_engines
+from metrics import DISCOVERY_TO_STORE_SECONDS
+
+
+class TestDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.db")
+        self.db = Database(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_engine_is_shared_per_url(self):
+        self.assertIs(Database(self.path).engine, self.db.engine)
+        self.assertIs(get_engine(f"sqlite:///{self.path}"), self.db.engine)
+
+    def test_sqlite_pragmas_applied(self):
+        with self.db.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            # 1 == NORMAL
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1)
+
+    def test_session_scope_commits_and_rolls_back(self):
+        with self.db.session_scope() as session:
+            session.add(Token(pumpfun_mint_address="mint1", base_token_name="One"))
+
+        with self.assertRaises(RuntimeError):
+            with self.db.session_scope() as session:
+                session.add(Token(pumpfun_mint_address="mint2", base_token_name="Two"))
+                session.flush()
+                raise RuntimeError("abort unit of work")
+
+        with self.db.session_scope() as session:
+            self.assertEqual([t.pumpfun_mint_address for t in session.query(Token)], ["mint1"])
+
+    def test_concurrent_writers(self):
+        errors = []
+
+        def writer(worker):
+            try:
+                for i in range(20):
+                    with self.db.session_scope() as session:
+                        session.add(Token(pumpfun_mint_address=f"w{worker}-{i}"))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.db.session.query(Token).count(), 80)
+
+    def test_store_token_is_written_behind(self):
+        payload = {"mint": "pump1", "name": "Pump", "symbol": "PMP", "usd_market_cap": "4200.5"}
+        self.assertTrue(self.db.store_token(payload))
+        self.assertTrue(self.db.store_token(dict(payload, usd_market_cap=5000)))
+        self.assertFalse(self.db.store_token({"name": "no mint"}))
+        self.assertTrue(self.db.flush(timeout=5))
+
+        with self.db.session_scope() as session:
+            token = session.query(Token).filter_by(pumpfun_mint_address="pump1").one()
+            self.assertTrue(token.is_pumpfun_launch)
+            self.assertEqual(token.base_token_address, "pump1")
+            self.assertEqual(token.market_cap_usd, 5000.0)
+            self.assertEqual(token.pumpfun_metadata["symbol"], "PMP")
+        self.assertTrue(self.db.token_exists("pump1"))
+        self.assertEqual(self.db.write_stats()["queue_depth"], 0)
+
+    def test_store_lag_is_measured_at_commit(self):
+        histogram = DISCOVERY_TO_STORE_SECONDS.labels()
+        before = histogram.snapshot()[1]
+        discovered_at = time.time() - 2.0
+        self.db.store_token({"mint": "pump1"}, discovered_at=discovered_at)
+        self.db.store_token({"mint": "pump2"})
+        self.assertTrue(self.db.flush(timeout=5))
+
+        self.assertEqual(self.db.tokens_stored, 2)
+        self.assertEqual(self.db.store_latency.count, 1)
+        self.assertGreaterEqual(self.db.store_latency.samples[0], 2.0)
+        self.assertEqual(histogram.snapshot()[1] - before, 1)
+
+    def test_close_persists_queued_tokens(self):
+        for i in range(25):
+            self.db.store_token({"mint": f"pending{i}"})
+        self.db.close()
+
+        reopened = Database(self.path)
+        with reopened.session_scope() as session:
+            self.assertEqual(session.query(Token).filter(Token.pumpfun_mint_address.like("pending%")).count(), 25)
+        reopened.close()
+
+    def test_attribute_session_is_thread_local(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(self.db.session()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], self.db.session())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+
+from config import Config
+from database import Database, Token, dispose_engines
+from dex_filters import FilterPipeline, FilterRule, parse_rules, store_filter_results
+from pair_snapshot import PairSnapshot
+
+NOW = 1_700_000_000.0
+
+
+def snapshot(address, liquidity=5000, market_cap=50000, volume_h24=10000, age_hours=2.0, holders=None, change_h1=5):
+    pair = {
+        "pairAddress": address,
+        "baseToken": {"address": f"mint-{address}"},
+        "liquidity": {"usd": liquidity},
+        "marketCap": market_cap,
+        "volume": {"h24": volume_h24},
+        "priceChange": {"h1": change_h1},
+        "pairCreatedAt": int((NOW - age_hours * 3600) * 1000),
+        "holders": holders,
+    }
+    return PairSnapshot.from_pair(pair)
+
+
+class TestFilterPipeline(unittest.TestCase):
+
+    def test_batch_masks_and_rejection_counts(self):
+        pipeline = FilterPipeline(parse_rules({"rules": [
+            {"name": "min_liquidity", "field": "liquidity_usd", "min": 1000},
+            {"name": "max_market_cap", "field": "market_cap_usd", "max": 100000},
+            {"name": "max_age", "field": "age_seconds", "max": 6 * 3600},
+            {"name": "turnover", "field": "volume_liquidity_ratio", "min": 0.5},
+            {"name": "h1_change", "field": "price_change_h1", "min": -50, "max": 500},
+            {"name": "holders", "field": "holders", "min": 100, "missing": "pass"},
+        ]}))
+        batch = [
+            snapshot("ok"),
+            snapshot("thin", liquidity=500, volume_h24=10000),
+            snapshot("big", market_cap=10_000_000),
+            snapshot("old", age_hours=48),
+            snapshot("dead", volume_h24=100),
+            snapshot("dumping", change_h1=-80),
+            snapshot("few_holders", holders=10),
+            snapshot("thin_and_old", liquidity=500, age_hours=48),
+        ]
+
+        result = pipeline.evaluate(batch, now=NOW)
+
+        self.assertEqual([a for a, p in zip(result.pair_addresses, result.passed) if p], ["ok"])
+        self.assertEqual(result.rejections, {
+            "min_liquidity": 2, "max_market_cap": 1, "max_age": 2,
+            "turnover": 1, "h1_change": 1, "holders": 1,
+        })
+        self.assertEqual(pipeline.stats()["passed"], 1)
+
+    def test_missing_values_reject_by_default(self):
+        pipeline = FilterPipeline([FilterRule("min_liquidity", "liquidity_usd", min=1000)])
+        result = pipeline.evaluate([snapshot("a", liquidity=None)], now=NOW)
+        self.assertFalse(result.passed[0])
+
+    def test_invalid_rules_are_refused(self):
+        with self.assertRaises(ValueError):
+            FilterRule("bad", "no_such_field", min=1)
+        with self.assertRaises(ValueError):
+            FilterRule("unbounded", "liquidity_usd")
+        with self.assertRaises(ValueError):
+            parse_rules({"rules": [{"name": "x", "field": "fdv", "min": 1}, {"name": "x", "field": "fdv", "max": 2}]})
+
+    def test_rules_file_is_hot_reloaded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "rules.json")
+            pipeline = FilterPipeline.from_config(Config(min_liquidity=1000, dex_filters_path=path))
+            batch = [snapshot("a", liquidity=2000)]
+            self.assertTrue(pipeline.evaluate(batch, now=NOW).passed[0])
+
+            with open(path, "w") as f:
+                json.dump({"rules": [{"name": "min_liquidity", "field": "liquidity_usd", "min": 3000}]}, f)
+            self.assertFalse(pipeline.evaluate(batch, now=NOW).passed[0])
+
+            # A broken edit keeps the last good rules
+            with open(path, "w") as f:
+                f.write("{broken")
+            os.utime(path, (NOW, NOW))
+            self.assertFalse(pipeline.evaluate(batch, now=NOW).passed[0])
+
+            os.remove(path)
+            self.assertTrue(pipeline.evaluate(batch, now=NOW).passed[0])
+
+
+class TestStoreFilterResults(unittest.TestCase):
+
+    def test_writes_passed_flags_in_bulk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "test.db"))
+            with db.session_scope() as session:
+                session.add_all([Token(pair_address="a"), Token(pair_address="b")])
+
+            pipeline = FilterPipeline([FilterRule("min_liquidity", "liquidity_usd", min=1000)])
+            result = pipeline.evaluate([snapshot("a"), snapshot("b", liquidity=10)], now=NOW)
+            with db.session_scope() as session:
+                self.assertEqual(store_filter_results(session, result), 2)
+            with db.session_scope() as session:
+                flags = dict(session.query(Token.pair_address, Token.passed_dex_filters).all())
+            self.assertEqual(flags, {"a": True, "b": False})
+            db.close()
+            dispose_engines()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, Mock
+
+import dexscreener_fetcher
+from database import Database, Token, dispose_engines
+from dexscreener_fetcher import (
+    fetch_pairs_by_address, fetch_pairs_for_tokens, fetch_token_pairs, fetch_trending_pairs, store_tokens_from_dexscreener, TOKENS_BATCH_SIZE
+)
+
+
+def pairs_response(url, **kwargs):
+    """Fake DexScreener: one pair per requested token address"""
+    response = Mock()
+    response.status_code = 200
+    response.headers = {}
+    response.raise_for_status = Mock()
+    if url == dexscreener_fetcher.DEXSCREENER_PROFILES_URL:
+        profiles = [{"chainId": "solana", "tokenAddress": f"token{i}"} for i in range(45)]
+        profiles += [{"chainId": "base", "tokenAddress": f"base{i}"} for i in range(5)]
+        response.json.return_value = profiles
+    else:
+        addresses = url.rsplit("/", 1)[1].split(",")
+        response.json.return_value = {
+            "pairs": [{"chainId": "solana", "pairAddress": f"pair-{a}", "baseToken": {"address": a}}
+                      for a in addresses]
+        }
+    response.content = json.dumps(response.json.return_value).encode()
+    return response
+
+
+class TestDexscreenerFetcher(unittest.TestCase):
+
+    def setUp(self):
+        dexscreener_fetcher.response_cache.clear()
+
+    def tearDown(self):
+        dexscreener_fetcher.close_session()
+        dexscreener_fetcher.response_cache.clear()
+
+    @patch('requests.Session.get', side_effect=pairs_response)
+    def test_trending_refresh_uses_batched_requests(self, mock_get):
+        pairs = fetch_trending_pairs("solana", limit=50, max_concurrency=4)
+
+        self.assertEqual(len(pairs), 45)
+        # One profiles call plus two /tokens/ batches instead of 45 single lookups
+        self.assertEqual(mock_get.call_count, 3)
+        batch_urls = [call[0][0] for call in mock_get.call_args_list[1:]]
+        self.assertEqual(sorted(len(url.rsplit("/", 1)[1].split(",")) for url in batch_urls), [15, TOKENS_BATCH_SIZE])
+
+    @patch('requests.Session.get', side_effect=pairs_response)
+    def test_duplicate_addresses_fetched_once(self, mock_get):
+        pairs = fetch_pairs_for_tokens(["a", "b", "a", "", "b"], "solana")
+        self.assertEqual([pair["pairAddress"] for pair in pairs], ["pair-a", "pair-b"])
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_session_is_shared(self):
+        self.assertIs(dexscreener_fetcher.get_session(), dexscreener_fetcher.get_session())
+
+    @patch('requests.Session.get', side_effect=pairs_response)
+    def test_batch_seeds_single_token_lookups(self, mock_get):
+        fetch_pairs_for_tokens(["a", "b"], "solana")
+        self.assertEqual([pair["pairAddress"] for pair in fetch_token_pairs("b")], ["pair-b"])
+        # Repeating the batch is served from the per-address entries as well
+        self.assertEqual(len(fetch_pairs_for_tokens(["a", "b"], "solana")), 2)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get', side_effect=pairs_response)
+    def test_pair_refresh_uses_pairs_endpoint_batches(self, mock_get):
+        pairs = fetch_pairs_by_address([f"p{i}" for i in range(31)], "solana")
+        self.assertEqual(len(pairs), 31)
+        urls = sorted(call[0][0] for call in mock_get.call_args_list)
+        self.assertTrue(all("/pairs/solana/" in url for url in urls))
+        self.assertEqual(len(urls), 2)
+
+    @patch('requests.Session.get', side_effect=pairs_response)
+    def test_uncached_batches_do_not_seed_the_cache(self, mock_get):
+        fetch_pairs_for_tokens(["a", "b"], "solana", use_cache=False)
+        self.assertIsNone(dexscreener_fetcher.response_cache.peek(dexscreener_fetcher._token_pairs_url("a")))
+        fetch_pairs_for_tokens(["a"], "solana")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('requests.Session.get')
+    def test_failed_batch_returns_empty(self, mock_get):
+        mock_get.side_effect = dexscreener_fetcher.requests.ConnectionError("boom")
+        self.assertEqual(fetch_pairs_for_tokens(["a"], "solana"), [])
+
+
+def make_pair(index, price="1.5"):
+    return {
+        "chainId": "solana",
+        "dexId": "raydium",
+        "pairAddress": f"pair{index}",
+        "baseToken": {"address": f"mint{index}", "name": f"Token {index}", "symbol": f"TK{index}"},
+        "quoteToken": {"symbol": "SOL"},
+        "priceUsd": price,
+        "volume": {"h24": 1000, "h1": 10},
+        "liquidity": {"usd": 5000},
+        "pairCreatedAt": 1700000000000,
+    }
+
+
+class TestStoreTokensFromDexscreener(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_bulk_upsert_counts_match_orm_path(self):
+        store_tokens_from_dexscreener(self.db.session, [make_pair(0), make_pair(1)])
+        pairs = [make_pair(1, price="2.5"), make_pair(2), make_pair(2), {"pairAddress": None}]
+
+        self.assertEqual(store_tokens_from_dexscreener(self.db.session, pairs, bulk=True), (1, 1))
+        self.db.session.expire_all()
+        self.assertEqual(self.db.session.query(Token).count(), 3)
+        updated = self.db.session.query(Token).filter_by(pair_address="pair1").one()
+        self.assertEqual(updated.liquidity_usd, 5000.0)
+        self.assertEqual(updated.base_token_address, "mint1")
+        self.assertEqual(float(updated.price_usd), 2.5)
+
+    def test_bulk_upsert_is_idempotent(self):
+        pairs = [make_pair(i) for i in range(5)]
+        self.assertEqual(store_tokens_from_dexscreener(self.db.session, pairs, bulk=True), (5, 0))
+        self.assertEqual(store_tokens_from_dexscreener(self.db.session, pairs, bulk=True), (0, 5))
+        self.assertEqual(self.db.session.query(Token).count(), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import random
+import tempfile
+import unittest
+
+from database import Database, Token, dispose_engines
+from indicators import IndicatorEngine, load_indicator_state, recompute, store_indicators
+
+
+def random_walks(tokens, ticks, seed=0):
+    rng = random.Random(seed)
+    walks = {}
+    for i in range(tokens):
+        price = rng.uniform(0.001, 10)
+        history = []
+        for _ in range(ticks):
+            price *= 1 + rng.uniform(-0.05, 0.05)
+            history.append(price)
+        walks[f"pair{i}"] = history
+    return walks
+
+
+class TestIndicatorEngine(unittest.TestCase):
+
+    def assertRowMatches(self, row, expected):
+        for column in ('last_ema_short', 'ema_short_slope', 'last_ema_long', 'ema_long_slope', 'rsi_value'):
+            if expected[column] is None:
+                self.assertIsNone(row[column], column)
+            else:
+                self.assertAlmostEqual(row[column], expected[column], places=9, msg=column)
+        for band in ('middle', 'upper', 'lower', 'stddev'):
+            self.assertAlmostEqual(row['volatility_bands_data'][band], expected['volatility_bands_data'][band], places=9)
+
+    def test_incremental_matches_full_recompute(self):
+        walks = random_walks(50, 40)
+        engine = IndicatorEngine(initial_capacity=8)
+        for tick in range(40):
+            keys = list(walks)
+            engine.update(keys, [walks[key][tick] for key in keys])
+
+        for row in engine.rows(walks):
+            self.assertRowMatches(row, recompute(walks[row['pair_address']]))
+        self.assertEqual(engine.ticks, 50 * 40)
+
+    def test_repeated_keys_in_one_batch_apply_in_order(self):
+        walks = random_walks(3, 20, seed=1)
+        keys, prices = [], []
+        for tick in range(20):
+            for key, history in walks.items():
+                keys.append(key)
+                prices.append(history[tick])
+
+        engine = IndicatorEngine()
+        engine.update(keys, prices)
+        for row in engine.rows(walks):
+            self.assertRowMatches(row, recompute(walks[row['pair_address']]))
+
+    def test_rsi_warmup_and_extremes(self):
+        engine = IndicatorEngine(rsi_period=3)
+        engine.update(["up"] * 3, [1.0, 2.0, 3.0])
+        self.assertIsNone(engine.rows(["up"])[0]['rsi_value'])
+        engine.update(["up"], [4.0])
+        self.assertEqual(engine.rows(["up"])[0]['rsi_value'], 100.0)
+
+    def test_invalid_prices_are_ignored(self):
+        engine = IndicatorEngine()
+        engine.update(["a", "b", "a"], [1.0, float("nan"), -2.0])
+        self.assertEqual([row['pair_address'] for row in engine.rows(["a", "b"])], ["a"])
+        self.assertEqual(engine.ticks, 1)
+
+    def test_seeded_engine_resumes_without_history(self):
+        history = random_walks(1, 30, seed=2)["pair0"]
+        first = IndicatorEngine()
+        first.update(["pair0"] * 15, history[:15])
+
+        resumed = IndicatorEngine()
+        self.assertTrue(resumed.seed("pair0", first.rows(["pair0"])[0]))
+        resumed.update(["pair0"] * 15, history[15:])
+        self.assertRowMatches(resumed.rows(["pair0"])[0], recompute(history))
+
+
+class TestIndicatorPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_store_and_reload_state(self):
+        with self.db.session_scope() as session:
+            session.add_all([Token(pair_address="pair0"), Token(pair_address="pair1")])
+
+        engine = IndicatorEngine()
+        engine.update(["pair0", "pair1", "pair0"], [1.0, 2.0, 1.1])
+        with self.db.session_scope() as session:
+            self.assertEqual(store_indicators(session, engine.rows(["pair0", "pair1"])), 2)
+
+        with self.db.session_scope() as session:
+            token = session.query(Token).filter_by(pair_address="pair0").one()
+            self.assertAlmostEqual(token.last_ema_short, engine.rows(["pair0"])[0]['last_ema_short'])
+            self.assertIsNotNone(token.last_trend_analysis_at)
+
+            restored = IndicatorEngine()
+            self.assertEqual(load_indicator_state(session, restored), 2)
+        self.assertEqual(restored.rows(["pair0"])[0]['volatility_bands_data'],
+                         engine.rows(["pair0"])[0]['volatility_bands_data'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import select
+
+from config import Config
+from database import Database, Token, TradeOrder, dispose_engines
+from ingestion_engine import IngestionEngine, payload_created_at
+from metrics import LatencyTracker
+from pair_snapshot import PairSnapshot
+from pumpfun_fetcher import PumpFunFetcher
+from pumpfun_stream import PumpFunStreamFetcher
+from trade_execution import SimulatedBroker
+
+
+class StubPumpFunHandler(BaseHTTPRequestHandler):
+    """Serves a fresh token on every call to /get_latest_token"""
+    counter = 0
+
+    def do_GET(self):
+        if self.path != "/get_latest_token":
+            self.send_response(404)
+            self.end_headers()
+            return
+        StubPumpFunHandler.counter += 1
+        body = json.dumps({
+            "mint": f"mint{StubPumpFunHandler.counter}",
+            "name": "Stub Token",
+            "symbol": "STUB",
+            "created_timestamp": int(time.time() * 1000),
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RecordingDatabase:
+    engine = None
+
+    def __init__(self, known_mints=()):
+        self.tokens = []
+        self.stored_mints = set(known_mints)
+        self.tokens_stored = 0
+        self.store_latency = LatencyTracker()
+
+    def warm_seen_index(self):
+        pass
+
+    def token_exists(self, mint):
+        return mint in self.stored_mints
+
+    def known_mints(self, mints):
+        return set(mints) & self.stored_mints, []
+
+    def store_token(self, token, discovered_at=None):
+        self.tokens.append(token)
+        self.tokens_stored += 1
+
+    def pumpfun_payload(self, mint):
+        return None
+
+    def recent_pumpfun_payloads(self, limit):
+        return []
+
+
+class FailingAnalyzer:
+    """Sharded analyzer stand-in whose shards never answer"""
+    workers = 1
+
+    def __init__(self):
+        self.analyzed_at = []
+        self.restarts = 0
+        self.seeded = []
+
+    def alive(self):
+        return True
+
+    def analyze(self, snapshots, now=None):
+        self.analyzed_at.append(now)
+        raise TimeoutError("1 analysis shard(s) did not answer within 30s")
+
+    def restart(self):
+        self.restarts += 1
+
+    def seed(self, rows):
+        self.seeded = [row['pair_address'] for row in rows]
+        return len(rows)
+
+
+class TestIngestionEngine(unittest.TestCase):
+
+    def setUp(self):
+        StubPumpFunHandler.counter = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubPumpFunHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.fetcher = PumpFunFetcher(api_key="test", timeout=5, max_retries=1)
+        self.fetcher.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.config = Config(pumpfun_poll_interval=0.01, dexscreener_poll_interval=0, shutdown_timeout=2)
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _run_for(self, engine, seconds):
+        async def scenario():
+            runner = asyncio.create_task(engine.run(install_signal_handlers=False))
+            await asyncio.sleep(seconds)
+            engine.request_shutdown()
+            await asyncio.wait_for(runner, timeout=5)
+        asyncio.run(scenario())
+
+    def test_polls_and_persists_against_stub_server(self):
+        database = RecordingDatabase()
+        engine = IngestionEngine(self.config, database, self.fetcher)
+        self._run_for(engine, 0.3)
+
+        stats = engine.stats()
+        self.assertGreater(stats["tokens_discovered"], 1)
+        self.assertEqual(len(database.tokens), stats["tokens_discovered"])
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["discovery_latency"]["count"], stats["tokens_discovered"])
+        self.assertLess(stats["discovery_latency"]["max"], 1.0)
+
+    def test_duplicate_mints_are_skipped(self):
+        database = RecordingDatabase()
+        engine = IngestionEngine(self.config, database, self.fetcher)
+        self.assertTrue(engine._recent_mints.add("abc"))
+        self.assertFalse(engine._recent_mints.add("abc"))
+
+    def test_known_mints_are_not_stored_again(self):
+        database = RecordingDatabase(known_mints=["mint1", "mint2"])
+        engine = IngestionEngine(self.config, database, self.fetcher)
+        self._run_for(engine, 0.3)
+        stored = {token["mint"] for token in database.tokens}
+        self.assertTrue(stored)
+        self.assertFalse(stored & {"mint1", "mint2"})
+
+    def test_bloom_confirmations_run_off_the_event_loop(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Database(os.path.join(tmp, "test.db"), bloom_capacity=1000)
+            database.add_token({"pumpfun_mint_address": "mint1"})
+            threads = []
+            confirm_mints = database.confirm_mints
+
+            def record(mints):
+                threads.append(threading.current_thread().name)
+                return confirm_mints(mints)
+
+            database.confirm_mints = record
+            engine = IngestionEngine(self.config, database, self.fetcher)
+            self._run_for(engine, 0.3)
+            database.flush()
+            with database.session_scope() as session:
+                stored = session.execute(select(Token.pumpfun_mint_address)).scalars().all()
+            database.close()
+            dispose_engines()
+
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith("db-writer") for name in threads))
+        self.assertEqual(stored.count("mint1"), 1)
+        self.assertGreater(len(stored), 1)
+
+    def test_stream_fetcher_shares_the_fallback_token_cache(self):
+        # Nothing listens on the stream URL, so launches arrive through the polling fallback
+        stream = PumpFunStreamFetcher("ws://127.0.0.1:1", fallback=self.fetcher)
+        self.assertIs(stream.token_cache, self.fetcher.token_cache)
+        database = RecordingDatabase()
+        engine = IngestionEngine(self.config, database, stream)
+        try:
+            self._run_for(engine, 0.3)
+        finally:
+            stream.close()
+
+        self.assertTrue(database.tokens)
+        self.assertIsNotNone(stream.token_cache.get(database.tokens[0]["mint"]))
+        self.assertGreater(engine.stats()["pumpfun_token_cache"]["entries"], 0)
+
+    def test_new_orders_are_committed_before_the_broker_is_called(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(dispose_engines)
+        database = Database(os.path.join(tmp.name, "test.db"))
+        self.addCleanup(database.close)
+        with database.session_scope() as session:
+            session.add(Token(pair_address="p1", base_token_address="mint1", chain_id="solana"))
+        seen = []
+
+        def check(order):
+            with database.session_scope() as session:
+                row = session.get(TradeOrder, order.order_id)
+                token = session.execute(select(Token).where(Token.pair_address == "p1")).scalar_one()
+                seen.append((row.status if row is not None else None, token.gmgn_trade_status))
+
+        config = Config(dexscreener_poll_interval=0, analysis_workers=0, trading_enabled=True, max_in_flight_orders=1)
+        engine = IngestionEngine(config, database, self.fetcher, broker=SimulatedBroker(reject=check))
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        # As while running: order threads queue their updates, the writer thread decides buys
+        engine._loop, engine._queue = loop, asyncio.Queue()
+        snapshot = PairSnapshot("p1", "mint1", chain_id="solana", price_usd=1.0, price_native=0.01)
+        engine._db_executor.submit(engine.executor.buy, snapshot).result()
+        engine.executor.close()
+        engine._db_executor.shutdown()
+
+        self.assertEqual(seen, [("pending", "buying")])
+
+    def test_failed_shard_analysis_falls_back_in_process(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(dispose_engines)
+        database = Database(os.path.join(tmp.name, "test.db"))
+        self.addCleanup(database.close)
+        engine = IngestionEngine(Config(dexscreener_poll_interval=0, analysis_workers=0, dex_filters_path=""),
+                                 database, self.fetcher)
+        engine.analyzer = FailingAnalyzer()
+        pair = {"pairAddress": "p1", "chainId": "solana", "baseToken": {"address": "mint1"},
+                "priceUsd": "1.5", "liquidity": {"usd": 5000.0}}
+
+        engine._write("dexscreener", [pair], 1000.0)
+
+        self.assertEqual(engine.analyzer.analyzed_at, [1000.0])
+        self.assertEqual((engine.analyzer.restarts, engine.analyzer.seeded), (1, ["p1"]))
+        with database.session_scope() as session:
+            token = session.execute(select(Token).where(Token.pair_address == "p1")).scalar_one()
+            self.assertEqual(token.price_usd, 1.5)
+            self.assertIsNotNone(token.last_ema_short)
+            self.assertIsNotNone(token.passed_dex_filters)
+
+    def test_payload_created_at_handles_milliseconds(self):
+        self.assertEqual(payload_created_at({"created_timestamp": 1700000000000}), 1700000000.0)
+        self.assertEqual(payload_created_at({"createdAt": 1700000000}), 1700000000.0)
+        self.assertIsNone(payload_created_at({"name": "x"}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, text
+
+from database import Database, InsiderTransaction, Token, dispose_engines
+from insider_flow import InsiderFlowIndex, normalize_insider_event
+
+NOW = 1_700_000_000.0
+
+
+def event(tx_hash, token, wallet, side, usd, seconds_ago):
+    return {"transaction_hash": tx_hash, "token_address": token, "wallet_address": wallet,
+            "transaction_type": side, "amount_usd": usd, "timestamp": NOW - seconds_ago}
+
+
+class TestInsiderFlowIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.index = InsiderFlowIndex(self.db.engine, bucket_seconds=60, retention=3600)
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def _raw_count(self):
+        with self.db.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(InsiderTransaction)).scalar()
+
+    def test_normalizes_aliases_and_rejects_incomplete_events(self):
+        row = normalize_insider_event({"signature": "h", "mint": "t", "wallet": "w", "side": "BUY",
+                                       "usd": "12.5", "block_time": NOW * 1000}, source="feed")
+
+        self.assertEqual(row["transaction_type"], "buy")
+        self.assertEqual(row["amount_usd"], 12.5)
+        self.assertEqual(row["timestamp"], datetime.fromtimestamp(NOW, tz=timezone.utc))
+        self.assertEqual(row["source"], "feed")
+        self.assertIsNone(normalize_insider_event({"signature": "h", "mint": "t", "wallet": "w", "side": "swap",
+                                                   "block_time": NOW}))
+
+    def test_ingest_is_idempotent_on_transaction_hash(self):
+        batch = [event("h1", "t1", "w1", "buy", 100.0, 300), event("h2", "t1", "w2", "sell", 30.0, 200),
+                 event("h1", "t1", "w1", "buy", 100.0, 300)]
+
+        self.assertEqual(self.index.ingest(batch, now=NOW), 2)
+        self.assertEqual(self.index.ingest(batch, now=NOW), 0)
+
+        self.assertEqual(self._raw_count(), 2)
+        summary = self.index.token_summary("t1")
+        self.assertEqual((summary["buy_usd"], summary["sell_usd"], summary["net_flow_usd"]), (100.0, 30.0, 70.0))
+        self.assertEqual((summary["buys"], summary["sells"], summary["distinct_wallets"]), (1, 1, 2))
+        stats = self.index.stats()
+        self.assertEqual((stats["transactions_ingested"], stats["duplicates_skipped"]), (2, 4))
+
+    def test_aggregates_update_incrementally_across_batches(self):
+        self.index.ingest([event("h1", "t1", "w1", "buy", 50.0, 120)], now=NOW)
+        self.index.ingest([event("h2", "t1", "w1", "buy", 25.0, 110), event("h3", "t1", "w2", "buy", 5.0, 400)], now=NOW)
+
+        summary = self.index.token_summary("t1")
+        self.assertEqual(summary["net_flow_usd"], 80.0)
+        self.assertEqual(summary["distinct_wallets"], 2)
+        # An older event arriving late moves the first buy back
+        self.assertEqual(summary["first_buy_at"].replace(tzinfo=timezone.utc).timestamp(), NOW - 400)
+
+    def test_first_buy_latency_is_measured_from_launch(self):
+        with self.db.session_scope() as session:
+            session.add(Token(pumpfun_mint_address="t1", pumpfun_metadata={"created_timestamp": (NOW - 600) * 1000}))
+            session.add(Token(pair_address="p2", base_token_address="t2",
+                              pair_created_at=datetime.fromtimestamp(NOW - 90, tz=timezone.utc)))
+
+        self.index.ingest([event("h1", "t1", "w1", "buy", 1.0, 480), event("h2", "t2", "w1", "buy", 1.0, 60),
+                           event("h3", "t3", "w1", "buy", 1.0, 60)], now=NOW)
+
+        self.assertAlmostEqual(self.index.token_summary("t1")["first_buy_latency_seconds"], 120.0)
+        self.assertAlmostEqual(self.index.token_summary("t2")["first_buy_latency_seconds"], 30.0)
+        self.assertIsNone(self.index.token_summary("t3")["first_buy_latency_seconds"])
+
+    def test_top_by_net_flow_reads_only_the_window(self):
+        self.index.ingest([
+            event("h1", "old", "w1", "buy", 1000.0, 3000),
+            event("h2", "a", "w1", "buy", 300.0, 240),
+            event("h3", "a", "w2", "sell", 100.0, 30),
+            event("h4", "b", "w1", "buy", 150.0, 90),
+            event("h5", "c", "w3", "sell", 50.0, 10),
+        ], now=NOW)
+
+        top = self.index.top_by_net_flow(5, limit=2, now=NOW)
+
+        self.assertEqual([(row["token_address"], row["net_flow_usd"]) for row in top], [("a", 200.0), ("b", 150.0)])
+        self.assertEqual(top[0]["distinct_wallets"], 2)
+        self.assertEqual(top[0]["transactions"], 2)
+        with self.db.engine.connect() as conn:
+            plan = " ".join(str(row[-1]) for row in conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT token_address, sum(net_flow_usd) FROM insider_flow_buckets "
+                "WHERE bucket_start >= 0 GROUP BY token_address")))
+        self.assertNotIn("insider_transactions", plan)
+
+    def test_retention_drops_old_buckets_but_keeps_totals(self):
+        self.index.ingest([event("h1", "t1", "w1", "buy", 10.0, 7200), event("h2", "t1", "w1", "buy", 5.0, 60)], now=NOW)
+
+        self.assertEqual(self.index.top_by_net_flow(24 * 60, now=NOW)[0]["net_flow_usd"], 5.0)
+        self.assertEqual(self.index.token_summary("t1")["net_flow_usd"], 15.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
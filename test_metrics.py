@@ -0,0 +1,118 @@
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import Mock, patch
+
+import dexscreener_fetcher
+from metrics import DB_FLUSH_SECONDS, HTTP_ERRORS, HTTP_REQUEST_SECONDS, MetricsRegistry, MetricsServer, _Cells
+from write_behind import WriteBehindWriter
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_sums_every_thread(self):
+        counter = self.registry.counter("jobs_total", "Jobs", ("kind",)).labels("a")
+
+        def work():
+            for _ in range(1000):
+                counter.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(5)
+        self.assertEqual(counter.value(), 8005)
+
+    def test_exited_threads_are_folded(self):
+        cells = _Cells(1)
+        for _ in range(_Cells.COMPACT_AFTER + 10):
+            thread = threading.Thread(target=lambda: cells.cell().__setitem__(0, 1))
+            thread.start()
+            thread.join()
+        self.assertLessEqual(len(cells._cells), _Cells.COMPACT_AFTER)
+        self.assertEqual(cells.totals(), [_Cells.COMPACT_AFTER + 10])
+        self.assertEqual(cells._cells, [])
+
+    def test_histogram_renders_cumulative_buckets(self):
+        family = self.registry.histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1, 1.0))
+        histogram = family.labels("pairs")
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        lines = self.registry.render().splitlines()
+        self.assertIn("# TYPE latency_seconds histogram", lines)
+        self.assertIn('latency_seconds_bucket{endpoint="pairs",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="pairs",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="pairs",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{endpoint="pairs"} 3.65', lines)
+        self.assertIn('latency_seconds_count{endpoint="pairs"} 4', lines)
+
+    def test_labels_are_bound_once_and_escaped(self):
+        family = self.registry.counter("errors_total", "Errors", ("reason",))
+        self.assertIs(family.labels('say "hi"\n'), family.labels('say "hi"\n'))
+        family.labels('say "hi"\n').inc()
+        self.assertIn('errors_total{reason="say \\"hi\\"\\n"} 1', self.registry.render())
+        with self.assertRaises(ValueError):
+            family.labels("a", "b")
+
+    def test_reregistering_returns_the_same_family(self):
+        family = self.registry.counter("events_total", "Events")
+        self.assertIs(self.registry.counter("events_total", "Events"), family)
+        with self.assertRaises(ValueError):
+            self.registry.histogram("events_total", "Events")
+
+    def test_gauges_are_read_at_scrape_time(self):
+        depth = [3]
+        self.registry.gauge("queue_depth", "Queued items", lambda: depth[0])
+        depth[0] = 7
+        self.assertIn("queue_depth 7", self.registry.render().splitlines())
+
+    def test_server_exposes_metrics_endpoint(self):
+        self.registry.counter("scrapes_total", "Scrapes").labels().inc()
+        server = MetricsServer(self.registry, port=0).start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn("scrapes_total 1", response.read().decode())
+            with self.assertRaises(urllib.error.HTTPError) as missing:
+                urllib.request.urlopen(f"http://127.0.0.1:{server.port}/other", timeout=5)
+            self.assertEqual(missing.exception.code, 404)
+            missing.exception.close()
+        finally:
+            server.close()
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_write_behind_flush_latency(self):
+        histogram = DB_FLUSH_SECONDS.labels("metrics-test")
+        before = histogram.snapshot()[1]
+        writer = WriteBehindWriter(lambda batch: None, batch_size=2, flush_interval=60, name="metrics-test")
+        for i in range(4):
+            writer.put(i)
+        writer.close(timeout=5)
+        self.assertEqual(histogram.snapshot()[1] - before, 2)
+
+    @patch('requests.Session.get')
+    def test_dexscreener_requests_by_endpoint(self, mock_get):
+        latency = HTTP_REQUEST_SECONDS.labels("dexscreener_search")
+        errors = HTTP_ERRORS.labels("dexscreener_search")
+        before = (latency.snapshot()[1], errors.value())
+        response = Mock(status_code=200, headers={})
+        mock_get.side_effect = [response, dexscreener_fetcher.requests.ConnectionError("boom")]
+        url = f"{dexscreener_fetcher.DEXSCREENER_API_URL}/search"
+
+        self.assertIs(dexscreener_fetcher._get(url, params={"q": "a"}), response)
+        with self.assertRaises(dexscreener_fetcher.requests.ConnectionError):
+            dexscreener_fetcher._get(url, params={"q": "b"})
+        self.assertEqual((latency.snapshot()[1], errors.value()), (before[0] + 1, before[1] + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, inspect, text
+
+from database import Base, Database, Token, dispose_engines
+from migrations import MIGRATIONS, current_version, migrate
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+OLD_MODEL_DDL = """
+CREATE TABLE tokens (
+    id INTEGER PRIMARY KEY,
+    pumpfun_mint_address VARCHAR(44) UNIQUE,
+    dexscreener_pair_address VARCHAR(44) UNIQUE,
+    name VARCHAR(255),
+    symbol VARCHAR(20),
+    description TEXT,
+    is_pumpfun_launch BOOLEAN,
+    is_dexscreener_tracked BOOLEAN,
+    chain_id VARCHAR(20),
+    pumpfun_metadata JSON,
+    dexscreener_metadata JSON,
+    created_at DATETIME,
+    last_updated DATETIME,
+    market_cap VARCHAR(50),
+    price_usd VARCHAR(50),
+    volume_24h VARCHAR(50)
+)
+"""
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.db")
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def _columns(self, db):
+        return {column['name']: column for column in inspect(db.engine).get_columns('tokens')}
+
+    def test_shipped_database_is_reconciled(self):
+        shutil.copy(os.path.join(REPO_DIR, "memecoins.db"), self.path)
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO tokens (pair_address, chain_id, base_token_address, price_usd, liquidity_usd) "
+                     "VALUES ('pair1', 'solana', 'mint1', 0.5, 1200.0)")
+        conn.commit()
+        conn.close()
+
+        db = Database(self.path)
+        columns = self._columns(db)
+        self.assertTrue(columns['pair_address']['nullable'])
+        self.assertIn('description', columns)
+        self.assertEqual(current_version(db.engine), MIGRATIONS[-1][0])
+        index_names = {index['name'] for index in inspect(db.engine).get_indexes('tokens')}
+        self.assertIn('ix_tokens_chain_id_pair_created_at', index_names)
+        self.assertIn('ix_tokens_passed_dex_filters_liquidity_usd', index_names)
+
+        with db.session_scope() as session:
+            token = session.query(Token).filter_by(pair_address='pair1').one()
+            self.assertEqual(token.liquidity_usd, 1200.0)
+            # pump.fun launches without a DEX pair are now storable
+            session.add(Token(pumpfun_mint_address='launch1', base_token_address='launch1'))
+        db.close()
+
+    def test_old_model_database_is_converted_to_numeric(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute(OLD_MODEL_DDL)
+        conn.execute("INSERT INTO tokens (pumpfun_mint_address, dexscreener_pair_address, name, symbol, market_cap, price_usd, volume_24h) "
+                     "VALUES ('mint1', 'pair1', 'Old', 'OLD', '1234.5', '0.01', '')")
+        conn.commit()
+        conn.close()
+
+        db = Database(self.path)
+        self.assertNotIn('market_cap', self._columns(db))
+        with db.session_scope() as session:
+            token = session.query(Token).one()
+            self.assertEqual(token.pair_address, 'pair1')
+            self.assertEqual(token.base_token_name, 'Old')
+            self.assertEqual(token.base_token_symbol, 'OLD')
+            self.assertEqual(token.market_cap_usd, 1234.5)
+            self.assertEqual(token.price_usd, 0.01)
+            self.assertIsNone(token.volume_h24)
+            # Range queries compare numbers, not strings
+            self.assertEqual(session.query(Token).filter(Token.market_cap_usd > 200).count(), 1)
+        db.close()
+
+    def test_migrations_run_once(self):
+        db = Database(self.path)
+        db.close()
+        db = Database(self.path)
+        with db.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM schema_version")).scalar(), len(MIGRATIONS))
+        db.close()
+
+    def test_first_migration_uses_frozen_schema(self):
+        engine = create_engine(f"sqlite:///{self.path}")
+        with engine.begin() as conn:
+            MIGRATIONS[0][2](conn, Token.metadata)
+        columns = {column['name'] for column in inspect(engine).get_columns('tokens')}
+        engine.dispose()
+        self.assertNotIn('graduated_at', columns)
+        self.assertIn('pumpfun_mint_address', columns)
+
+        db = Database(self.path)
+        self.assertEqual(set(self._columns(db)), {column.name for column in Token.__table__.columns})
+        db.close()
+
+    def test_migrations_alone_build_the_model_schema(self):
+        def schema(engine):
+            inspector = inspect(engine)
+            return {
+                name: (
+                    {(c['name'], str(c['type']), c['nullable'], c['primary_key']) for c in inspector.get_columns(name)},
+                    {(i['name'], tuple(i['column_names']), bool(i['unique'])) for i in inspector.get_indexes(name)},
+                    {tuple(u['column_names']) for u in inspector.get_unique_constraints(name)},
+                )
+                for name in Base.metadata.tables
+            }
+
+        migrated = create_engine(f"sqlite:///{self.path}")
+        migrate(migrated, Base.metadata)
+        modelled = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'model.db')}")
+        Base.metadata.create_all(modelled)
+        try:
+            self.assertEqual(schema(migrated), schema(modelled))
+        finally:
+            migrated.dispose()
+            modelled.dispose()
+
+    def test_hot_query_uses_composite_index(self):
+        db = Database(self.path)
+        with db.engine.connect() as conn:
+            plan = conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id FROM tokens WHERE chain_id = 'solana' AND pair_created_at > '2024-01-01'"
+            )).fetchall()
+        self.assertIn('ix_tokens_chain_id_pair_created_at', " ".join(str(row) for row in plan))
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
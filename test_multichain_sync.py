@@ -0,0 +1,101 @@
+import threading
+import time
+import unittest
+
+from multichain_sync import MultiChainSync, parse_chain_ids, parse_chain_limits
+from pair_snapshot import PairSnapshot
+from token_record import TokenRecord
+
+
+def profiles(*items):
+    return [TokenRecord.from_profile({"chainId": chain_id, "tokenAddress": address}) for chain_id, address in items]
+
+
+class FakePairs:
+    """One pair per token address; records concurrency caps and how many chains overlap"""
+
+    def __init__(self, delay=0.0, failing=()):
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = {}
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, addresses, chain_id, max_concurrency):
+        with self._lock:
+            self.calls[chain_id] = (list(addresses), max_concurrency)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if chain_id in self.failing:
+                raise RuntimeError("boom")
+            return [{"pairAddress": f"pair-{address}", "chainId": chain_id, "baseToken": {"address": address}}
+                    for address in addresses]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestMultiChainSync(unittest.TestCase):
+
+    def test_config_parsing(self):
+        self.assertEqual(parse_chain_ids(" Solana, base,,bsc,base", "solana"), ["solana", "base", "bsc"])
+        self.assertEqual(parse_chain_ids("", "solana"), ["solana"])
+        self.assertEqual(parse_chain_limits("ethereum:2, bsc:1"), {"ethereum": 2, "bsc": 1})
+        with self.assertRaises(ValueError):
+            parse_chain_limits("ethereum")
+
+    def test_feed_is_downloaded_once_and_partitioned(self):
+        feed_calls = []
+
+        def fetch_profiles():
+            feed_calls.append(1)
+            return profiles(("solana", "s1"), ("base", "b1"), ("tron", "t1"), ("solana", "s2"), ("base", "b2"))
+
+        fetch = FakePairs(delay=0.05)
+        sync = MultiChainSync(["solana", "base", "bsc"], fetch_profiles, fetch,
+                              max_concurrency=4, chain_concurrency={"base": 1})
+
+        pairs = sync.sync()
+
+        self.assertEqual(len(feed_calls), 1)
+        self.assertEqual(fetch.calls, {"solana": (["s1", "s2"], 4), "base": (["b1", "b2"], 1)})
+        self.assertEqual(fetch.max_active, 2)
+        self.assertEqual([pair["pairAddress"] for pair in pairs], ["pair-s1", "pair-s2", "pair-b1", "pair-b2"])
+        self.assertEqual(sync.total_concurrency(), 4 + 1 + 4)
+
+    def test_limit_applies_per_chain(self):
+        feed = profiles(*[("solana", f"s{i}") for i in range(10)], ("base", "b1"))
+        fetch = FakePairs()
+        MultiChainSync(["solana", "base"], lambda: feed, fetch, limit_per_chain=3).sync()
+
+        self.assertEqual(fetch.calls["solana"][0], ["s0", "s1", "s2"])
+        self.assertEqual(fetch.calls["base"][0], ["b1"])
+
+    def test_failing_chain_does_not_block_others(self):
+        fetch = FakePairs(failing={"base"})
+        sync = MultiChainSync(["solana", "base"], lambda: profiles(("solana", "s1"), ("base", "b1")), fetch)
+
+        pairs = sync.sync()
+
+        self.assertEqual([pair["chainId"] for pair in pairs], ["solana"])
+        chains = sync.stats()["chains"]
+        self.assertEqual(chains["base"]["errors"], 1)
+        self.assertEqual(chains["solana"]["pairs"], 1)
+        self.assertIsNotNone(chains["solana"]["pairs_per_second"])
+
+    def test_write_lag_is_tracked_per_chain(self):
+        sync = MultiChainSync(["solana", "base"], list, FakePairs())
+        snapshot = PairSnapshot("pair", "mint", chain_id="base")
+
+        sync.record_written([snapshot], observed_at=100.0, written_at=102.5)
+
+        chains = sync.stats()["chains"]
+        self.assertEqual(chains["base"]["write_lag"]["max"], 2.5)
+        self.assertEqual(chains["solana"]["write_lag"]["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
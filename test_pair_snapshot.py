@@ -0,0 +1,84 @@
+import json
+import unittest
+from datetime import datetime, timezone
+
+import fast_json
+from pair_snapshot import PairSnapshot, decode_pairs, snapshots_from_pairs
+
+
+def make_pair(**overrides):
+    pair = {
+        "chainId": "solana",
+        "dexId": "raydium",
+        "url": "https://dexscreener.com/solana/pair1",
+        "pairAddress": "pair1",
+        "baseToken": {"address": "mint1", "name": "Token 1", "symbol": "TK1"},
+        "quoteToken": {"symbol": "SOL"},
+        "priceNative": "0.01",
+        "priceUsd": "1.5",
+        "volume": {"h24": 1000, "h6": "250.5", "h1": 0},
+        "priceChange": {"h24": -12.5},
+        "liquidity": {"usd": 5000},
+        "marketCap": 150000,
+        "pairCreatedAt": 1700000000000,
+        "info": {
+            "websites": [{"url": "https://token1.example"}],
+            "socials": [{"label": "Twitter", "url": "https://x.com/token1"}],
+        },
+        "links": {"Telegram": "https://t.me/token1", "website": "https://other.example"},
+    }
+    pair.update(overrides)
+    return pair
+
+
+class TestPairSnapshot(unittest.TestCase):
+
+    def test_row_matches_tokens_columns(self):
+        row = PairSnapshot.from_pair(make_pair()).to_row()
+
+        self.assertEqual(row["pair_address"], "pair1")
+        self.assertEqual(row["base_token_symbol"], "TK1")
+        self.assertEqual(row["price_usd"], 1.5)
+        self.assertEqual(row["volume_h6"], 250.5)
+        self.assertIsNone(row["volume_h1"])
+        self.assertIsNone(row["price_change_h1"])
+        self.assertEqual(row["market_cap_usd"], 150000.0)
+        self.assertEqual(row["pair_created_at"], datetime.fromtimestamp(1700000000, tz=timezone.utc))
+        self.assertEqual(row["social_links_raw"], {
+            "website": "https://token1.example",
+            "twitter": "https://x.com/token1",
+            "telegram": "https://t.me/token1",
+        })
+
+    def test_liquidity_falls_back_to_base_amount(self):
+        snapshot = PairSnapshot.from_pair(make_pair(liquidity={"base": 100}))
+        self.assertEqual(snapshot.liquidity_usd, 150.0)
+
+    def test_unusable_pairs_are_dropped(self):
+        pairs = [None, "x", make_pair(pairAddress=None), make_pair(baseToken={}), make_pair(priceUsd="n/a"), make_pair()]
+        self.assertEqual([s.pair_address for s in snapshots_from_pairs(pairs)], ["pair1"])
+
+    def test_snapshot_has_no_instance_dict(self):
+        self.assertFalse(hasattr(PairSnapshot.from_pair(make_pair()), "__dict__"))
+
+    def test_decode_pairs_accepts_response_shapes(self):
+        pair = make_pair()
+        for body in ({"pairs": [pair]}, {"pair": pair}, [pair]):
+            self.assertEqual([s.pair_address for s in decode_pairs(json.dumps(body).encode())], ["pair1"])
+        self.assertEqual(decode_pairs(b'{"pairs": null}'), [])
+
+
+class TestFastJson(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = {"pairs": [make_pair()], "n": 1.25}
+        self.assertEqual(fast_json.loads(fast_json.dumps(data)), data)
+        self.assertIsInstance(fast_json.dumps(data), bytes)
+
+    def test_invalid_json_raises_decode_error(self):
+        with self.assertRaises(json.JSONDecodeError):
+            fast_json.loads(b"{not json")
+
+
+if __name__ == '__main__':
+    unittest.main()
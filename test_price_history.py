@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from sqlalchemy import func, select
+
+from database import Database, PriceTick, dispose_engines
+from price_history import PriceHistoryStore
+
+NOW = 1_700_000_000.0
+
+
+def tick(pair, seconds_ago, price):
+    return {"pair_address": pair, "ts": int((NOW - seconds_ago) * 1000), "price_usd": price, "liquidity_usd": 10.0}
+
+
+class TestPriceHistoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        self.segment_dir = os.path.join(self.tmp.name, "segments")
+        self.store = self._open_store()
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def _open_store(self):
+        return PriceHistoryStore(self.db.engine, self.segment_dir, compact_after=3600,
+                                 downsample_after=86400, downsample_interval=60, retention=7 * 86400)
+
+    def _table_count(self):
+        with self.db.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(PriceTick)).scalar()
+
+    def test_append_is_idempotent_and_range_reads_one_pair(self):
+        rows = [tick("a", 30, 1.0), tick("a", 20, 2.0), tick("b", 20, 9.0), tick("a", 10, 3.0)]
+        self.store.append(rows)
+        self.store.append(rows[:1])
+
+        ticks = self.store.last("a", 25, now=NOW)
+        self.assertEqual(ticks["price_usd"].tolist(), [2.0, 3.0])
+        self.assertTrue(np.isnan(ticks["volume_h24"]).all())
+        self.assertEqual(self._table_count(), 4)
+
+    def test_append_pairs_records_dexscreener_payload(self):
+        pairs = [{"pairAddress": "p1", "baseToken": {"address": "m1"}, "priceUsd": "1.25", "volume": {"h1": 5}}]
+        self.assertEqual(self.store.append_pairs(pairs, observed_at=NOW), 1)
+        ticks = self.store.range("p1", NOW - 1, NOW)
+        self.assertEqual(ticks["price_usd"].tolist(), [1.25])
+        self.assertEqual(ticks["volume_h1"].tolist(), [5.0])
+
+    def test_compaction_moves_old_ticks_into_segments(self):
+        self.store.append([tick("a", 7200, 1.0), tick("a", 5000, 2.0), tick("b", 4000, 5.0), tick("a", 60, 3.0)])
+        self.assertEqual(self.store.compact(now=NOW), 3)
+        self.assertEqual(self._table_count(), 1)
+
+        # Reads span the segment and the table, and survive a restart
+        for store in (self.store, self._open_store()):
+            self.assertEqual(store.last("a", 3 * 3600, now=NOW)["price_usd"].tolist(), [1.0, 2.0, 3.0])
+            self.assertEqual(store.last("b", 3 * 3600, now=NOW)["price_usd"].tolist(), [5.0])
+            self.assertEqual(store.stats()["segments"], 1)
+
+    def test_downsampling_keeps_last_tick_per_bucket(self):
+        base = 2 * 86400
+        bucket_start = (int(NOW - base) // 60) * 60
+        offsets = [bucket_start + 1, bucket_start + 30, bucket_start + 61, bucket_start + 62]
+        self.store.append([{"pair_address": "a", "ts": offset * 1000, "price_usd": float(i)} for i, offset in enumerate(offsets)])
+        self.store.compact(now=NOW)
+
+        self.assertEqual(self.store.downsample(now=NOW), 2)
+        self.assertEqual(self.store.range("a", 0, NOW)["price_usd"].tolist(), [1.0, 3.0])
+        # Already downsampled segments are left alone
+        self.assertEqual(self.store.downsample(now=NOW), 0)
+
+    def test_segments_are_merged_per_window(self):
+        # Maintenance every 5 minutes over two days: one raw segment per run before merging
+        start = NOW - 2 * 86400
+        for run in range(1, 2 * 288 + 1):
+            run_time = start + run * 300
+            self.store.append([tick("a", NOW - run_time + 1, float(run)), tick("b", NOW - run_time + 2, float(run))])
+            self.store.maintain(now=run_time + 3600)
+
+        stats = self.store.stats()
+        # Closed hours hold one segment each; older ones were merged into daily segments on downsampling
+        self.assertLessEqual(stats["segments"], 3 + 24 + 12)
+        self.assertEqual(stats["segment_ticks"] + self._table_count(), 2 * 2 * 288)
+        prices = self.store.range("a", 0, NOW + 3600)["price_usd"].tolist()
+        self.assertEqual(prices, [float(run) for run in range(1, 2 * 288 + 1)])
+        reopened = self._open_store()
+        self.assertEqual(reopened.range("b", 0, NOW + 3600)["price_usd"].tolist(), prices)
+        self.assertEqual(sorted(os.listdir(self.segment_dir)), sorted(os.path.basename(s.path) for s in reopened._segments))
+
+    def test_retention_drops_expired_ticks(self):
+        self.store.append([tick("a", 10 * 86400, 1.0), tick("a", 60, 2.0)])
+        self.store.compact(now=NOW)
+        self.store.append([tick("b", 8 * 86400, 1.0)])
+
+        self.assertEqual(self.store.apply_retention(now=NOW), 2)
+        self.assertEqual(self.store.range("a", 0, NOW)["price_usd"].tolist(), [2.0])
+        self.assertEqual(len(self.store.range("b", 0, NOW)), 0)
+        self.assertEqual(os.listdir(self.segment_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import base64
+import hashlib
+import json
+import re
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from pumpfun_stream import PumpFunStreamFetcher
+
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class StubWebSocketServer:
+    """Minimal WebSocket server: one connection per batch, sends the batch then closes"""
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.subscriptions = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(5)
+        self.url = f"ws://127.0.0.1:{self.sock.getsockname()[1]}"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _recv_exact(self, conn, size):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client closed")
+            data += chunk
+        return data
+
+    def _read_frame(self, conn):
+        first, second = self._recv_exact(conn, 2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", self._recv_exact(conn, 2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", self._recv_exact(conn, 8))[0]
+        mask = self._recv_exact(conn, 4)
+        payload = self._recv_exact(conn, length)
+        return bytes(b ^ mask[i % 4] for i, b in enumerate(payload)).decode()
+
+    def _frame(self, payload):
+        if len(payload) < 126:
+            header = bytes([0x81, len(payload)])
+        else:
+            header = bytes([0x81, 126]) + struct.pack(">H", len(payload))
+        return header + payload
+
+    def _serve(self):
+        for batch in self.batches:
+            conn, _ = self.sock.accept()
+            with conn:
+                request = b""
+                while b"\r\n\r\n" not in request:
+                    request += conn.recv(4096)
+                key = re.search(rb"Sec-WebSocket-Key: *(\S+)", request, re.I).group(1)
+                accept = base64.b64encode(hashlib.sha1(key + WS_GUID).digest())
+                conn.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                             b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+                self.subscriptions.append(json.loads(self._read_frame(conn)))
+                for message in batch:
+                    conn.sendall(self._frame(json.dumps(message).encode()))
+                conn.sendall(b"\x88\x00")
+                time.sleep(0.05)
+        # No more connections after the last batch; the client must fall back to polling
+        self.sock.close()
+
+
+class StubFallback:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.calls = 0
+
+    def get_new_tokens(self, limit=50):
+        self.calls += 1
+        return list(self.tokens)
+
+    def health_check(self):
+        return True
+
+    def close(self):
+        pass
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestPumpFunStreamFetcher(unittest.TestCase):
+
+    def test_streams_dedups_and_reconnects(self):
+        server = StubWebSocketServer([
+            [{"message": "Successfully subscribed"}, {"mint": "a"}, {"mint": "b"}, {"mint": "a"}],
+            [{"mint": "c"}],
+        ])
+        fallback = StubFallback([{"mint": "b"}, {"mint": "d"}])
+        stream = PumpFunStreamFetcher(server.url, fallback=fallback, reconnect_delay=0.01)
+        try:
+            stream.start()
+            self.assertTrue(wait_for(lambda: stream.reconnects >= 1 and len(stream._buffer) >= 4))
+            self.assertTrue(wait_for(lambda: not stream.connected.is_set()))
+            tokens = stream.get_new_tokens()
+        finally:
+            stream.close()
+
+        mints = [token["mint"] for token in tokens]
+        self.assertEqual(sorted(mints), ["a", "b", "c", "d"])
+        self.assertGreaterEqual(stream.duplicates, 2)
+        self.assertEqual(server.subscriptions[0], {"method": "subscribeNewToken"})
+        self.assertEqual(len(server.subscriptions), 2)
+
+    def test_polls_fallback_when_disconnected(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        url = f"ws://127.0.0.1:{sock.getsockname()[1]}"
+        sock.close()
+
+        fallback = StubFallback([{"mint": "x"}])
+        stream = PumpFunStreamFetcher(url, fallback=fallback, reconnect_delay=0.01)
+        try:
+            self.assertEqual(stream.get_new_tokens(), [{"mint": "x"}])
+            self.assertEqual(stream.get_new_tokens(), [])
+        finally:
+            stream.close()
+        self.assertEqual(fallback.calls, 2)
+
+    def test_reconnect_backfill_does_not_block_the_socket_thread(self):
+        release = threading.Event()
+        threads = []
+
+        class SlowFallback(StubFallback):
+            def get_new_tokens(self, limit=50):
+                threads.append(threading.current_thread().name)
+                release.wait(5)
+                return super().get_new_tokens(limit)
+
+        class StubSocket:
+            def __init__(self):
+                self.sent = []
+
+            def send(self, message):
+                self.sent.append(message)
+
+        fallback = SlowFallback([{"mint": "m"}])
+        stream = PumpFunStreamFetcher("ws://127.0.0.1:1", fallback=fallback)
+        ws = StubSocket()
+        stream._on_open(ws)
+        started = time.time()
+        stream._on_open(ws)
+        self.assertLess(time.time() - started, 1)
+        self.assertEqual(stream.reconnects, 1)
+        self.assertTrue(wait_for(lambda: threads))
+        self.assertEqual(threads, ["pumpfun-backfill"])
+        self.assertEqual(len(stream._buffer), 0)
+
+        release.set()
+        self.assertTrue(wait_for(lambda: len(stream._buffer) == 1))
+        stream.close()
+
+    def test_limit_leaves_remaining_tokens_buffered(self):
+        stream = PumpFunStreamFetcher("ws://127.0.0.1:1")
+        stream._ingest([{"mint": str(i)} for i in range(5)])
+        self.assertEqual(len(stream._buffer), 5)
+        stream.start = lambda: None
+        stream.connected.set()
+        self.assertEqual(len(stream.get_new_tokens(limit=3)), 3)
+        self.assertEqual(len(stream.get_new_tokens(limit=3)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+
+from pumpfun_fetcher import MoralisAPIError, PumpFunFetcher
+from rate_limiter import RateLimitScheduler, PRIORITY_NEW_LAUNCH, PRIORITY_TRENDING
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """Answers the first `throttle_count` requests with 429 + Retry-After"""
+    throttle_count = 2
+    retry_after = "0.2"
+    requests_seen = 0
+
+    def do_GET(self):
+        ThrottlingHandler.requests_seen += 1
+        if ThrottlingHandler.requests_seen <= ThrottlingHandler.throttle_count:
+            self.send_response(429)
+            self.send_header("Retry-After", ThrottlingHandler.retry_after)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps([{"mint": "mint1"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", "7")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_response(status_code, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+
+    def test_bucket_limits_rate(self):
+        scheduler = RateLimitScheduler({"api": (20.0, 1.0)})
+        start = time.monotonic()
+        for _ in range(5):
+            self.assertTrue(scheduler.acquire("api"))
+        # One burst token, then four more at 20/s
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_retry_after_pauses_host(self):
+        scheduler = RateLimitScheduler({"api": (100.0, 10.0)})
+        scheduler.observe("api", make_response(429, {"Retry-After": "0.3"}))
+        self.assertGreater(scheduler.stats()["api"]["blocked_for"], 0.2)
+        self.assertFalse(scheduler.acquire("api", timeout=0.1))
+        self.assertTrue(scheduler.acquire("api", timeout=1))
+        stats = scheduler.stats()["api"]
+        self.assertEqual((stats["throttled"], stats["timeouts"]), (1, 1))
+
+    def test_exhausted_ratelimit_headers_wait_for_reset(self):
+        scheduler = RateLimitScheduler({"api": (100.0, 10.0)})
+        scheduler.observe("api", make_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0.3"}))
+        self.assertEqual(scheduler.stats()["api"]["header_remaining"], 0)
+        self.assertFalse(scheduler.acquire("api", timeout=0.1))
+
+    def test_higher_priority_served_first(self):
+        scheduler = RateLimitScheduler({"api": (10.0, 1.0)})
+        scheduler.acquire("api")
+        order = []
+
+        def worker(name, priority, delay):
+            time.sleep(delay)
+            scheduler.acquire("api", priority=priority)
+            order.append(name)
+
+        threads = [
+            threading.Thread(target=worker, args=("trending", PRIORITY_TRENDING, 0)),
+            threading.Thread(target=worker, args=("launch", PRIORITY_NEW_LAUNCH, 0.02)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["launch", "trending"])
+
+
+class TestFetcherAgainstThrottlingServer(unittest.TestCase):
+
+    def setUp(self):
+        ThrottlingHandler.requests_seen = 0
+        ThrottlingHandler.throttle_count = 2
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottlingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.scheduler = RateLimitScheduler()
+        self.fetcher = PumpFunFetcher(api_key="test", timeout=5, max_retries=3, scheduler=self.scheduler)
+        self.fetcher.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.fetcher.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_429s_are_retried_once_each_honouring_retry_after(self):
+        start = time.monotonic()
+        tokens = self.fetcher.get_new_tokens()
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(tokens, [{"mint": "mint1"}])
+        # No hidden urllib3 retries: two throttled calls plus the successful one
+        self.assertEqual(ThrottlingHandler.requests_seen, 3)
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertLess(elapsed, 2.0)
+        stats = self.scheduler.stats()["127.0.0.1"]
+        self.assertEqual(stats["throttled"], 2)
+        self.assertEqual(stats["header_remaining"], 7)
+
+    def test_persistent_429s_stop_at_max_retries(self):
+        ThrottlingHandler.throttle_count = 10
+        with self.assertRaises(MoralisAPIError) as raised:
+            self.fetcher.get_new_tokens()
+        self.assertEqual(raised.exception.status_code, 429)
+        self.assertEqual(ThrottlingHandler.requests_seen, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import select
+
+from config import Config
+from database import Database, Token, TradeOrder, dispose_engines
+from replay import ReplayEngine, VirtualClock
+from response_log import ResponseRecorder, read_responses, segment_paths
+
+START = 1_700_000_000.0
+
+
+def pair(address, price, liquidity=5000.0, market_cap=50000.0):
+    return {"pairAddress": address, "chainId": "solana", "baseToken": {"address": f"mint-{address}"},
+            "priceUsd": str(price), "priceNative": str(price / 100), "liquidity": {"usd": liquidity},
+            "marketCap": market_cap}
+
+
+class TestResponseRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_with_rotation(self):
+        recorder = ResponseRecorder(self.tmp.name, rotate_after=60, batch_size=2)
+        recorder.record("pumpfun", [{"mint": "a"}], START)
+        recorder.record("dexscreener", [pair("p1", 1.0)], START + 30)
+        recorder.record("pumpfun", [{"mint": "b"}], START + 90)
+        recorder.close()
+
+        self.assertEqual(len(segment_paths(self.tmp.name)), 2)
+        records = list(read_responses(self.tmp.name))
+        self.assertEqual([(t, source) for t, source, _ in records],
+                         [(START, "pumpfun"), (START + 30, "dexscreener"), (START + 90, "pumpfun")])
+        self.assertEqual(records[2][2], [{"mint": "b"}])
+        self.assertEqual(recorder.stats()["responses_recorded"], 3)
+
+    def test_truncated_segment_keeps_complete_members(self):
+        recorder = ResponseRecorder(self.tmp.name, batch_size=1)
+        recorder.record("pumpfun", [{"mint": "a"}], START)
+        recorder.flush()
+        recorder.record("pumpfun", [{"mint": "b"}], START + 1)
+        recorder.close()
+        path = segment_paths(self.tmp.name)[0]
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:-10])
+
+        with self.assertLogs("response_log", "WARNING"):
+            self.assertEqual([payload for _, _, payload in read_responses(path)], [[{"mint": "a"}]])
+
+
+class TestReplayEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.recording = os.path.join(self.tmp.name, "recording")
+        self.db = Database(os.path.join(self.tmp.name, "replay.db"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_replay_trades_on_recorded_time_and_reports_pnl(self):
+        recorder = ResponseRecorder(self.recording)
+        recorder.record("pumpfun", [{"mint": "launch1", "name": "One"}, {"mint": "launch2"}], START)
+        recorder.record("pumpfun", [{"mint": "launch1", "name": "One"}, {"mint": "launch3"}], START + 2)
+        recorder.record("dexscreener", [pair("winner", 1.0), pair("loser", 1.0), pair("thin", 1.0, liquidity=10.0)], START + 30)
+        recorder.record("dexscreener", [pair("winner", 2.5), pair("loser", 0.9)], START + 60)
+        recorder.close()
+        config = Config(dex_filters_path="", default_buy_amount=1.0, take_profit_multiple=2.0, stop_loss_multiple=0.5)
+
+        report = ReplayEngine(config, self.db, broker_latency=0.25).run(self.recording)
+
+        self.assertEqual((report.responses, report.errors, report.tokens_discovered), (4, 0, 3))
+        self.assertEqual(report.recorded_seconds, 60.0)
+        self.assertEqual(report.pnl["closed_trades"], 1)
+        self.assertEqual(report.pnl["open_positions"], 1)
+        self.assertGreater(report.pnl["realized_pnl"], 1.0)
+        self.assertLess(report.pnl["unrealized_pnl"], 0.0)
+        with self.db.session_scope() as session:
+            statuses = dict(session.execute(select(Token.pair_address, Token.gmgn_trade_status)
+                                            .where(Token.pair_address.is_not(None))).all())
+            latencies = session.execute(select(TradeOrder.discovery_to_fill_seconds)).scalars().all()
+        self.assertEqual(statuses, {"winner": "closed", "loser": "open", "thin": None})
+        # Replayed orders run one after another, so the second buy of a batch waits for the first
+        self.assertEqual(sorted(latencies), [0.25, 0.25, 0.5])
+
+
+class TestVirtualClock(unittest.TestCase):
+
+    def test_only_moves_forward(self):
+        clock = VirtualClock(10.0)
+        clock.advance_to(5.0)
+        clock.sleep(2.0)
+        self.assertEqual(clock.time(), 12.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from response_cache import CachedResponse, ResponseCache, cache_key
+
+
+def make_response(status_code=200, data=None, etag=None):
+    response = Mock()
+    response.status_code = status_code
+    response.content = json.dumps(data).encode() if data is not None else b""
+    response.headers = {"ETag": etag} if etag else {}
+    return response
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def test_fresh_entry_is_served_without_fetching(self):
+        cache = ResponseCache(default_ttl=60)
+        fetch = Mock(return_value=make_response(data={"pairs": [1]}))
+
+        self.assertEqual(cache.get("k", fetch).json(), {"pairs": [1]})
+        second = cache.get("k", fetch)
+
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.json(), {"pairs": [1]})
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_expired_entry_revalidates_with_etag(self):
+        cache = ResponseCache(default_ttl=0)
+        cache.get("k", Mock(return_value=make_response(data={"v": 1}, etag='"abc"')))
+
+        fetch = Mock(return_value=make_response(status_code=304))
+        response = cache.get("k", fetch)
+
+        self.assertEqual(fetch.call_args[0][0], {"If-None-Match": '"abc"'})
+        self.assertEqual(response.json(), {"v": 1})
+        self.assertEqual(cache.stats()["revalidated"], 1)
+
+    def test_error_responses_are_not_cached(self):
+        cache = ResponseCache(default_ttl=60)
+        fetch = Mock(return_value=make_response(status_code=500))
+        self.assertEqual(cache.get("k", fetch).status_code, 500)
+        cache.get("k", fetch)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_concurrent_misses_share_one_request(self):
+        cache = ResponseCache(default_ttl=60)
+        started = threading.Event()
+
+        def slow_fetch(headers):
+            started.set()
+            time.sleep(0.1)
+            return make_response(data={"v": 1})
+
+        fetch = Mock(side_effect=slow_fetch)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("k", fetch).json())) for _ in range(5)]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(results, [{"v": 1}] * 5)
+        self.assertEqual(cache.stats()["coalesced"], 4)
+
+    def test_lru_eviction_and_endpoint_ttls(self):
+        cache = ResponseCache(max_entries=2, default_ttl=5, endpoint_ttls={"/search": 30})
+        for key in ("a", "b", "c"):
+            cache.put_json(key, {})
+        self.assertIsNone(cache.peek("a"))
+        self.assertIsNotNone(cache.peek("c"))
+        self.assertEqual(cache.ttl_for("https://x/search?q=1"), 30)
+        self.assertEqual(cache_key("u", {"b": 2, "a": 1}), "u?a=1&b=2")
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(default_ttl=60, disk_path=path)
+            cache.get("k", Mock(return_value=make_response(data={"v": 1})))
+            cache.close()
+
+            restarted = ResponseCache(default_ttl=60, disk_path=path)
+            fetch = Mock()
+            self.assertEqual(restarted.get("k", fetch).json(), {"v": 1})
+            fetch.assert_not_called()
+            restarted.close()
+
+    def test_disk_writes_are_batched_outside_the_lock(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(default_ttl=60, disk_path=path)
+            put_many = cache._disk.put_many
+            batches = []
+
+            def record(items):
+                batches.append((len(items), cache._lock.locked()))
+                put_many(items)
+
+            cache._disk.put_many = record
+            cache.put_many_json([(f"k{i}", {"v": i}) for i in range(30)])
+            self.assertEqual(batches, [(30, False)])
+            cache.close()
+
+            restarted = ResponseCache(default_ttl=60, disk_path=path)
+            self.assertEqual(restarted.peek("k29").json(), {"v": 29})
+            restarted.close()
+
+    def test_disk_reads_happen_outside_the_lock(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(default_ttl=60, disk_path=path)
+            cache.put_json("k", {"v": 1})
+            cache.close()
+
+            restarted = ResponseCache(default_ttl=60, disk_path=path)
+            disk_get = restarted._disk.get
+            locked = []
+
+            def record(key):
+                locked.append(restarted._lock.locked())
+                return disk_get(key)
+
+            restarted._disk.get = record
+            self.assertEqual(restarted.get("k", Mock()).json(), {"v": 1})
+            self.assertEqual(restarted.get("k", Mock()).json(), {"v": 1})
+            self.assertEqual(locked, [False])
+            restarted.close()
+
+    def test_disk_tier_is_pruned_and_cleared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(default_ttl=60, disk_path=path, disk_max_entries=5, disk_retention=10)
+            now = time.time()
+            cache._disk.put_many([(f"k{i}", CachedResponse(f"k{i}", b"{}", stored_at=now + i, expires_at=now + 60))
+                                  for i in range(8)])
+            cache._disk.put_many([("old", CachedResponse("old", b"{}", stored_at=now - 100, expires_at=now - 20))])
+            self.assertEqual(cache._disk.prune(now), 4)
+
+            count = cache._disk._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self.assertEqual(count, 5)
+            self.assertIsNone(cache._disk.get("old"))
+            self.assertIsNone(cache._disk.get("k0"))
+            self.assertIsNotNone(cache._disk.get("k7"))
+
+            cache.clear()
+            self.assertIsNone(cache._disk.get("k7"))
+            fetch = Mock(return_value=make_response(data={"v": 2}))
+            self.assertEqual(cache.get("k7", fetch).json(), {"v": 2})
+            fetch.assert_called_once()
+            cache.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
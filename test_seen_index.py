@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from database import Database, Token, dispose_engines
+from seen_index import BloomFilter, SeenIndex, MINT, PAIR
+
+
+class TestSeenIndex(unittest.TestCase):
+
+    def test_exact_mode_counts_hits_and_misses(self):
+        index = SeenIndex()
+        index.add_many(MINT, ["a", None, "b"])
+        self.assertTrue(index.contains(MINT, "a"))
+        self.assertFalse(index.contains(MINT, "c"))
+        self.assertFalse(index.contains(PAIR, "a"))
+        stats = index.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["mints"]), (1, 2, 2))
+        self.assertGreater(stats["memory_bytes"], 0)
+
+    def test_bloom_mode_confirms_probable_hits(self):
+        confirmed = []
+
+        def confirm(kind, address):
+            confirmed.append(address)
+            return address == "real"
+
+        index = SeenIndex(confirm=confirm, bloom_capacity=1000)
+        index.add(MINT, "real")
+        self.assertTrue(index.contains(MINT, "real"))
+        self.assertFalse(index.contains(MINT, "missing"))
+        # Definite misses never reach the database
+        self.assertEqual(confirmed, ["real"])
+        self.assertEqual(index.stats()["db_lookups"], 1)
+
+    def test_partition_leaves_bloom_hits_unconfirmed(self):
+        index = SeenIndex(confirm=lambda kind, address: self.fail("partition must not confirm"), bloom_capacity=1000)
+        index.add_many(MINT, ["real", "stale"])
+        known, unconfirmed = index.partition(MINT, ["real", "stale", "new"])
+        self.assertEqual((known, unconfirmed), (set(), ["real", "stale"]))
+        index.confirmed(MINT, unconfirmed, {"real"})
+        stats = index.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["false_positives"]), (1, 2, 1))
+
+        exact = SeenIndex()
+        exact.add(MINT, "real")
+        self.assertEqual(exact.partition(MINT, ["real", "new"]), ({"real"}, []))
+
+    def test_bloom_filter_error_rate(self):
+        bloom = BloomFilter(10000, error_rate=0.01)
+        for i in range(10000):
+            bloom.add(f"in{i}")
+        self.assertTrue(all(f"in{i}" in bloom for i in range(10000)))
+        false_positives = sum(f"out{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_bloom_mode_requires_confirm(self):
+        with self.assertRaises(ValueError):
+            SeenIndex(bloom_capacity=10)
+
+
+class TestDatabaseSeenIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.db")
+
+    def tearDown(self):
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def _seed(self):
+        db = Database(self.path)
+        with db.session_scope() as session:
+            session.add(Token(pumpfun_mint_address="mint1", pair_address="pair1"))
+        db.close()
+
+    def test_warm_load_and_sync_on_insert(self):
+        self._seed()
+        db = Database(self.path)
+        self.assertTrue(db.token_exists("mint1"))
+        self.assertTrue(db.pair_exists("pair1"))
+        self.assertFalse(db.token_exists("mint2"))
+
+        db.add_token({"pumpfun_mint_address": "mint2"})
+        self.assertTrue(db.token_exists("mint2"))
+        db.close()
+
+    def test_bloom_backed_database(self):
+        self._seed()
+        db = Database(self.path, bloom_capacity=1000)
+        self.assertTrue(db.token_exists("mint1"))
+        self.assertFalse(db.token_exists("mint2"))
+        self.assertEqual(db.seen_index.stats()["mode"], "bloom")
+        db.close()
+
+    def test_bloom_hits_confirmed_in_one_query(self):
+        self._seed()
+        db = Database(self.path, bloom_capacity=1000)
+        known, unconfirmed = db.known_mints(["mint1", "mint2"])
+        self.assertEqual((known, unconfirmed), (set(), ["mint1"]))
+        self.assertEqual(db.confirm_mints(unconfirmed), {"mint1"})
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
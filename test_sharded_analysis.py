@@ -0,0 +1,91 @@
+import unittest
+
+from dex_filters import FilterPipeline, FilterRule
+from indicators import IndicatorEngine
+from pair_snapshot import PairSnapshot
+from sharded_analysis import ShardedAnalyzer, shard_of
+
+RULES = [FilterRule("min_liquidity", "liquidity_usd", min=1000)]
+
+
+def batch(tick, pairs=20):
+    return [PairSnapshot(f"pair{i}", f"mint{i}", price_usd=1.0 + i + (tick % 7) * 0.1,
+                         liquidity_usd=500.0 if i % 4 == 0 else 5000.0)
+            for i in range(pairs)]
+
+
+def without_timestamps(rows):
+    return sorted(({k: v for k, v in row.items() if k != 'last_trend_analysis_at'} for row in rows),
+                  key=lambda row: row['pair_address'])
+
+
+class TestShardOf(unittest.TestCase):
+
+    def test_shards_are_stable_and_spread(self):
+        shards = [shard_of(f"pair{i}", 4) for i in range(1000)]
+
+        self.assertEqual(shards, [shard_of(f"pair{i}", 4) for i in range(1000)])
+        self.assertEqual(set(shards), {0, 1, 2, 3})
+
+
+class TestShardedAnalyzer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = ShardedAnalyzer(3, rules=RULES, timeout=60)
+        cls.analyzer.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.analyzer.stop()
+
+    def test_matches_in_process_analysis(self):
+        engine = IndicatorEngine()
+        pipeline = FilterPipeline(RULES)
+        for tick in range(30):
+            snapshots = batch(tick)
+            analysis = self.analyzer.analyze(snapshots)
+            keys = [snapshot.pair_address for snapshot in snapshots]
+            engine.update(keys, [snapshot.price_usd for snapshot in snapshots])
+
+        self.assertEqual(without_timestamps(analysis.indicator_rows), without_timestamps(engine.rows(keys)))
+        expected = pipeline.evaluate(snapshots)
+        flags = dict(zip(analysis.filter_result.pair_addresses, analysis.filter_result.passed.tolist()))
+        self.assertEqual(flags, dict(zip(expected.pair_addresses, expected.passed.tolist())))
+        self.assertEqual(analysis.filter_result.rejections, {"min_liquidity": 5})
+
+    def test_seeded_state_continues_on_the_owning_shard(self):
+        engine = IndicatorEngine()
+        for tick in range(10):
+            engine.update(["seeded"], [2.0 + tick * 0.01])
+
+        self.assertEqual(self.analyzer.seed(engine.rows(["seeded"])), 1)
+        analysis = self.analyzer.analyze([PairSnapshot("seeded", "mint", price_usd=2.5)])
+        engine.update(["seeded"], [2.5])
+
+        self.assertEqual(without_timestamps(analysis.indicator_rows), without_timestamps(engine.rows(["seeded"])))
+        stats = self.analyzer.stats()
+        self.assertEqual(stats["alive"], 3)
+        self.assertEqual(sum(stats["shard_snapshots"]), stats["snapshots"])
+
+
+class TestShardRestart(unittest.TestCase):
+
+    def test_dead_shard_is_replaced(self):
+        analyzer = ShardedAnalyzer(2, rules=RULES, timeout=60)
+        analyzer.start()
+        self.addCleanup(analyzer.stop)
+        analyzer._processes[0].terminate()
+        analyzer._processes[0].join()
+        self.assertFalse(analyzer.alive())
+
+        analyzer.restart()
+
+        self.assertTrue(analyzer.alive())
+        analysis = analyzer.analyze(batch(0))
+        self.assertEqual(len(analysis.filter_result.pair_addresses), 20)
+        self.assertEqual(analyzer.stats()["restarts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
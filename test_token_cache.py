@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from database import Database, dispose_engines
+from pumpfun_fetcher import PumpFunFetcher
+from token_cache import TokenDetailCache, normalize_mint
+
+NOW = 1_700_000_000.0
+
+
+class TestTokenDetailCache(unittest.TestCase):
+
+    def test_keys_are_normalized(self):
+        cache = TokenDetailCache()
+        cache.put(" So1anaMint ", {"mint": "So1anaMint"}, now=NOW)
+        cache.put("0xABCdef", {"address": "0xABCdef"}, now=NOW)
+
+        self.assertEqual(normalize_mint(" So1anaMint "), "So1anaMint")
+        self.assertIsNotNone(cache.get("So1anaMint", now=NOW))
+        self.assertIsNone(cache.get("so1anamint", now=NOW))
+        self.assertIsNotNone(cache.get("0xabcDEF", now=NOW))
+
+    def test_entries_expire(self):
+        cache = TokenDetailCache(ttl=60)
+        cache.put("mint1", {"mint": "mint1"}, now=NOW)
+
+        self.assertIsNotNone(cache.get("mint1", now=NOW + 59))
+        self.assertIsNone(cache.get("mint1", now=NOW + 61))
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_is_evicted_first(self):
+        cache = TokenDetailCache(max_entries=2)
+        cache.put("a", {"mint": "a"}, now=NOW)
+        cache.put("b", {"mint": "b"}, now=NOW)
+        cache.get("a", now=NOW)
+        cache.put("c", {"mint": "c"}, now=NOW)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_byte_budget_bounds_memory(self):
+        cache = TokenDetailCache(max_bytes=1000)
+        for i in range(50):
+            cache.put(f"mint{i}", {"mint": f"mint{i}", "description": "x" * 100}, now=NOW)
+
+        self.assertLessEqual(cache.stats()["bytes"], 1000)
+        self.assertIn("mint49", cache)
+        self.assertNotIn("mint0", cache)
+
+    def test_loader_fills_misses(self):
+        calls = []
+
+        def loader(mint):
+            calls.append(mint)
+            return {"mint": mint} if mint == "stored" else None
+
+        cache = TokenDetailCache(loader=loader)
+
+        self.assertEqual(cache.get("stored", now=NOW), {"mint": "stored"})
+        self.assertEqual(cache.get("stored", now=NOW), {"mint": "stored"})
+        self.assertIsNone(cache.get("unknown", now=NOW))
+        self.assertEqual(calls, ["stored", "unknown"])
+        self.assertEqual(cache.stats()["loads"], 1)
+
+
+class TestFetcherTokenDetails(unittest.TestCase):
+
+    def setUp(self):
+        self.fetcher = PumpFunFetcher(api_key="test")
+
+    def tearDown(self):
+        self.fetcher.close()
+
+    def test_seen_tokens_do_not_refetch(self):
+        feed = [{"mint": f"mint{i}", "name": f"Token {i}"} for i in range(100)]
+        with patch.object(self.fetcher, "get_new_tokens") as refetch:
+            self.fetcher.token_cache.put_many((token["mint"], token) for token in feed)
+            for token in feed:
+                self.assertEqual(self.fetcher.get_token_details(token["mint"]), token)
+            refetch.assert_not_called()
+
+    def test_unseen_token_refetches_once(self):
+        response = Mock(status_code=200, content=b'[{"address": "fresh"}, {"mint": "other"}]', headers={})
+        with patch.object(self.fetcher.session, "get", return_value=response) as get:
+            self.assertEqual(self.fetcher.get_token_details("fresh"), {"address": "fresh"})
+            self.assertEqual(self.fetcher.get_token_details("fresh"), {"address": "fresh"})
+            self.assertEqual(self.fetcher.get_token_details("other"), {"mint": "other"})
+            self.assertEqual(get.call_count, 1)
+
+
+class TestDatabasePayloads(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_payloads_round_trip_through_the_tokens_table(self):
+        for i in range(3):
+            self.db.store_token({"mint": f"mint{i}", "name": f"Token {i}"})
+        self.db.flush()
+
+        cache = TokenDetailCache(loader=self.db.pumpfun_payload)
+        cache.put_many(reversed(self.db.recent_pumpfun_payloads(2)))
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("mint0", cache)
+        self.assertEqual(cache.get("mint0")["name"], "Token 0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from pair_snapshot import PairSnapshot
+from pumpfun_fetcher import normalize_pumpfun_token
+from token_record import (
+    SCHEMA_VERSION, SOURCE_DEXSCREENER, SOURCE_PROFILE, SOURCE_PUMPFUN,
+    TokenRecord, records_from_profiles, records_from_pumpfun,
+)
+
+
+class TestTokenRecord(unittest.TestCase):
+
+    def test_pumpfun_payload_under_any_address_key(self):
+        for key in ("mint", "address", "token_address", "contract_address"):
+            record = TokenRecord.from_pumpfun({key: "Mint111", "usd_market_cap": "1234.5",
+                                               "created_timestamp": 1700000000000})
+            self.assertEqual(record.source, SOURCE_PUMPFUN)
+            self.assertEqual(record.base_token_address, "Mint111")
+            self.assertEqual(record.market_cap_usd, 1234.5)
+            self.assertEqual(record.launched_at, 1700000000.0)
+            self.assertIsNone(record.pair_address)
+
+    def test_pumpfun_row_matches_normalizer(self):
+        token = {"mint": "Mint111", "name": "Test", "symbol": "TST", "market_cap": "n/a"}
+        record = TokenRecord.from_pumpfun(token)
+
+        self.assertEqual(normalize_pumpfun_token(token), record.to_pumpfun_row())
+        self.assertEqual(normalize_pumpfun_token(record), record.to_pumpfun_row())
+        self.assertIsNone(record.market_cap_usd)
+        self.assertIs(record.to_pumpfun_row()["pumpfun_metadata"], token)
+        self.assertIsNone(TokenRecord.from_pumpfun(token, keep_payload=False).metadata)
+
+    def test_unusable_payloads_are_dropped(self):
+        self.assertEqual(len(records_from_pumpfun([{"name": "no mint"}, None, {"mint": "ok"}])), 1)
+        self.assertEqual(len(records_from_profiles([{"chainId": "solana"}, "junk", {"tokenAddress": "t"}])), 1)
+
+    def test_profile_links_become_social_links(self):
+        record = TokenRecord.from_profile({
+            "chainId": "solana",
+            "tokenAddress": "Mint111",
+            "links": [{"type": "twitter", "url": "https://x.com/t"}, {"label": "Website", "url": "https://t.example"}],
+        })
+
+        self.assertEqual(record.source, SOURCE_PROFILE)
+        self.assertEqual(record.social_links_raw, {"twitter": "https://x.com/t", "website": "https://t.example"})
+
+    def test_pair_ids_are_interned_and_typed(self):
+        pairs = [{
+            "pairAddress": f"pair{i}",
+            "chainId": "".join(["sol", "ana"]),
+            "dexId": "".join(["ray", "dium"]),
+            "baseToken": {"address": f"mint{i}"},
+            "priceUsd": "0.5",
+            "holders": "12",
+            "pairCreatedAt": 1700000000000.0,
+        } for i in range(2)]
+        first, second = (PairSnapshot.from_pair(pair) for pair in pairs)
+
+        self.assertIsInstance(first, TokenRecord)
+        self.assertEqual(first.source, SOURCE_DEXSCREENER)
+        self.assertIs(first.chain_id, second.chain_id)
+        self.assertIs(first.dex_id, second.dex_id)
+        self.assertIsInstance(first.price_usd, float)
+        self.assertEqual(first.holders, 12)
+        self.assertIsInstance(first.pair_created_at_ms, int)
+
+    def test_records_have_no_instance_dict(self):
+        record = TokenRecord.from_pumpfun({"mint": "Mint111"})
+        snapshot = PairSnapshot("pair", "mint")
+
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertFalse(hasattr(snapshot, "__dict__"))
+        self.assertEqual(record.to_dict()["schema_version"], SCHEMA_VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()
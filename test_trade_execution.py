@@ -0,0 +1,197 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import select
+
+from database import Database, Token, TradeOrder, dispose_engines
+from pair_snapshot import PairSnapshot
+from trade_execution import (
+    BUY_FAILED, BUYING, CLOSED, FILLED, OPEN, UNKNOWN, Broker, Fill, Order, Position, SimulatedBroker,
+    TradeExecutor, load_positions, store_order
+)
+
+
+def snapshot(pair, price_usd=1.0, price_native=0.01):
+    return PairSnapshot(pair, f"mint-{pair}", chain_id="solana", price_usd=price_usd, price_native=price_native)
+
+
+def drain(executor):
+    """Wait for every order queued so far; the executors under test run one order thread"""
+    executor._pool.submit(lambda: None).result()
+
+
+class RecordingStore:
+    def __init__(self):
+        self.updates = []
+        self._lock = threading.Lock()
+
+    def __call__(self, order, position):
+        with self._lock:
+            self.updates.append((order, position))
+
+    def statuses(self, pair):
+        return [order.status for order, _ in self.updates if order.pair_address == pair]
+
+
+class PendingBroker(SimulatedBroker):
+    """Reports no outcome for an order until its fill is recorded"""
+
+    def order_status(self, order_id):
+        with self._lock:
+            return self.fills.get(order_id)
+
+
+class TestTradeExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.store = RecordingStore()
+
+    def executor(self, broker=None, **kwargs):
+        kwargs.setdefault("max_positions", 2)
+        kwargs.setdefault("max_in_flight", 1)
+        return TradeExecutor(broker or SimulatedBroker(slippage_bps=0), self.store, buy_amount=1.0, **kwargs)
+
+    def test_buy_fills_with_ordered_lifecycle_timestamps(self):
+        executor = self.executor()
+
+        order = executor.buy(snapshot("p1"), discovered_at=100.0)
+        executor.close()
+
+        self.assertEqual(self.store.statuses("p1"), ["pending", "submitted", "filled"])
+        filled, position = self.store.updates[-1]
+        self.assertEqual(filled.order_id, order.order_id)
+        self.assertLessEqual(filled.decided_at, filled.submitted_at)
+        self.assertLessEqual(filled.submitted_at, filled.filled_at)
+        self.assertAlmostEqual(filled.discovery_to_fill, filled.filled_at - 100.0)
+        self.assertEqual((position.state, position.amount_tokens, position.entry_price_usd), (OPEN, 100.0, 1.0))
+        self.assertEqual(executor.stats()["discovery_to_fill"]["count"], 1)
+
+    def test_position_limit_and_one_position_per_pair(self):
+        executor = self.executor()
+
+        self.assertIsNotNone(executor.buy(snapshot("p1")))
+        self.assertIsNone(executor.buy(snapshot("p1")))
+        self.assertIsNotNone(executor.buy(snapshot("p2")))
+        self.assertIsNone(executor.buy(snapshot("p3")))
+        executor.close()
+
+        self.assertEqual(executor.active_positions(), 2)
+        self.assertEqual(executor.stats()["skipped_at_capacity"], 1)
+
+    def test_rejected_buy_frees_the_slot(self):
+        executor = self.executor(SimulatedBroker(reject=lambda order: "insufficient funds"), max_positions=1)
+
+        executor.buy(snapshot("p1"))
+        drain(executor)
+
+        self.assertEqual(executor.positions["p1"].state, BUY_FAILED)
+        self.assertEqual(self.store.updates[-1][0].error, "insufficient funds")
+        self.assertEqual(executor.active_positions(), 0)
+
+    def test_take_profit_and_stop_loss_close_positions(self):
+        executor = self.executor(take_profit=2.0, stop_loss=0.5)
+        executor.buy(snapshot("up"))
+        executor.buy(snapshot("down"))
+        drain(executor)
+
+        orders = executor.check_exits([snapshot("up", 2.5), snapshot("down", 0.8)])
+        executor.close()
+
+        self.assertEqual([order.pair_address for order in orders], ["up"])
+        self.assertEqual(executor.positions["up"].state, CLOSED)
+        self.assertEqual(executor.positions["up"].exit_price_usd, 2.5)
+        self.assertEqual(executor.positions["down"].state, OPEN)
+
+    def test_order_is_not_submitted_unless_stored(self):
+        submitted = []
+
+        def store(order, position):
+            self.store(order, position)
+            if len(self.store.updates) == 1:
+                raise RuntimeError("database is locked")
+
+        executor = TradeExecutor(SimulatedBroker(reject=submitted.append), store, max_in_flight=0)
+        executor.buy(snapshot("p1"))
+
+        self.assertEqual(submitted, [])
+        self.assertEqual(executor.positions["p1"].state, BUY_FAILED)
+        self.assertEqual(executor.stats()["orders_submitted"], 0)
+
+    def test_order_status_is_required(self):
+        with self.assertRaises(NotImplementedError):
+            Broker().order_status("order")
+
+
+class TestTradePersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+        with self.db.session_scope() as session:
+            for pair in ("p1", "p2", "p3"):
+                session.add(Token(pair_address=pair, base_token_address=f"mint-{pair}", chain_id="solana"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def persist(self, order, position):
+        with self.db.session_scope() as session:
+            store_order(session, order, position)
+
+    def test_positions_survive_a_restart(self):
+        broker = SimulatedBroker(slippage_bps=0)
+        executor = TradeExecutor(broker, self.persist, max_positions=5, buy_amount=1.0, max_in_flight=1)
+        executor.buy(snapshot("p1", 2.0, 0.02), discovered_at=50.0)
+        executor.close()
+        # p2 was submitted when the process died; the broker filled it, p3 never reached it
+        for pair in ("p2", "p3"):
+            order = Order(pair, "buy", 1.0, reference_price_usd=1.0, reference_price_native=0.01, status="submitted")
+            self.persist(order, Position(pair, BUYING, last_order_id=order.order_id))
+            if pair == "p2":
+                broker.fills[order.order_id] = Fill(1.0, 100.0, 60.0)
+
+        with self.db.session_scope() as session:
+            token = session.execute(select(Token).where(Token.pair_address == "p1")).scalar_one()
+            self.assertEqual((token.gmgn_trade_status, token.gmgn_buy_price_usd), (OPEN, 2.0))
+            self.assertIsNotNone(token.gmgn_buy_timestamp)
+            stored = session.get(TradeOrder, token.gmgn_last_order_id)
+            self.assertEqual(stored.status, FILLED)
+            self.assertIsNotNone(stored.discovery_to_fill_seconds)
+            items = load_positions(session)
+
+        restored = TradeExecutor(broker, self.persist, max_positions=5)
+        self.assertEqual(restored.restore(items), 2)
+        restored.close()
+
+        self.assertEqual(restored.positions["p1"].amount_tokens, 50.0)
+        self.assertEqual(restored.positions["p2"].state, OPEN)
+        self.assertEqual(restored.positions["p3"].state, BUY_FAILED)
+        self.assertIsNone(restored.buy(snapshot("p1")))
+
+    def test_unresolved_orders_hold_their_slot_until_reconciled(self):
+        broker = PendingBroker(slippage_bps=0)
+        order = Order("p1", "buy", 1.0, reference_price_usd=1.0, reference_price_native=0.01, status="submitted")
+        self.persist(order, Position("p1", BUYING, last_order_id=order.order_id))
+        with self.db.session_scope() as session:
+            items = load_positions(session)
+
+        restored = TradeExecutor(broker, self.persist, max_positions=1, max_in_flight=0)
+        self.assertEqual(restored.restore(items), 1)
+        self.assertEqual(restored.positions["p1"].state, UNKNOWN)
+        self.assertIsNone(restored.buy(snapshot("p2")))
+        self.assertEqual(restored.reconcile(), 1)
+
+        broker.fills[order.order_id] = Fill(1.0, 100.0, 60.0)
+        self.assertEqual(restored.reconcile(), 0)
+        self.assertEqual(restored.positions["p1"].state, OPEN)
+        with self.db.session_scope() as session:
+            token = session.execute(select(Token).where(Token.pair_address == "p1")).scalar_one()
+            self.assertEqual((token.gmgn_trade_status, token.gmgn_buy_price_usd), (OPEN, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone
+
+from database import Database, Token, dispose_engines
+from watchlist import WatchlistScheduler
+
+NOW = 1_700_000_000.0
+
+
+class FakeDexScreener:
+    """Returns one pair per requested address; addresses in `missing` are not returned"""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.prices = {}
+        self.missing = set(missing)
+        self.overrides = {}
+
+    def __call__(self, addresses, chain_id):
+        self.calls.append((list(addresses), chain_id))
+        pairs = []
+        for address in addresses:
+            if address in self.missing:
+                continue
+            pair = {
+                "pairAddress": address,
+                "chainId": chain_id,
+                "baseToken": {"address": f"mint-{address}"},
+                "priceUsd": str(self.prices.get(address, 1.0)),
+                "pairCreatedAt": int((NOW - 7 * 86400) * 1000),
+            }
+            pair.update(self.overrides.get(address, {}))
+            pairs.append(pair)
+        return pairs
+
+
+class TestWatchlistScheduler(unittest.TestCase):
+
+    def make_scheduler(self, fetch, **kwargs):
+        kwargs.setdefault("requests_per_second", 100)
+        return WatchlistScheduler(fetch, min_interval=5, max_interval=300, batch_size=10, **kwargs)
+
+    def test_only_due_pairs_are_fetched_in_batches(self):
+        fetch = FakeDexScreener()
+        scheduler = self.make_scheduler(fetch)
+        for i in range(25):
+            scheduler.watch(f"due{i}", due=NOW - 1)
+        for i in range(10000):
+            scheduler.watch(f"later{i}", due=NOW + 60)
+
+        pairs = scheduler.refresh_due(now=NOW)
+
+        self.assertEqual(len(pairs), 25)
+        self.assertEqual([len(addresses) for addresses, _ in fetch.calls], [25])
+        self.assertEqual(scheduler.stats()["requests"], 3)
+        self.assertEqual(scheduler.refresh_due(now=NOW), [])
+        self.assertEqual(scheduler.next_due(), NOW + 60)
+
+    def test_request_budget_defers_overflow(self):
+        fetch = FakeDexScreener()
+        scheduler = self.make_scheduler(fetch, requests_per_second=2)
+        for i in range(100):
+            scheduler.watch(f"pair{i}", due=NOW - 100 + i)
+
+        self.assertEqual(len(scheduler.refresh_due(now=NOW)), 20)
+        # The oldest due pairs went first
+        self.assertEqual(fetch.calls[0][0][:2], ["pair0", "pair1"])
+
+    def test_interval_adapts_to_activity(self):
+        fetch = FakeDexScreener()
+        fetch.overrides = {
+            "young": {"pairCreatedAt": int((NOW - 60) * 1000)},
+            "volatile": {"priceChange": {"h1": 90}},
+            "busy": {"volume": {"h1": 50000}, "liquidity": {"usd": 10000}},
+        }
+        scheduler = self.make_scheduler(fetch)
+        for pair in ("young", "volatile", "busy", "quiet", "jumpy"):
+            scheduler.watch(pair, due=NOW)
+        scheduler.refresh_due(now=NOW)
+
+        intervals = {pair: entry.interval for pair, entry in scheduler._entries.items()}
+        self.assertEqual(intervals["young"], 5)
+        self.assertEqual(intervals["quiet"], 300)
+        self.assertLess(intervals["volatile"], 40)
+        self.assertLess(intervals["busy"], 60)
+
+        fetch.prices["jumpy"] = 1.2
+        scheduler.refresh_due(now=NOW + 300)
+        self.assertEqual(scheduler._entries["jumpy"].interval, 5)
+
+    def test_missing_pairs_back_off_and_unwatched_are_skipped(self):
+        fetch = FakeDexScreener(missing={"gone"})
+        scheduler = self.make_scheduler(fetch)
+        scheduler.watch("gone", due=NOW)
+        scheduler.watch("dropped", due=NOW)
+        scheduler.unwatch("dropped")
+
+        scheduler.refresh_due(now=NOW)
+        self.assertEqual(fetch.calls, [(["gone"], "solana")])
+        self.assertEqual(scheduler._entries["gone"].interval, 10)
+        self.assertEqual(scheduler.stats()["missing"], 1)
+
+    def test_failed_chain_is_rescheduled_and_other_chains_refresh(self):
+        fetch = FakeDexScreener()
+
+        def flaky(addresses, chain_id):
+            if chain_id == "base":
+                raise ConnectionError("timed out")
+            return fetch(addresses, chain_id)
+
+        scheduler = self.make_scheduler(flaky)
+        scheduler.watch("sol", due=NOW)
+        scheduler.watch("evm", chain_id="base", due=NOW)
+
+        pairs = scheduler.refresh_due(now=NOW)
+        self.assertEqual([pair["pairAddress"] for pair in pairs], ["sol"])
+        self.assertEqual(scheduler.stats()["errors"], 1)
+        self.assertEqual(scheduler._entries["evm"].interval, 5)
+
+        # The failed pair is still scheduled and refreshed once the API recovers
+        scheduler.fetch_pairs = fetch
+        pairs = scheduler.refresh_due(now=NOW + 5)
+        self.assertIn("evm", [pair["pairAddress"] for pair in pairs])
+
+
+class TestWatchlistSync(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        dispose_engines()
+        self.tmp.cleanup()
+
+    def test_sync_follows_continuously_monitor_flag(self):
+        recently = datetime.fromtimestamp(time.time() - 1, tz=timezone.utc)
+        with self.db.session_scope() as session:
+            session.add_all([
+                Token(pair_address="watched", chain_id="base", continuously_monitor=True, last_dexscreener_fetch_at=recently),
+                Token(pair_address="ignored", continuously_monitor=False),
+            ])
+        scheduler = WatchlistScheduler(FakeDexScreener(), min_interval=5)
+
+        with self.db.session_scope() as session:
+            self.assertEqual(scheduler.sync_from_db(session), 1)
+        self.assertIn("watched", scheduler)
+        self.assertNotIn("ignored", scheduler)
+        self.assertEqual(scheduler._entries["watched"].chain_id, "base")
+        # Recently fetched pairs are not due immediately
+        self.assertGreater(scheduler.next_due(), time.time())
+
+        with self.db.session_scope() as session:
+            session.query(Token).filter_by(pair_address="watched").update({"continuously_monitor": False})
+        with self.db.session_scope() as session:
+            scheduler.sync_from_db(session)
+        self.assertEqual(len(scheduler), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
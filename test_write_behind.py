@@ -0,0 +1,103 @@
+import threading
+import time
+import unittest
+
+from write_behind import WriteBehindWriter
+
+
+class TestWriteBehindWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def record(self, batch):
+        with self.lock:
+            self.batches.append(list(batch))
+
+    def test_flushes_on_batch_size(self):
+        writer = WriteBehindWriter(self.record, batch_size=3, flush_interval=60)
+        for i in range(7):
+            writer.put(i)
+        writer.flush(timeout=5)
+        writer.close(timeout=5)
+        self.assertEqual(self.batches, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_flushes_on_interval(self):
+        writer = WriteBehindWriter(self.record, batch_size=1000, flush_interval=0.05)
+        writer.put("a")
+        deadline = time.time() + 5
+        while not self.batches and time.time() < deadline:
+            time.sleep(0.01)
+        writer.close(timeout=5)
+        self.assertEqual(self.batches, [["a"]])
+
+    def test_close_flushes_remaining_items(self):
+        writer = WriteBehindWriter(self.record, batch_size=1000, flush_interval=60)
+        for i in range(10):
+            writer.put(i)
+        writer.close(timeout=5)
+        self.assertEqual(sum(len(batch) for batch in self.batches), 10)
+        stats = writer.stats()
+        self.assertEqual(stats["items_flushed"], 10)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["flush_latency"]["count"], stats["flushes"])
+        with self.assertRaises(RuntimeError):
+            writer.put(11)
+
+    def test_flush_errors_are_counted(self):
+        def fail(batch):
+            raise ValueError("disk full")
+
+        writer = WriteBehindWriter(fail, batch_size=1)
+        writer.put(1)
+        writer.close(timeout=5)
+        self.assertEqual(writer.stats()["flush_errors"], 1)
+
+    def test_failed_batches_are_retried_and_reported(self):
+        down = threading.Event()
+        down.set()
+
+        def write(batch):
+            if down.is_set():
+                raise OSError("database is locked")
+            self.record(batch)
+
+        writer = WriteBehindWriter(write, batch_size=2, flush_interval=60, retry_delay=0.01, max_retry_delay=0.02)
+        writer.put(1)
+        writer.put(2)
+        self.assertFalse(writer.flush(timeout=5))
+        down.clear()
+        deadline = time.time() + 5
+        while writer.stats()["failing"] and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(writer.flush(timeout=5))
+        writer.close(timeout=5)
+
+        self.assertEqual(self.batches, [[1, 2]])
+        stats = writer.stats()
+        self.assertEqual((stats["flush_errors"], stats["items_dropped"]), (1, 0))
+        self.assertGreaterEqual(stats["retries"], 1)
+
+    def test_close_gives_a_failing_batch_one_last_attempt(self):
+        attempts = []
+
+        def fail(batch):
+            attempts.append(list(batch))
+            raise OSError("disk full")
+
+        writer = WriteBehindWriter(fail, batch_size=1, retry_delay=60)
+        writer.put(1)
+        deadline = time.time() + 5
+        while not attempts and time.time() < deadline:
+            time.sleep(0.01)
+        start = time.time()
+        writer.close(timeout=5)
+
+        self.assertLess(time.time() - start, 5)
+        self.assertEqual(attempts, [[1], [1]])
+        self.assertEqual(writer.stats()["items_dropped"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
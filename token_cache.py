@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import fast_json
+
+logger = logging.getLogger(__name__)
+
+def normalize_mint(address: Any) -> Optional[str]:
+    """Canonical cache key for a mint address: trimmed, and lowercased for 0x (EVM) addresses"""
+    if not address:
+        return None
+    address = str(address).strip()
+    # Solana base58 addresses are case-sensitive; hex addresses are not
+    return address.lower() if address[:2].lower() == '0x' else address or None
+
+class _Entry:
+    __slots__ = ('token', 'size', 'expires_at')
+
+    def __init__(self, token: Dict[str, Any], size: int, expires_at: float):
+        self.token = token
+        self.size = size
+        self.expires_at = expires_at
+
+class TokenDetailCache:
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0, max_bytes: int = 64 * 1024 * 1024,
+                 loader: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None):
+        """
+        LRU cache of pump.fun token payloads keyed by normalized mint address
+
+        Every payload seen in a get_new_tokens response is stored, so detail lookups
+        are a dict hit instead of a feed refetch and scan. Entries expire after ttl
+        seconds; the least recently used ones are evicted once max_entries or
+        max_bytes (serialized payload size) is exceeded. On a miss the optional
+        loader (e.g. Database.pumpfun_payload) is consulted before giving up.
+
+        Args:
+            max_entries: Maximum number of cached payloads
+            ttl: Seconds a payload stays valid
+            max_bytes: Upper bound on the summed serialized size of cached payloads (0 disables)
+            loader: Callable (mint) -> payload for tokens not in memory
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.loader = loader
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, mint: str) -> bool:
+        return normalize_mint(mint) in self._entries
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, key: str, token: Dict[str, Any], now: float) -> None:
+        size = len(fast_json.dumps(token))
+        self._discard(key)
+        self._entries[key] = _Entry(token, size, now + self.ttl)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes and self._bytes > self.max_bytes)):
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    def put(self, mint: str, token: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """Cache one payload; returns False when there is no mint address or payload"""
+        key = normalize_mint(mint)
+        if key is None or not isinstance(token, dict):
+            return False
+        with self._lock:
+            self._store(key, token, now if now is not None else time.time())
+        return True
+
+    def put_many(self, items: Iterable[Tuple[str, Dict[str, Any]]], now: Optional[float] = None) -> int:
+        """Cache (mint, payload) pairs; returns how many were stored"""
+        now = now if now is not None else time.time()
+        return sum(1 for mint, token in items if self.put(mint, token, now))
+
+    def get(self, mint: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Payload for a mint, from memory or the loader; None when unknown"""
+        key = normalize_mint(mint)
+        if key is None:
+            return None
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.token
+                self._discard(key)
+                self.expirations += 1
+            self.misses += 1
+        if self.loader is None:
+            return None
+        try:
+            token = self.loader(key)
+        except Exception as e:
+            logger.error(f"Token detail loader failed for {key}: {e}")
+            return None
+        if token is not None:
+            self.loads += 1
+            with self._lock:
+                self._store(key, token, now)
+        return token
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
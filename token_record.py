@@ -0,0 +1,192 @@
+import logging
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever a field is added, removed or changes meaning
+SCHEMA_VERSION = 1
+
+SOURCE_PUMPFUN = "pumpfun"
+SOURCE_DEXSCREENER = "dexscreener"
+SOURCE_PROFILE = "dexscreener_profile"
+
+# Payload keys that may carry the token mint address, in order of preference
+MINT_ADDRESS_KEYS = ('mint', 'address', 'token_address', 'contract_address', 'mint_address')
+# Payload keys that may carry the launch time of a pump.fun token
+CREATED_AT_KEYS = ('created_timestamp', 'createdAt', 'created_at', 'timestamp')
+
+def extract_mint_address(token: Dict[str, Any]) -> Optional[str]:
+    """Return the mint address from a pump.fun token payload, whichever key it uses"""
+    if not isinstance(token, dict):
+        return None
+    for key in MINT_ADDRESS_KEYS:
+        value = token.get(key)
+        if value:
+            return str(value)
+    return None
+
+def payload_created_at(token: Dict[str, Any]) -> Optional[float]:
+    """Return the launch time of a token payload as epoch seconds, if present"""
+    for key in CREATED_AT_KEYS:
+        value = token.get(key)
+        if value is None:
+            continue
+        try:
+            ts = float(value)
+        except (TypeError, ValueError):
+            continue
+        # pump.fun reports milliseconds
+        return ts / 1000 if ts > 1e11 else ts
+    return None
+
+def _number(value: Any) -> Optional[float]:
+    """DexScreener sends numbers as JSON numbers or strings; missing, empty and 0 map to None"""
+    return float(value) if value else None
+
+def _to_float(value: Any) -> Optional[float]:
+    """Lenient conversion for pump.fun payloads: anything unparseable maps to None"""
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+def _intern(value: Any) -> Optional[str]:
+    """Chain and DEX ids repeat across every record; share one string object per id"""
+    return sys.intern(value) if isinstance(value, str) and value else None
+
+def _social_links(pair: Dict) -> Optional[Dict[str, str]]:
+    links = {}
+    info = pair.get('info')
+    if info:
+        websites = info.get('websites') or []
+        if isinstance(websites, list) and websites and isinstance(websites[0], dict) and websites[0].get('url'):
+            links['website'] = websites[0]['url']
+        for social in info.get('socials') or []:
+            if isinstance(social, dict) and social.get('label') and social.get('url'):
+                links[social['label'].lower()] = social['url']
+
+    top_level_links = pair.get('links')
+    if isinstance(top_level_links, dict):
+        for key, url in top_level_links.items():
+            if url and key not in links:
+                links[key.lower()] = url
+    elif isinstance(top_level_links, list):
+        # Token profiles list links as [{"type": "twitter", "url": ...}, {"label": "Website", "url": ...}]
+        for link in top_level_links:
+            if isinstance(link, dict) and link.get('url'):
+                key = (link.get('type') or link.get('label') or 'website').lower()
+                links.setdefault(key, link['url'])
+    return links or None
+
+class TokenRecord:
+    """
+    Canonical, typed record for one token observation from any source
+
+    Every payload shape (pump.fun REST, DexScreener pairs, token profiles) is
+    converted once by its from_* constructor: addresses are resolved, numbers are
+    floats (holders and timestamps ints), and chain/DEX ids are interned. Fields a
+    source does not provide are None. SCHEMA_VERSION tags the layout.
+    """
+    __slots__ = (
+        'source', 'pair_address', 'chain_id', 'dex_id', 'url',
+        'base_token_address', 'base_token_name', 'base_token_symbol', 'quote_token_symbol', 'description',
+        'price_usd', 'price_native',
+        'volume_h24', 'volume_h6', 'volume_h1',
+        'price_change_h24', 'price_change_h6', 'price_change_h1',
+        'liquidity_usd', 'fdv', 'market_cap_usd', 'holders',
+        'pair_created_at_ms', 'launched_at_ms', 'social_links_raw', 'metadata', 'fetched_at',
+    )
+    schema_version = SCHEMA_VERSION
+
+    def __init__(self, pair_address: Optional[str], base_token_address: str, **fields):
+        # Subclasses add no slots, so TokenRecord.__slots__ lists every field
+        for name in TokenRecord.__slots__:
+            setattr(self, name, fields.get(name))
+        self.pair_address = pair_address
+        self.base_token_address = base_token_address
+
+    @classmethod
+    def from_pumpfun(cls, token: Any, keep_payload: bool = True) -> Optional["TokenRecord"]:
+        """
+        Convert one pump.fun token payload
+
+        Args:
+            token: Token dict as returned by get_new_tokens()
+            keep_payload: Keep the raw dict as metadata (needed for the pumpfun_metadata column)
+
+        Returns:
+            TokenRecord, or None if the payload carries no mint address
+        """
+        mint = extract_mint_address(token)
+        if not mint:
+            return None
+        created_at = payload_created_at(token)
+        return cls(
+            None,
+            mint,
+            source=SOURCE_PUMPFUN,
+            chain_id=_intern("solana"),
+            base_token_name=token.get('name'),
+            base_token_symbol=token.get('symbol'),
+            description=token.get('description'),
+            market_cap_usd=_to_float(token.get('usd_market_cap', token.get('market_cap'))),
+            launched_at_ms=int(created_at * 1000) if created_at is not None else None,
+            metadata=token if keep_payload else None,
+        )
+
+    @classmethod
+    def from_profile(cls, profile: Any) -> Optional["TokenRecord"]:
+        """
+        Convert one DexScreener token-profile item
+
+        Returns:
+            TokenRecord, or None if the item has no tokenAddress
+        """
+        if not isinstance(profile, dict) or not profile.get('tokenAddress'):
+            return None
+        return cls(
+            None,
+            profile['tokenAddress'],
+            source=SOURCE_PROFILE,
+            chain_id=_intern(profile.get('chainId')),
+            url=profile.get('url'),
+            description=profile.get('description'),
+            social_links_raw=_social_links(profile),
+        )
+
+    @property
+    def launched_at(self) -> Optional[float]:
+        return self.launched_at_ms / 1000 if self.launched_at_ms is not None else None
+
+    def to_pumpfun_row(self) -> Dict[str, Any]:
+        """Column values for a pump.fun launch in the tokens table"""
+        return {
+            "pumpfun_mint_address": self.base_token_address,
+            "base_token_address": self.base_token_address,
+            "base_token_name": self.base_token_name,
+            "base_token_symbol": self.base_token_symbol,
+            "description": self.description,
+            "chain_id": self.chain_id,
+            "is_pumpfun_launch": True,
+            "market_cap_usd": self.market_cap_usd,
+            "pumpfun_metadata": self.metadata,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Every field plus the schema version, e.g. for serialization"""
+        record = {name: getattr(self, name) for name in TokenRecord.__slots__ if name != 'metadata'}
+        record["schema_version"] = self.schema_version
+        return record
+
+    def __repr__(self) -> str:
+        return (f"{type(self).__name__}({self.source!r}, {self.base_token_address!r}, "
+                f"{self.base_token_symbol!r}, pair={self.pair_address!r})")
+
+def records_from_pumpfun(tokens: Iterable[Any]) -> List[TokenRecord]:
+    """Convert pump.fun payloads, dropping those without a mint address"""
+    return [record for record in map(TokenRecord.from_pumpfun, tokens) if record is not None]
+
+def records_from_profiles(profiles: Iterable[Any]) -> List[TokenRecord]:
+    """Convert token-profile items, dropping those without a tokenAddress"""
+    return [record for record in map(TokenRecord.from_profile, profiles) if record is not None]
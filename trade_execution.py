@@ -0,0 +1,526 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from database import Token, TradeOrder
+from metrics import LatencyTracker
+from pair_snapshot import PairSnapshot
+
+logger = logging.getLogger(__name__)
+
+BUY = "buy"
+SELL = "sell"
+
+# Order status (trade_orders.status)
+PENDING = "pending"
+SUBMITTED = "submitted"
+FILLED = "filled"
+FAILED = "failed"
+
+# Position state (tokens.gmgn_trade_status)
+BUYING = "buying"
+OPEN = "open"
+SELLING = "selling"
+CLOSED = "closed"
+BUY_FAILED = "buy_failed"
+UNKNOWN = "unknown"  # In flight at a restart and not yet settled by the broker
+ACTIVE_STATES = (BUYING, OPEN, SELLING, UNKNOWN)
+
+class BrokerError(Exception):
+    """Order rejected or not executable by the broker"""
+    pass
+
+def _datetime(ts: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(ts, tz=timezone.utc) if ts is not None else None
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+class Fill:
+    __slots__ = ('price_usd', 'amount_tokens', 'filled_at', 'broker_order_id')
+
+    def __init__(self, price_usd: float, amount_tokens: float, filled_at: Optional[float] = None,
+                 broker_order_id: Optional[str] = None):
+        self.price_usd = price_usd
+        self.amount_tokens = amount_tokens
+        self.filled_at = filled_at
+        self.broker_order_id = broker_order_id
+
+class Order:
+    """One order and its lifecycle timestamps (epoch seconds)"""
+    __slots__ = ('order_id', 'pair_address', 'token_address', 'chain_id', 'side', 'amount',
+                 'reference_price_usd', 'reference_price_native', 'status', 'fill_price_usd',
+                 'fill_amount_tokens', 'broker_order_id', 'error',
+                 'discovered_at', 'decided_at', 'submitted_at', 'filled_at')
+
+    def __init__(self, pair_address: str, side: str, amount: float, order_id: Optional[str] = None,
+                 token_address: Optional[str] = None, chain_id: Optional[str] = None,
+                 reference_price_usd: Optional[float] = None, reference_price_native: Optional[float] = None,
+                 status: str = PENDING, discovered_at: Optional[float] = None, decided_at: Optional[float] = None):
+        self.order_id = order_id or uuid.uuid4().hex
+        self.pair_address = pair_address
+        self.token_address = token_address
+        self.chain_id = chain_id
+        self.side = side
+        self.amount = amount
+        self.reference_price_usd = reference_price_usd
+        self.reference_price_native = reference_price_native
+        self.status = status
+        self.fill_price_usd: Optional[float] = None
+        self.fill_amount_tokens: Optional[float] = None
+        self.broker_order_id: Optional[str] = None
+        self.error: Optional[str] = None
+        self.discovered_at = discovered_at
+        self.decided_at = decided_at
+        self.submitted_at: Optional[float] = None
+        self.filled_at: Optional[float] = None
+
+    def copy(self) -> "Order":
+        order = Order.__new__(Order)
+        for name in Order.__slots__:
+            setattr(order, name, getattr(self, name))
+        return order
+
+    @property
+    def discovery_to_fill(self) -> Optional[float]:
+        if self.filled_at is None or self.discovered_at is None:
+            return None
+        return self.filled_at - self.discovered_at
+
+    def to_row(self) -> Dict[str, Any]:
+        row = {name: getattr(self, name) for name in Order.__slots__}
+        for name in ('discovered_at', 'decided_at', 'submitted_at', 'filled_at'):
+            row[name] = _datetime(row[name])
+        row['discovery_to_fill_seconds'] = self.discovery_to_fill
+        return row
+
+    @classmethod
+    def from_row(cls, row: TradeOrder) -> "Order":
+        order = cls.__new__(cls)
+        for name in Order.__slots__:
+            value = getattr(row, name)
+            setattr(order, name, _epoch(value) if isinstance(value, datetime) else value)
+        return order
+
+class Position:
+    """Holding in one pair, mirrored to the tokens.gmgn_* columns"""
+    __slots__ = ('pair_address', 'token_address', 'chain_id', 'state', 'amount_tokens',
+                 'entry_price_usd', 'exit_price_usd', 'last_order_id')
+
+    def __init__(self, pair_address: str, state: str, token_address: Optional[str] = None,
+                 chain_id: Optional[str] = None, amount_tokens: Optional[float] = None,
+                 entry_price_usd: Optional[float] = None, exit_price_usd: Optional[float] = None,
+                 last_order_id: Optional[str] = None):
+        self.pair_address = pair_address
+        self.state = state
+        self.token_address = token_address
+        self.chain_id = chain_id
+        self.amount_tokens = amount_tokens
+        self.entry_price_usd = entry_price_usd
+        self.exit_price_usd = exit_price_usd
+        self.last_order_id = last_order_id
+
+    def copy(self) -> "Position":
+        position = Position.__new__(Position)
+        for name in Position.__slots__:
+            setattr(position, name, getattr(self, name))
+        return position
+
+class Broker:
+    """
+    Execution venue interface; submit() is called from the executor's order threads
+    and must be thread-safe
+    """
+    name = "broker"
+
+    def submit(self, order: Order) -> Fill:
+        """Execute an order, blocking until it fills; raise BrokerError when it cannot"""
+        raise NotImplementedError
+
+    def order_status(self, order_id: str) -> Optional[Fill]:
+        """
+        Fill of an earlier order, or None while its outcome is still open; raise
+        BrokerError when the order failed or never reached the broker
+        """
+        raise NotImplementedError
+
+class SimulatedBroker(Broker):
+    name = "simulated"
+
+    def __init__(self, latency: float = 0.0, slippage_bps: float = 100.0,
+                 reject: Optional[Callable[[Order], Optional[str]]] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        """
+        Local broker filling every order at its reference price plus slippage
+
+        Args:
+            latency: Seconds each submit() takes
+            slippage_bps: Price moves against the order by this many basis points
+            reject: Optional callable (order) -> reason string to reject an order
+            clock: Time source for fill timestamps
+            sleep: Used to wait out latency
+        """
+        self.latency = latency
+        self.slippage_bps = slippage_bps
+        self.reject = reject
+        self.clock = clock
+        self.sleep = sleep
+        self.fills: Dict[str, Fill] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, order: Order) -> Fill:
+        if self.latency > 0:
+            self.sleep(self.latency)
+        reason = self.reject(order) if self.reject is not None else None
+        if reason:
+            raise BrokerError(reason)
+        if not order.reference_price_usd:
+            raise BrokerError("no reference price")
+        slip = self.slippage_bps / 10000.0
+        factor = 1 + slip if order.side == BUY else 1 - slip
+        if order.side == BUY:
+            if not order.reference_price_native:
+                raise BrokerError("no native price to size the buy")
+            amount_tokens = order.amount / (order.reference_price_native * factor)
+        else:
+            amount_tokens = order.amount
+        fill = Fill(order.reference_price_usd * factor, amount_tokens, self.clock(), f"sim-{order.order_id}")
+        with self._lock:
+            self.fills[order.order_id] = fill
+        return fill
+
+    def order_status(self, order_id: str) -> Optional[Fill]:
+        # submit() settles every order before returning, so an order without a fill never executed
+        with self._lock:
+            fill = self.fills.get(order_id)
+        if fill is None:
+            raise BrokerError("no such order")
+        return fill
+
+class TradeExecutor:
+    def __init__(self, broker: Broker, store: Callable[[Order, Position], None],
+                 max_positions: int = 5, buy_amount: float = 0.1, max_in_flight: int = 4,
+                 take_profit: Optional[float] = 2.0, stop_loss: Optional[float] = 0.5,
+                 clock: Callable[[], float] = time.time):
+        """
+        Order lifecycle for pairs that passed the DEX filters
+
+        buy() decides synchronously (one position per pair, at most max_positions
+        buying/open/selling at once) and hands the order to a pool of max_in_flight
+        threads that call the broker. Every state change is passed to store as
+        copies of the order and its position, so the caller can persist it through
+        its own single database writer. The first call for a new order must commit
+        it before returning: the broker is only called once it succeeds, so every
+        order that may have executed has a row to recover. Discovery, decision,
+        submit and fill times are kept on each order, and discovery-to-fill latency
+        is tracked.
+
+        Args:
+            broker: Broker executing the orders
+            store: Callable (order, position) receiving every state change
+            max_positions: Positions buying, open or selling at the same time
+            buy_amount: Quote amount (e.g. SOL) spent per buy
+            max_in_flight: Orders submitted to the broker concurrently; 0 runs each
+                order inline in the caller's thread (deterministic replays)
+            take_profit: Sell once price reaches this multiple of the entry price
+            stop_loss: Sell once price falls to this multiple of the entry price
+            clock: Time source for lifecycle timestamps
+        """
+        self.broker = broker
+        self.store = store
+        self.max_positions = max_positions
+        self.buy_amount = buy_amount
+        self.max_in_flight = max_in_flight
+        self.take_profit = take_profit
+        self.stop_loss = stop_loss
+        self.clock = clock
+
+        self.positions: Dict[str, Position] = {}
+        self._unresolved: Dict[str, Order] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="order") if max_in_flight > 0 else None
+
+        self.orders_submitted = 0
+        self.orders_filled = 0
+        self.orders_failed = 0
+        self.skipped_at_capacity = 0
+        self.discovery_to_fill = LatencyTracker()
+        self.decision_to_fill = LatencyTracker()
+        self.submit_to_fill = LatencyTracker()
+
+    def active_positions(self) -> int:
+        with self._lock:
+            return sum(1 for position in self.positions.values() if position.state in ACTIVE_STATES)
+
+    def _store(self, order: Order, position: Position) -> None:
+        try:
+            self.store(order.copy(), position.copy())
+        except Exception as e:
+            logger.error(f"Error storing order {order.order_id}: {e}")
+
+    def buy(self, snapshot: PairSnapshot, discovered_at: Optional[float] = None) -> Optional[Order]:
+        """
+        Open a position in a pair unless it was traded before or all slots are taken
+
+        Args:
+            snapshot: Latest snapshot of the pair; its prices are the order's reference
+            discovered_at: When the data that triggered the decision was observed
+
+        Returns:
+            The submitted order, or None when no order was placed
+        """
+        decided_at = self.clock()
+        if not snapshot.price_usd:
+            return None
+        with self._lock:
+            if snapshot.pair_address in self.positions:
+                return None
+            if sum(1 for p in self.positions.values() if p.state in ACTIVE_STATES) >= self.max_positions:
+                self.skipped_at_capacity += 1
+                return None
+            order = Order(snapshot.pair_address, BUY, self.buy_amount, token_address=snapshot.base_token_address,
+                          chain_id=snapshot.chain_id, reference_price_usd=snapshot.price_usd,
+                          reference_price_native=snapshot.price_native,
+                          discovered_at=discovered_at if discovered_at is not None else decided_at,
+                          decided_at=decided_at)
+            position = Position(snapshot.pair_address, BUYING, snapshot.base_token_address, snapshot.chain_id,
+                                last_order_id=order.order_id)
+            self.positions[snapshot.pair_address] = position
+        self._dispatch(order, position)
+        return order
+
+    def sell(self, snapshot: PairSnapshot, discovered_at: Optional[float] = None) -> Optional[Order]:
+        """Close an open position at the snapshot's price; None if the pair has no open position"""
+        decided_at = self.clock()
+        with self._lock:
+            position = self.positions.get(snapshot.pair_address)
+            if position is None or position.state != OPEN:
+                return None
+            order = Order(snapshot.pair_address, SELL, position.amount_tokens, token_address=position.token_address,
+                          chain_id=position.chain_id, reference_price_usd=snapshot.price_usd,
+                          reference_price_native=snapshot.price_native,
+                          discovered_at=discovered_at if discovered_at is not None else decided_at,
+                          decided_at=decided_at)
+            position.state = SELLING
+            position.last_order_id = order.order_id
+        self._dispatch(order, position)
+        return order
+
+    def check_exits(self, snapshots: Iterable[PairSnapshot], observed_at: Optional[float] = None) -> List[Order]:
+        """Sell open positions whose price crossed take_profit or stop_loss"""
+        with self._lock:
+            entries = {pair: p.entry_price_usd for pair, p in self.positions.items() if p.state == OPEN and p.entry_price_usd}
+        orders = []
+        for snapshot in snapshots:
+            entry_price = entries.get(snapshot.pair_address)
+            if entry_price is None or not snapshot.price_usd:
+                continue
+            ratio = snapshot.price_usd / entry_price
+            if (self.take_profit is not None and ratio >= self.take_profit) or \
+                    (self.stop_loss is not None and ratio <= self.stop_loss):
+                order = self.sell(snapshot, observed_at)
+                if order is not None:
+                    orders.append(order)
+        return orders
+
+    def _dispatch(self, order: Order, position: Position) -> None:
+        try:
+            self.store(order.copy(), position.copy())
+        except Exception as e:
+            logger.error(f"Error storing order {order.order_id}: {e}")
+            self._fail(order, f"not persisted: {e}")
+            return
+        if self._pool is None:
+            self._execute(order)
+        else:
+            self._pool.submit(self._execute, order)
+
+    def _execute(self, order: Order) -> None:
+        order.submitted_at = self.clock()
+        order.status = SUBMITTED
+        with self._lock:
+            self.orders_submitted += 1
+            position = self.positions[order.pair_address]
+        self._store(order, position)
+        try:
+            fill = self.broker.submit(order)
+        except Exception as e:
+            self._fail(order, str(e) or type(e).__name__)
+            return
+        self._apply_fill(order, fill)
+
+    def _apply_fill(self, order: Order, fill: Fill) -> None:
+        order.status = FILLED
+        order.filled_at = fill.filled_at if fill.filled_at is not None else self.clock()
+        order.fill_price_usd = fill.price_usd
+        order.fill_amount_tokens = fill.amount_tokens
+        order.broker_order_id = fill.broker_order_id
+        with self._lock:
+            position = self.positions[order.pair_address]
+            if order.side == BUY:
+                position.state = OPEN
+                position.amount_tokens = fill.amount_tokens
+                position.entry_price_usd = fill.price_usd
+            else:
+                position.state = CLOSED
+                position.exit_price_usd = fill.price_usd
+            self.orders_filled += 1
+            if order.discovered_at is not None:
+                self.discovery_to_fill.add(order.filled_at - order.discovered_at)
+            if order.decided_at is not None:
+                self.decision_to_fill.add(order.filled_at - order.decided_at)
+            if order.submitted_at is not None:
+                self.submit_to_fill.add(order.filled_at - order.submitted_at)
+        latency = order.discovery_to_fill
+        logger.info(f"Filled {order.side} of {order.pair_address} at {fill.price_usd}"
+                    + (f", {latency:.3f}s after discovery" if latency is not None else ""))
+        self._store(order, position)
+
+    def _fail(self, order: Order, error: str) -> None:
+        order.status = FAILED
+        order.error = error
+        with self._lock:
+            position = self.positions[order.pair_address]
+            position.state = BUY_FAILED if order.side == BUY else OPEN
+            if order.side == SELL:
+                position.last_order_id = order.order_id
+            self.orders_failed += 1
+        logger.warning(f"{order.side} {order.pair_address} failed: {error}")
+        self._store(order, position)
+
+    def restore(self, items: Iterable[Tuple[Position, Optional[Order]]]) -> int:
+        """
+        Reload positions saved before a restart (see load_positions)
+
+        Orders that were in flight are reconciled with broker.order_status(): a fill
+        is applied and an order the broker rejects as failed is marked failed. Any
+        other order leaves its position UNKNOWN, which holds a position slot until
+        reconcile() settles it.
+
+        Returns:
+            Number of active positions after restoring
+        """
+        pending = []
+        with self._lock:
+            for position, order in items:
+                self.positions[position.pair_address] = position
+                if position.state in (BUYING, SELLING, UNKNOWN) and order is not None:
+                    pending.append(order)
+        for order in pending:
+            self._settle(order)
+        return self.active_positions()
+
+    def reconcile(self) -> int:
+        """
+        Ask the broker again about orders restore() could not settle
+
+        Returns:
+            Number of orders still unresolved
+        """
+        with self._lock:
+            orders = list(self._unresolved.values())
+        for order in orders:
+            self._settle(order)
+        with self._lock:
+            return len(self._unresolved)
+
+    def _settle(self, order: Order) -> None:
+        try:
+            fill = self.broker.order_status(order.order_id)
+        except BrokerError as e:
+            with self._lock:
+                self._unresolved.pop(order.pair_address, None)
+            self._fail(order, f"{e} after restart")
+            return
+        except Exception as e:
+            logger.warning(f"Could not reconcile order {order.order_id}: {e}")
+            fill = None
+        with self._lock:
+            position = self.positions[order.pair_address]
+            if fill is None:
+                first = order.pair_address not in self._unresolved
+                self._unresolved[order.pair_address] = order
+                position.state = UNKNOWN
+            else:
+                self._unresolved.pop(order.pair_address, None)
+        if fill is not None:
+            self._apply_fill(order, fill)
+        elif first:
+            logger.warning(f"{order.side} {order.pair_address} unresolved after restart, holding its position")
+            self._store(order, position)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting orders; waits for in-flight broker calls by default"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states: Dict[str, int] = {}
+            for position in self.positions.values():
+                states[position.state] = states.get(position.state, 0) + 1
+            return {
+                "broker": self.broker.name,
+                "positions": states,
+                "orders_submitted": self.orders_submitted,
+                "orders_filled": self.orders_filled,
+                "orders_failed": self.orders_failed,
+                "orders_unresolved": len(self._unresolved),
+                "skipped_at_capacity": self.skipped_at_capacity,
+                "discovery_to_fill": self.discovery_to_fill.summary(),
+                "decision_to_fill": self.decision_to_fill.summary(),
+                "submit_to_fill": self.submit_to_fill.summary(),
+            }
+
+def store_order(db: Session, order: Order, position: Position) -> None:
+    """
+    Persist an order and mirror its position onto the pair's gmgn_* columns
+
+    Args:
+        db: Session to write through; the caller commits
+        order: Order as passed to TradeExecutor's store callback
+        position: Position of the order's pair after the change
+    """
+    db.merge(TradeOrder(**order.to_row()))
+    values = {"gmgn_trade_status": position.state, "gmgn_last_order_id": order.order_id}
+    if order.status == FILLED:
+        prefix = "gmgn_buy" if order.side == BUY else "gmgn_sell"
+        values[f"{prefix}_price_usd"] = order.fill_price_usd
+        values[f"{prefix}_timestamp"] = _datetime(order.filled_at)
+    db.execute(update(Token).where(Token.pair_address == order.pair_address).values(**values))
+
+def load_positions(db: Session) -> List[Tuple[Position, Optional[Order]]]:
+    """
+    Positions recorded in the tokens table, each with its last order
+
+    Returns:
+        (position, last order or None) for every pair with a gmgn_trade_status
+    """
+    rows = db.execute(
+        select(Token, TradeOrder)
+        .outerjoin(TradeOrder, TradeOrder.order_id == Token.gmgn_last_order_id)
+        .where(Token.gmgn_trade_status.is_not(None), Token.pair_address.is_not(None))
+    ).all()
+    items = []
+    for token, order_row in rows:
+        order = Order.from_row(order_row) if order_row is not None else None
+        if order is None:
+            amount = None
+        elif order.side == BUY:
+            amount = order.fill_amount_tokens
+        else:
+            amount = order.amount
+        position = Position(token.pair_address, token.gmgn_trade_status, token.base_token_address, token.chain_id,
+                            amount_tokens=amount, entry_price_usd=token.gmgn_buy_price_usd,
+                            exit_price_usd=token.gmgn_sell_price_usd, last_order_id=token.gmgn_last_order_id)
+        items.append((position, order))
+    return items
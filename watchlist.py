@@ -0,0 +1,254 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import Token
+from pair_snapshot import PairSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Pairs younger than this are refreshed at the minimum interval
+NEW_PAIR_AGE = 3600.0
+# Hourly price change (percent) counted as one unit of heat
+VOLATILITY_SCALE = 10.0
+# A move of this fraction between two refreshes forces the minimum interval
+JUMP_THRESHOLD = 0.05
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class _WatchEntry:
+    __slots__ = ('pair_address', 'chain_id', 'interval', 'due', 'last_price', 'generation')
+
+    def __init__(self, pair_address: str, chain_id: str, interval: float, due: float):
+        self.pair_address = pair_address
+        self.chain_id = chain_id
+        self.interval = interval
+        self.due = due
+        self.last_price: Optional[float] = None
+        self.generation = 0
+
+class WatchlistScheduler:
+    def __init__(self, fetch_pairs: Callable[[List[str], str], List[Dict[str, Any]]],
+                 min_interval: float = 5.0, max_interval: float = 300.0,
+                 requests_per_second: float = 2.0, batch_size: int = 30):
+        """
+        Refresh schedule for pairs flagged continuously_monitor
+
+        Pairs sit in a heap keyed by their next due time, so each tick only touches
+        pairs that are due. Due pairs are refreshed in batches of batch_size, at most
+        requests_per_second batches per second across the whole watchlist; pairs that
+        do not fit the budget stay due and go first on the next tick. After each
+        refresh a pair's interval is derived from its age, hourly volatility, volume
+        turnover and the price move since the previous refresh.
+
+        Args:
+            fetch_pairs: Callable (pair_addresses, chain_id) -> pair dicts, e.g. fetch_pairs_by_address
+            min_interval: Seconds between refreshes of the hottest pairs
+            max_interval: Seconds between refreshes of quiet pairs
+            requests_per_second: Refresh budget in batch requests per second
+            batch_size: Pair addresses per batch request
+        """
+        self.fetch_pairs = fetch_pairs
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.requests_per_second = requests_per_second
+        self.batch_size = batch_size
+
+        self._entries: Dict[str, _WatchEntry] = {}
+        self._heap: List = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._budget = max(1.0, requests_per_second)
+        self._budget_updated = time.monotonic()
+
+        self.refreshes = 0
+        self.missing = 0
+        self.errors = 0
+        self.requests = 0
+        self.max_lag = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, pair_address: str) -> bool:
+        return pair_address in self._entries
+
+    def _push(self, entry: _WatchEntry) -> None:
+        entry.generation += 1
+        heapq.heappush(self._heap, (entry.due, next(self._sequence), entry.generation, entry))
+
+    def watch(self, pair_address: str, chain_id: str = "solana", due: Optional[float] = None) -> None:
+        """Start monitoring a pair; already watched pairs keep their schedule"""
+        with self._lock:
+            if pair_address in self._entries:
+                return
+            entry = _WatchEntry(pair_address, chain_id, self.min_interval, due if due is not None else time.time())
+            self._entries[pair_address] = entry
+            self._push(entry)
+
+    def unwatch(self, pair_address: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(pair_address, None)
+            if entry is not None:
+                # The heap item is skipped lazily once its generation no longer matches
+                entry.generation += 1
+
+    def sync_from_db(self, db: Session) -> int:
+        """
+        Align the watchlist with the continuously_monitor flags
+
+        Reads only the flagged rows through the continuously_monitor index, so it is
+        meant to run every few tens of seconds rather than per tick.
+
+        Returns:
+            Number of pairs added
+        """
+        rows = db.execute(
+            select(Token.pair_address, Token.chain_id, Token.last_dexscreener_fetch_at)
+            .where(Token.continuously_monitor.is_(True), Token.pair_address.is_not(None))
+        ).all()
+        flagged = {row.pair_address for row in rows}
+        added = 0
+        now = time.time()
+        for row in rows:
+            if row.pair_address not in self._entries:
+                last_fetch = _epoch(row.last_dexscreener_fetch_at)
+                self.watch(row.pair_address, row.chain_id or "solana",
+                           due=last_fetch + self.min_interval if last_fetch else now)
+                added += 1
+        with self._lock:
+            unflagged = [pair for pair in self._entries if pair not in flagged]
+        for pair_address in unflagged:
+            self.unwatch(pair_address)
+        if added:
+            logger.info(f"Watchlist: {added} pair(s) added, {len(self._entries)} monitored")
+        return added
+
+    def interval_for(self, snapshot: PairSnapshot, previous_price: Optional[float], now: float) -> float:
+        """Refresh interval for a pair given its latest snapshot"""
+        created_at = snapshot.pair_created_at_ms / 1000 if snapshot.pair_created_at_ms else None
+        if created_at is not None and now - created_at < NEW_PAIR_AGE:
+            return self.min_interval
+
+        move = 0.0
+        if previous_price and snapshot.price_usd:
+            move = abs(snapshot.price_usd - previous_price) / previous_price
+            if move >= JUMP_THRESHOLD:
+                return self.min_interval
+        heat = abs(snapshot.price_change_h1 or 0.0) / VOLATILITY_SCALE + move / (JUMP_THRESHOLD / 5)
+        if snapshot.liquidity_usd and snapshot.volume_h1:
+            heat += snapshot.volume_h1 / snapshot.liquidity_usd
+        return min(self.max_interval, max(self.min_interval, self.max_interval / (1.0 + heat)))
+
+    def _take_budget(self, now: float) -> int:
+        """Whole batch requests available right now"""
+        self._budget = min(max(1.0, self.requests_per_second),
+                           self._budget + (now - self._budget_updated) * self.requests_per_second)
+        self._budget_updated = now
+        return int(self._budget)
+
+    def _pop_due(self, now: float, limit: int) -> List[_WatchEntry]:
+        due = []
+        while self._heap and len(due) < limit and self._heap[0][0] <= now:
+            _, _, generation, entry = heapq.heappop(self._heap)
+            if entry.generation != generation or self._entries.get(entry.pair_address) is not entry:
+                continue
+            due.append(entry)
+        return due
+
+    def next_due(self) -> Optional[float]:
+        """Due time of the earliest pair, skipping stale heap items"""
+        with self._lock:
+            while self._heap:
+                _, _, generation, entry = self._heap[0]
+                if entry.generation == generation and self._entries.get(entry.pair_address) is entry:
+                    return entry.due
+                heapq.heappop(self._heap)
+        return None
+
+    def refresh_due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch every due pair that fits the request budget and reschedule it
+
+        Returns:
+            Pair dicts returned by the API, ready for store_tokens_from_dexscreener
+        """
+        mono_now = time.monotonic()
+        now = now if now is not None else time.time()
+        with self._lock:
+            batches_allowed = self._take_budget(mono_now)
+            due = self._pop_due(now, batches_allowed * self.batch_size)
+        if not due:
+            return []
+
+        by_chain = defaultdict(list)
+        for entry in due:
+            by_chain[entry.chain_id].append(entry)
+            self.max_lag = max(self.max_lag, now - entry.due)
+
+        pairs = []
+        failed_chains = set()
+        for chain_id, entries in by_chain.items():
+            addresses = [entry.pair_address for entry in entries]
+            try:
+                pairs.extend(self.fetch_pairs(addresses, chain_id))
+            except Exception as e:
+                logger.error(f"Error refreshing {len(addresses)} watched {chain_id} pairs: {e}")
+                failed_chains.add(chain_id)
+            requests = -(-len(addresses) // self.batch_size)
+            self.requests += requests
+            with self._lock:
+                self._budget -= requests
+
+        snapshots = {}
+        for pair in pairs:
+            snapshot = PairSnapshot.from_pair(pair)
+            if snapshot is not None:
+                snapshots[snapshot.pair_address] = snapshot
+
+        with self._lock:
+            for entry in due:
+                if self._entries.get(entry.pair_address) is not entry:
+                    continue
+                snapshot = snapshots.get(entry.pair_address)
+                if entry.chain_id in failed_chains:
+                    # The request itself failed: retry at the current interval
+                    self.errors += 1
+                elif snapshot is None:
+                    # Not returned (delisted or transient error): back off
+                    self.missing += 1
+                    entry.interval = min(self.max_interval, entry.interval * 2)
+                else:
+                    self.refreshes += 1
+                    entry.interval = self.interval_for(snapshot, entry.last_price, now)
+                    entry.last_price = snapshot.price_usd or entry.last_price
+                entry.due = now + entry.interval
+                self._push(entry)
+        return pairs
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            intervals = [entry.interval for entry in self._entries.values()]
+        return {
+            "watched": len(intervals),
+            "refreshes": self.refreshes,
+            "missing": self.missing,
+            "errors": self.errors,
+            "requests": self.requests,
+            "max_lag": self.max_lag,
+            "min_interval_in_use": min(intervals) if intervals else None,
+            "mean_interval": sum(intervals) / len(intervals) if intervals else None,
+        }
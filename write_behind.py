@@ -0,0 +1,192 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from metrics import DB_FLUSH_SECONDS, LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+class _FlushRequest(threading.Event):
+    """Queue marker for flush(); ok is cleared when a write fails before it is reached"""
+
+    def __init__(self):
+        super().__init__()
+        self.ok = True
+
+class WriteBehindWriter:
+    def __init__(self, flush_fn: Callable[[List[Any]], None], batch_size: int = 500,
+                 flush_interval: float = 0.5, max_queue: int = 100000, name: str = "write-behind",
+                 retry_delay: float = 0.5, max_retry_delay: float = 30.0):
+        """
+        Buffers items and hands them to flush_fn in batches from a background thread
+
+        A batch is flushed once batch_size items are waiting or the oldest waiting item
+        is flush_interval seconds old, whichever comes first. A batch that fails is kept
+        and retried with exponential backoff; the queue is not read meanwhile, so put()
+        blocks once it fills. close() flushes everything still queued before returning,
+        giving a failing batch one last attempt.
+
+        Args:
+            flush_fn: Called with a list of items; runs on the writer thread only
+            batch_size: Maximum items per flush
+            flush_interval: Maximum seconds an item waits before being flushed
+            max_queue: Queue bound; put() blocks when full so memory stays bounded
+            name: Writer thread name
+            retry_delay: Seconds before the first retry of a failed batch
+            max_retry_delay: Cap on the doubling retry delay
+        """
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.flush_latency = LatencyTracker()
+        self._flush_seconds = DB_FLUSH_SECONDS.labels(name)
+        self.flushes = 0
+        self.items_flushed = 0
+        self.flush_errors = 0
+        self.retries = 0
+        self.items_dropped = 0
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._closing = threading.Event()
+        self._failing = False
+        self._waiters: Set[_FlushRequest] = set()
+        self._waiters_lock = threading.Lock()
+
+    def put(self, item: Any) -> None:
+        """Queue an item for writing; returns without waiting for the database"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} writer is closed")
+        self._ensure_started()
+        self._queue.put(item)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything queued before this call has been written
+
+        Returns:
+            bool: False on timeout, or as soon as a write fails; the failed items
+            stay with the writer and are retried
+        """
+        if self._thread is None:
+            return True
+        request = _FlushRequest()
+        with self._waiters_lock:
+            if self._failing:
+                return False
+            self._waiters.add(request)
+        self._queue.put(request)
+        done = request.wait(timeout)
+        with self._waiters_lock:
+            self._waiters.discard(request)
+        return done and request.ok
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush the remaining items and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._closing.set()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "flushes": self.flushes,
+            "items_flushed": self.items_flushed,
+            "flush_errors": self.flush_errors,
+            "retries": self.retries,
+            "items_dropped": self.items_dropped,
+            "failing": self._failing,
+            "flush_latency": self.flush_latency.summary(),
+        }
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        batch: List[Any] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+
+            if item is None:
+                self._flush(batch)
+                return
+            if isinstance(item, threading.Event):
+                self._flush(batch)
+                batch, deadline = [], None
+                item.set()
+                continue
+            if item is not False:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._flush(batch)
+                batch, deadline = [], None
+
+    def _flush(self, batch: List[Any]) -> None:
+        """Write a batch, retrying with backoff until it succeeds or the writer is closed"""
+        if not batch:
+            return
+        delay = self.retry_delay
+        error = self._write(batch)
+        if error is None:
+            return
+        self.flush_errors += 1
+        logger.error(f"{self.name} flush of {len(batch)} item(s) failed: {error}", exc_info=error)
+        with self._waiters_lock:
+            self._failing = True
+            for request in self._waiters:
+                request.ok = False
+                request.set()
+        while error is not None:
+            if self._closing.is_set():
+                self.items_dropped += len(batch)
+                logger.error(f"{self.name} dropped {len(batch)} unwritten item(s) at close: {error}")
+                break
+            logger.warning(f"{self.name} retrying {len(batch)} item(s) in {delay:.1f}s")
+            # close() cuts the wait short for one last attempt
+            self._closing.wait(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+            self.retries += 1
+            error = self._write(batch)
+        with self._waiters_lock:
+            self._failing = False
+
+    def _write(self, batch: List[Any]) -> Optional[Exception]:
+        start = time.perf_counter()
+        try:
+            self.flush_fn(batch)
+            self.items_flushed += len(batch)
+            return None
+        except Exception as e:
+            return e
+        finally:
+            elapsed = time.perf_counter() - start
+            self.flushes += 1
+            self.flush_latency.add(elapsed)
+            self._flush_seconds.observe(elapsed)